@@ -1,17 +1,20 @@
 from datetime import timedelta
 
-from fastapi import APIRouter, Body, status
-from jwt import decode, PyJWTError
-from pydantic import ValidationError
+from fastapi import APIRouter, Body, Depends, status
 
 from fast_admin.core.config import settings
+from fast_admin.core.dependencies import permission_required
 from fast_admin.core.exceptions import CustomException
 from fast_admin.core.security import (
     create_access_token,
     create_refresh_token,
+    create_permission_claims,
+    decode_token,
 )
+from fast_admin.core.password import password_service
 from fast_admin.models.user import get_user_by_username
-from fast_admin.schemas.token import Token, TokenPayload
+from fast_admin.schemas.auth import PasswordMetrics
+from fast_admin.schemas.token import Token
 from fast_admin.schemas.user import UserLogin
 
 router = APIRouter()
@@ -32,7 +35,7 @@ async def login(user_in: UserLogin = Body(...)):
         CustomException: 如果用户名或密码错误，则抛出 HTTP 401 错误.
     """
     user = await get_user_by_username(user_in.username)
-    if not user or not user.verify_password(user_in.password):
+    if not user or not await user.verify_password(user_in.password):
         raise CustomException(
             msg="用户名或密码错误",
             status_code=status.HTTP_401_UNAUTHORIZED
@@ -41,7 +44,9 @@ async def login(user_in: UserLogin = Body(...)):
     refresh_token_expires = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
 
     new_access_token = create_access_token(
-        subject=user.username, expires_delta=access_token_expires
+        subject=user.username,
+        expires_delta=access_token_expires,
+        claims=await create_permission_claims(user) if settings.AUTH_STATELESS else None,
     )
     new_refresh_token = create_refresh_token(
         subject=user.username, expires_delta=refresh_token_expires
@@ -64,32 +69,35 @@ async def refresh_token(refresh_token: str = Body(...)):
     Raises:
         CustomException: 如果刷新令牌无效，则抛出 HTTP 401 错误.
     """
-    try:
-        payload = decode(
-            refresh_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
-        if token_data.type != "refresh":
-            raise CustomException(
-                msg="令牌类型错误",
-                status_code=status.HTTP_401_UNAUTHORIZED,
-            )
-        # 获取用户信息
-        user = await get_user_by_username(username=token_data.sub)
-    except (PyJWTError, ValidationError):
+    token_data = decode_token(refresh_token)
+    if token_data.type != "refresh":
         raise CustomException(
-            msg="令牌无效",
+            msg="令牌类型错误",
             status_code=status.HTTP_401_UNAUTHORIZED,
         )
+    # 获取用户信息
+    user = await get_user_by_username(username=token_data.sub)
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     refresh_token_expires = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
 
     new_access_token = create_access_token(
-        subject=user.username, expires_delta=access_token_expires
+        subject=user.username,
+        expires_delta=access_token_expires,
+        claims=await create_permission_claims(user) if settings.AUTH_STATELESS else None,
     )
     new_refresh_token = create_refresh_token(
         subject=user.username, expires_delta=refresh_token_expires
     )
 
     return {"access_token": new_access_token, "refresh_token": new_refresh_token, "token_type": "bearer"}
+
+
+@router.get("/metrics", response_model=PasswordMetrics, dependencies=[Depends(permission_required(permission_code="auth:metrics"))])
+async def get_password_metrics():
+    """
+    获取密码服务的运行指标.
+
+    登录变慢时可据此判断是否需要调整 PASSWORD_MAX_CONCURRENCY.
+    """
+    return password_service.metrics()
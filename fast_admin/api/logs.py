@@ -1,68 +1,310 @@
-from typing import Optional
+import csv
+import io
+import zlib
+from typing import List, Optional, Union
 from datetime import datetime
-from fastapi import APIRouter, Query, Depends
 
-from fast_admin.core.pagination import paginate, Pagination
+import orjson
+from fastapi import APIRouter, Query, Depends, Request, Header, status
+from fastapi.responses import StreamingResponse
+from tortoise.queryset import QuerySet
+
+from fast_admin.core.exceptions import CustomException
+from fast_admin.core.pagination import paginate, cursor_paginate, keyset_batches, Pagination, CursorPagination
+from fast_admin.core.log_search import search_logs
+from fast_admin.core.log_archive import log_archive, paginate_with_archive
+from fast_admin.core.config import settings
+from fast_admin.core.logger import logger, db_log_sink, log_stream_buffer
 from fast_admin.models.logs import Log
-from fast_admin.schemas.logs import LogOut
+from fast_admin.models.log_rollup import log_histogram
+from fast_admin.schemas.logs import LogOut, LogSinkMetrics, LogHistogramBucket
 from fast_admin.core.dependencies import permission_required
 
 router = APIRouter()
 
+# 允许排序的字段，均为索引的首列或主键，避免对大表的全表排序
+ORDERABLE_FIELDS = ("timestamp", "id", "level", "logger_name", "module")
+
+# 导出格式对应的媒体类型
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+class LogFilter:
+    """
+    日志筛选条件。
+
+    作为依赖注入到日志查询与导出接口中，两个接口接受相同的筛选参数。
+    """
+
+    def __init__(
+            self,
+            level: Optional[str] = Query(None, description="日志级别"),
+            process: Optional[str] = Query(None, description="进程信息"),
+            thread: Optional[str] = Query(None, description="线程信息"),
+            logger_name: Optional[str] = Query(None, description="记录器名称"),
+            module: Optional[str] = Query(None, description="模块名称"),
+            function_name: Optional[str] = Query(None, description="函数名称"),
+            message: Optional[str] = Query(None, description="日志消息"),
+            exception: Optional[str] = Query(None, description="异常信息"),
+            start_time: Optional[datetime] = Query(None, description="起始时间"),
+            end_time: Optional[datetime] = Query(None, description="结束时间"),
+    ):
+        self.exact = {
+            "level": level,
+            "process": process,
+            "thread": thread,
+            "logger_name": logger_name,
+            "module": module,
+            "function_name": function_name
+        }
+        self.contains = {"message": message, "exception": exception}
+        self.start_time = start_time
+        self.end_time = end_time
 
-@router.get("/", response_model=Pagination[LogOut], dependencies=[Depends(permission_required(permission_code="log:read"))])
+    def apply(self, query: QuerySet[Log]) -> QuerySet[Log]:
+        """
+        将筛选条件应用到查询集.
+
+        Args:
+            query: 日志查询集.
+
+        Returns:
+            筛选后的查询集.
+        """
+        # 精确搜索
+        for field, value in self.exact.items():
+            if value is not None:
+                query = query.filter(**{field: value})
+
+        # 模糊搜索
+        for field, value in self.contains.items():
+            if value:
+                query = query.filter(**{f"{field}__icontains": value})
+
+        # 时间范围过滤
+        if self.start_time:
+            query = query.filter(timestamp__gte=self.start_time)
+        if self.end_time:
+            query = query.filter(timestamp__lte=self.end_time)
+        return query
+
+
+@router.get("/", response_model=Union[Pagination[LogOut], CursorPagination[LogOut]], dependencies=[Depends(permission_required(permission_code="log:read"))])
 async def get_logs(
-        level: Optional[str] = Query(None, description="日志级别"),
-        process: Optional[str] = Query(None, description="进程信息"),
-        thread: Optional[str] = Query(None, description="线程信息"),
-        logger_name: Optional[str] = Query(None, description="记录器名称"),
-        module: Optional[str] = Query(None, description="模块名称"),
-        function_name: Optional[str] = Query(None, description="函数名称"),
-        message: Optional[str] = Query(None, description="日志消息"),
-        exception: Optional[str] = Query(None, description="异常信息"),
-        start_time: Optional[datetime] = Query(None, description="起始时间"),
-        end_time: Optional[datetime] = Query(None, description="结束时间"),
+        filters: LogFilter = Depends(),
+        q: Optional[str] = Query(None, description="搜索日志消息和异常信息，结果按相关度排序"),
+        match: str = Query("phrase", description="搜索的匹配方式 (phrase 短语，prefix 前缀，fuzzy 模糊)"),
+        pagination: str = Query("page", description="分页方式 (page 按页码分页，cursor 按游标分页)"),
+        cursor: Optional[str] = Query(None, description="游标，取自上一次响应的 next_cursor 或 prev_cursor，仅用于游标分页"),
         page: int = Query(1, ge=1, description="页码"),
         page_size: int = Query(10, ge=1, le=100, description="每页数量"),
-        order_by: Optional[str] = Query(None, description="排序字段 (例如：timestamp, level)"),
+        count_mode: str = Query("exact", description="总数的计算方式 (exact 精确计数，estimated 估算，none 不计算)"),
+        order_by: Optional[str] = Query(None, description=f"排序字段 ({', '.join(ORDERABLE_FIELDS)})"),
         order: Optional[str] = Query("asc", description="排序方式 (asc 或 desc)")
 ):
     """
     获取日志列表。
 
-    支持筛选和排序，并提供分页功能。
+    支持筛选和排序，并提供分页功能。游标分页按 (timestamp, id) 排序，
+    深度翻页无需扫描之前的数据，翻页过程中写入的新日志也不会导致结果重复或遗漏。
+
+    传入 q 时使用索引搜索日志消息和异常信息，结果按相关度排序，仅支持按页码分页。
+
+    start_time 早于最新的归档日志时，同时读取归档段中的日志，仅支持按页码分页并按时间排序；搜索不读取归档。
     """
-    query = Log.all()
-
-    filters = {
-        "level": level,
-        "process": process,
-        "thread": thread,
-        "logger_name": logger_name,
-        "module": module,
-        "function_name": function_name
-    }
-    # 精确搜索
-    for field, value in filters.items():
-        if value is not None:
-            query = query.filter(**{field: value})
-
-    # 模糊搜索
-    if message:
-        query = query.filter(message__icontains=message)
-    if exception:
-        query = query.filter(exception__icontains=exception)
-
-    # 时间范围过滤
-    if start_time:
-        query = query.filter(timestamp__gte=start_time)
-    if end_time:
-        query = query.filter(timestamp__lte=end_time)
+    # 索引搜索
+    if q:
+        items, total = await search_logs(
+            q,
+            match,
+            filters=filters.exact,
+            contains=filters.contains,
+            start_time=filters.start_time,
+            end_time=filters.end_time,
+            page=page,
+            page_size=page_size,
+            count_mode=count_mode,
+        )
+        return Pagination(items=items, total=total, page=page, page_size=page_size)
+
+    query = filters.apply(Log.all())
+
+    # 读取归档日志
+    if filters.start_time and log_archive.covers(filters.start_time):
+        if pagination == "cursor" or order_by not in (None, "timestamp"):
+            raise CustomException(
+                msg="查询归档日志时只支持按页码分页并按 timestamp 排序",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        return await paginate_with_archive(
+            log_archive,
+            query,
+            filters=filters.exact,
+            contains=filters.contains,
+            start_time=filters.start_time,
+            end_time=filters.end_time,
+            page=page,
+            page_size=page_size,
+            count_mode=count_mode,
+            descending=order_by is None or order.lower() == "desc",
+        )
+
+    # 游标分页，只支持按时间排序，默认倒序
+    if pagination == "cursor":
+        if order_by not in (None, "timestamp"):
+            raise CustomException(
+                msg="游标分页只支持按 timestamp 排序",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        descending = order_by is None or order.lower() == "desc"
+        return await cursor_paginate(query, cursor, page_size, field="timestamp", descending=descending)
 
     # 排序
     if order_by:
+        if order_by not in ORDERABLE_FIELDS:
+            raise CustomException(
+                msg=f"不支持的排序字段: {order_by}",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
         order_by_field = f"-{order_by}" if order.lower() == "desc" else order_by
         query = query.order_by(order_by_field)
 
     # 分页
-    return await paginate(query, page, page_size)
+    return await paginate(query, page, page_size, count_mode)
+
+
+@router.get("/export", dependencies=[Depends(permission_required(permission_code="log:read"))])
+async def export_logs(
+        filters: LogFilter = Depends(),
+        format: str = Query("ndjson", description="导出格式 (ndjson 或 csv)"),
+        compress: bool = Query(False, description="是否使用 gzip 压缩"),
+):
+    """
+    导出日志。
+
+    按 (timestamp, id) 分批读取并流式输出，内存占用与导出的数据量无关。
+    """
+    if format not in EXPORT_MEDIA_TYPES:
+        raise CustomException(
+            msg=f"不支持的导出格式: {format}",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+
+    fields = list(Log._meta.fields_db_projection)
+    batches = keyset_batches(filters.apply(Log.all()), fields, settings.LOG_EXPORT_BATCH_SIZE)
+
+    async def ndjson():
+        async for rows in batches:
+            yield b"".join(orjson.dumps(row) + b"\n" for row in rows)
+
+    async def csv_rows():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields)
+        writer.writeheader()
+        async for rows in batches:
+            writer.writerows(rows)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+    async def gzipped(chunks):
+        compressor = zlib.compressobj(wbits=31)  # wbits=31 输出 gzip 格式
+        async for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    content = ndjson() if format == "ndjson" else csv_rows()
+    filename = f"logs.{format}"
+    media_type = EXPORT_MEDIA_TYPES[format]
+    if compress:
+        content = gzipped(content)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/histogram", response_model=List[LogHistogramBucket], dependencies=[Depends(permission_required(permission_code="log:read"))])
+async def get_log_histogram(
+        interval: int = Query(60, ge=60, description="桶宽度（秒），为 60 的整数倍"),
+        level: Optional[str] = Query(None, description="日志级别"),
+        logger_name: Optional[str] = Query(None, description="记录器名称"),
+        start_time: Optional[datetime] = Query(None, description="起始时间"),
+        end_time: Optional[datetime] = Query(None, description="结束时间"),
+):
+    """
+    获取日志直方图。
+
+    按桶宽度、日志级别和记录器名称统计日志数量，只读取日志汇总表。
+    """
+    if interval % 60:
+        raise CustomException(
+            msg="桶宽度必须为 60 的整数倍",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    return await log_histogram(interval, start_time, end_time, level, logger_name)
+
+
+@router.get("/metrics", response_model=LogSinkMetrics, dependencies=[Depends(permission_required(permission_code="log:read"))])
+async def get_log_sink_metrics():
+    """
+    获取数据库日志处理器的运行指标。
+    """
+    return db_log_sink.metrics()
+
+
+@router.get("/stream", dependencies=[Depends(permission_required(permission_code="log:read"))])
+async def stream_logs(
+        request: Request,
+        level: Optional[str] = Query(None, description="最低日志级别"),
+        logger_name: Optional[str] = Query(None, description="记录器名称，匹配该名称及其子记录器"),
+        q: Optional[str] = Query(None, description="日志消息包含的文本，不区分大小写"),
+        last_event_id: Optional[int] = Header(None, description="断线重连时由浏览器自动携带的最后一条日志序号"),
+):
+    """
+    实时日志。
+
+    以 Server-Sent Events 推送新日志，数据来自进程内的日志缓冲区，不查询数据库。
+    断线重连时从 Last-Event-ID 之后继续推送缓冲区中的日志。
+    """
+    try:
+        level_no = logger.level(level.upper()).no if level else 0
+    except ValueError:
+        raise CustomException(
+            msg=f"不支持的日志级别: {level}",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    keyword = q.lower() if q else None
+
+    def matches(row: dict) -> bool:
+        if row["level_no"] < level_no:
+            return False
+        if logger_name and row["logger_name"] != logger_name and not row["logger_name"].startswith(f"{logger_name}."):
+            return False
+        return keyword is None or keyword in row["message"].lower()
+
+    async def events():
+        seq = log_stream_buffer.last_seq if last_event_id is None else last_event_id
+        while not await request.is_disconnected():
+            rows = await log_stream_buffer.wait(seq, timeout=settings.LOG_STREAM_HEARTBEAT)
+            if not rows:
+                yield ": keep-alive\n\n"
+                continue
+            seq = rows[-1]["seq"]
+            for row in rows:
+                if matches(row):
+                    yield f"id: {row['seq']}\ndata: {orjson.dumps(row).decode()}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
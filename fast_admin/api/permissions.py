@@ -1,11 +1,12 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 from tortoise.exceptions import IntegrityError
 
 from fast_admin.core.exceptions import CustomException
-from fast_admin.models.permission import Permission
-from fast_admin.schemas.permission import Permission as PermissionSchema, PermissionCreate, PermissionUpdate
+from fast_admin.models.effective_permission import rename_effective_permission
+from fast_admin.models.permission import Permission, permission_registry
+from fast_admin.schemas.permission import Permission as PermissionSchema, PermissionCreate, PermissionUpdate, RoutePolicy
 from fast_admin.core.dependencies import permission_required
 
 router = APIRouter()
@@ -33,6 +34,7 @@ async def create_permission(permission_in: PermissionCreate):
             msg="权限名称或代码已存在",
             status_code=status.HTTP_400_BAD_REQUEST
         )
+    await permission_registry.refresh_permissions(permission.id)
     return permission
 
 
@@ -48,6 +50,17 @@ async def list_permissions():
     return permissions
 
 
+@router.get("/routes", response_model=List[RoutePolicy], dependencies=[Depends(permission_required(permission_code="permission:list", permission_type="page"))])
+async def list_route_policies(request: Request):
+    """
+    获取路由授权表.
+
+    Returns:
+        每个路由所需的权限列表.
+    """
+    return request.app.state.route_policies.as_list()
+
+
 @router.get("/{permission_id}", response_model=PermissionSchema, dependencies=[Depends(permission_required(permission_code="permission:read"))])
 async def get_permission(permission_id: int):
     """
@@ -105,6 +118,9 @@ async def update_permission(permission_id: int, permission_in: PermissionUpdate)
             msg="权限名称或代码已存在",
             status_code=status.HTTP_400_BAD_REQUEST
         )
+    # 权限代码或类型可能已变更，同步用户有效权限并刷新权限的位索引
+    await rename_effective_permission(permission.id, permission.code, permission.type)
+    await permission_registry.refresh_permissions(permission.id)
 
     return permission
 
@@ -127,4 +143,6 @@ async def delete_permission(permission_id: int):
             msg="权限不存在",
             status_code=status.HTTP_404_NOT_FOUND
         )
+    # 用户有效权限通过外键级联删除
     await permission.delete()
+    await permission_registry.refresh_permissions(permission.id)
@@ -6,13 +6,14 @@ from tortoise.exceptions import IntegrityError
 from fast_admin.models.permission import Permission
 from fast_admin.core.exceptions import CustomException
 from fast_admin.models.role import Role
+from fast_admin.models.user import get_role_user_ids, refresh_user_permissions
 from fast_admin.schemas.role import Role as RoleSchema, RoleCreate, RoleUpdate
 from fast_admin.core.dependencies import permission_required
 
 router = APIRouter()
 
 
-@router.post("/", response_model=RoleSchema, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=RoleSchema, status_code=status.HTTP_201_CREATED, dependencies=[Depends(permission_required(permission_code="role:create"))])
 async def create_role(role_in: RoleCreate):
     """
     创建新的角色.
@@ -114,6 +115,7 @@ async def update_role(role_id: int, role_in: RoleUpdate):
                     for permission_id in role_in.permission_ids
                 ]
             )
+            await refresh_user_permissions(*await get_role_user_ids(role.id))
 
     except IntegrityError:
         raise CustomException(
@@ -141,4 +143,6 @@ async def delete_role(role_id: int):
             msg="角色不存在",
             status_code=status.HTTP_404_NOT_FOUND
         )
+    user_ids = await get_role_user_ids(role.id)
     await role.delete()
+    await refresh_user_permissions(*user_ids)
@@ -1,11 +1,16 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Query
 from tortoise.exceptions import IntegrityError
 
 from fast_admin.models.role import Role
-from fast_admin.models.user import User, pwd_context
+from fast_admin.models.user import (
+    User,
+    invalidate_user,
+    refresh_user_permissions,
+)
 from fast_admin.core.exceptions import CustomException
+from fast_admin.core.password import password_service
 from fast_admin.schemas.user import User as UserSchema, UserCreate, UserUpdate
 from fast_admin.core.dependencies import permission_required, get_current_user_from_request
 
@@ -30,7 +35,7 @@ async def create_user(user_in: UserCreate):
         # 创建用户
         user = await User.create(
             username=user_in.username,
-            password_hash=pwd_context.hash(user_in.password),
+            password_hash=await password_service.hash(user_in.password),
             is_active=user_in.is_active,
             is_superuser=user_in.is_superuser
         )
@@ -40,6 +45,7 @@ async def create_user(user_in: UserCreate):
             roles = await Role.filter(id__in=user_in.role_ids).all()  # 批量获取角色
             if roles:
                 await user.roles.add(*roles)  # 分配角色
+                await refresh_user_permissions(user.id)
 
     except IntegrityError:
         raise CustomException(
@@ -52,14 +58,22 @@ async def create_user(user_in: UserCreate):
 
 
 @router.get("/", response_model=List[UserSchema], dependencies=[Depends(permission_required(permission_code="user:list"))])
-async def list_users():
+async def list_users(
+        permission_code: Optional[str] = Query(None, description="按拥有的权限代码筛选"),
+):
     """
     获取所有用户列表.
 
+    Args:
+        permission_code: 权限代码，指定时只返回拥有该权限的用户.
+
     Returns:
         所有用户的列表.
     """
-    users = await User.all().prefetch_related("roles__permissions")
+    query = User.all()
+    if permission_code:
+        query = query.filter(effective_permissions__code=permission_code)
+    users = await query.prefetch_related("roles__permissions")
     return users
 
 
@@ -68,7 +82,7 @@ async def get_current_user_info(current_user: User = Depends(get_current_user_fr
     """
     获取当前登录用户的信息.
     """
-    return current_user
+    return await User.get(id=current_user.id).prefetch_related("roles__permissions")
 
 
 @router.get("/{user_id}", response_model=UserSchema, dependencies=[Depends(permission_required(permission_code="user:read"))])
@@ -118,16 +132,19 @@ async def update_user(user_id: int, user_in: UserUpdate):
             status_code=status.HTTP_404_NOT_FOUND
         )
 
+    old_username = user.username
     try:
         for key, value in user_in.model_dump(exclude_unset=True, exclude={"role_ids"}).items():
             setattr(user, key, value)
         await user.save()
+        await invalidate_user(old_username, user.username)
 
         if user_in.role_ids is not None:
             await user.roles.clear()
             await user.roles.add(
                 *[await Role.get(id=role_id) for role_id in user_in.role_ids]
             )
+        await refresh_user_permissions(user.id)
     except IntegrityError:
         raise CustomException(
             msg="用户名已存在",
@@ -155,4 +172,6 @@ async def delete_user(user_id: int):
             status_code=status.HTTP_404_NOT_FOUND
         )
     await user.delete()
+    await invalidate_user(user.username)
+    await refresh_user_permissions(user.id)
     return {"message": "删除成功"}
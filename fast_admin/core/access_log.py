@@ -0,0 +1,165 @@
+import asyncio
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+from loguru import logger
+
+from fast_admin.models.access_log import add_access_summary
+
+"""
+访问日志模块。
+
+此模块代替 uvicorn.access 记录器输出结构化的访问日志，包括：
+
+- 定义 log_access 函数，输出请求方法、路由模板、状态码、耗时和用户 ID，2xx/3xx 响应按比例采样，4xx/5xx 响应全部输出。
+  访问日志带有 access 标记，只写入控制台与日志文件，不写入数据库日志和实时日志缓冲区。
+- 定义 AccessLogAggregator 类，按分钟、请求方法和路由模板汇总请求次数与耗时。
+- 定义 run_access_log_summary 后台任务，每分钟将汇总写入 access_log_summary 表，代替逐请求写入数据库。
+
+"""
+
+# 未匹配到路由的请求在汇总中使用的路由名，避免任意路径产生大量汇总行
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def is_access_record(record: dict) -> bool:
+    """
+    判断 loguru 日志记录是否是访问日志，用作处理器的过滤条件.
+
+    Args:
+        record: loguru 的日志记录.
+
+    Returns:
+        如果是访问日志，则返回 True.
+    """
+    return "access" in record["extra"]
+
+
+class AccessLogAggregator:
+    """
+    访问日志汇总器。
+
+    add 方法是线程安全的，只在内存中累加当前分钟的汇总；drain 方法取出已结束分钟的汇总行。
+
+    汇总行的字段与 AccessLogSummary 一致：bucket_start、method、route、count、error_count、total_ms、max_ms。
+    """
+
+    def __init__(self):
+        self._buckets: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def add(self, method: str, route: str, status_code: int, duration_ms: float) -> None:
+        """
+        累加一次请求.
+
+        Args:
+            method: 请求方法.
+            route: 路由模板.
+            status_code: 响应状态码.
+            duration_ms: 耗时（毫秒）.
+        """
+        bucket_start = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        key = (bucket_start, method, route)
+        with self._lock:
+            stats = self._buckets.get(key)
+            if stats is None:
+                stats = self._buckets[key] = [0, 0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += status_code >= 400
+            stats[2] += duration_ms
+            stats[3] = max(stats[3], duration_ms)
+
+    def drain(self, force: bool = False) -> list[dict]:
+        """
+        取出已结束分钟的汇总行.
+
+        Args:
+            force: 是否同时取出当前分钟的汇总，用于停止时写入剩余的汇总.
+
+        Returns:
+            汇总行列表.
+        """
+        current = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        rows = []
+        with self._lock:
+            for key in [key for key in self._buckets if force or key[0] < current]:
+                count, error_count, total_ms, max_ms = self._buckets.pop(key)
+                rows.append({
+                    "bucket_start": key[0],
+                    "method": key[1],
+                    "route": key[2],
+                    "count": count,
+                    "error_count": error_count,
+                    "total_ms": total_ms,
+                    "max_ms": max_ms,
+                })
+        return rows
+
+
+def log_access(
+        method: str,
+        path: str,
+        route: Optional[str],
+        status_code: int,
+        duration_ms: float,
+        user_id: Optional[int] = None,
+        sample_rate: float = 1.0,
+        aggregator: Optional[AccessLogAggregator] = None,
+) -> None:
+    """
+    记录一次请求的访问日志.
+
+    Args:
+        method: 请求方法.
+        path: 请求路径，未匹配到路由时输出.
+        route: 路由模板，例如 /users/{user_id}，未匹配到路由时为空.
+        status_code: 响应状态码.
+        duration_ms: 耗时（毫秒）.
+        user_id: 当前用户 ID，匿名请求为空；记录不可变的 ID 而不是用户名，用户改名后仍能关联.
+        sample_rate: 2xx/3xx 响应的采样比例，0 到 1.
+        aggregator: 访问日志汇总器，为空时不汇总.
+    """
+    if aggregator is not None:
+        aggregator.add(method, route or UNMATCHED_ROUTE, status_code, duration_ms)
+
+    if status_code < 400 and (sample_rate <= 0 or (sample_rate < 1 and random.random() >= sample_rate)):
+        return
+
+    logger.bind(
+        access=True,
+        method=method,
+        route=route or path,
+        status_code=status_code,
+        duration_ms=round(duration_ms, 3),
+        user_id=user_id,
+    ).log(
+        "ERROR" if status_code >= 500 else "WARNING" if status_code >= 400 else "INFO",
+        f"{method} {route or path} {status_code} {duration_ms:.3f}ms user_id={user_id if user_id is not None else '-'}",
+    )
+
+
+async def run_access_log_summary(aggregator: AccessLogAggregator, period: float = 60) -> None:
+    """
+    后台任务，每隔 period 秒将已结束分钟的访问日志汇总写入数据库，任务被取消时写入剩余的汇总.
+
+    Args:
+        aggregator: 访问日志汇总器.
+        period: 两次写入的间隔（秒）.
+    """
+    try:
+        while True:
+            await asyncio.sleep(period)
+            await _write_summary(aggregator.drain())
+    except asyncio.CancelledError:
+        await _write_summary(aggregator.drain(force=True))
+        raise
+
+
+async def _write_summary(rows: list[dict]) -> None:
+    """写入访问日志汇总，失败时丢弃该批汇总"""
+    try:
+        await add_access_summary(rows)
+    except Exception as exc:
+        logger.error(f"访问日志汇总写入失败: {exc!r}")
@@ -0,0 +1,232 @@
+import re
+from typing import Any, Iterable, Iterator, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
+
+from fast_admin.core.config import settings
+from fast_admin.models.permission import PermissionRef
+
+"""
+路由授权模块。
+
+此模块在应用程序启动时遍历全部路由，根据路由上声明的 permission_required 依赖，
+编译出 (请求方法, 路径模板) -> 所需权限 的授权表，由认证中间件在一次查表中完成鉴权，包括：
+
+- 定义 PathMatcher 类，将路径规则预编译为正则表达式集合，用于白名单与路由授权表的匹配。
+- 定义 auth_whitelist 白名单匹配器和 is_whitelisted 函数。
+- 定义 RoutePolicyTable 类，保存编译后的授权表。
+- 定义 compile_route_policies 函数，编译授权表并检查修改类路由是否都声明了权限、白名单路由是否声明了权限。
+
+"""
+
+# 修改数据的请求方法，此类路由必须声明权限
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+_PATTERN_TOKEN = re.compile(r"(\{[^}]+\}|\*)")
+
+
+def _normalize_path(path: str) -> str:
+    """去掉路径末尾的斜杠，根路径除外"""
+    return path.rstrip("/") or "/"
+
+
+def _compile_pattern(pattern: str) -> str:
+    """将路径规则转换为正则表达式"""
+    regex = ""
+    for part in _PATTERN_TOKEN.split(_normalize_path(pattern)):
+        if part == "*":
+            regex += ".*"
+        elif part.startswith("{") and part.endswith("}"):
+            if part.endswith(":path}"):
+                regex += ".+"
+            elif part.endswith(":int}"):
+                regex += "[0-9]+"
+            else:
+                regex += "[^/]+"
+        else:
+            regex += re.escape(part)
+    return regex
+
+
+class PathMatcher:
+    """
+    路径匹配器。
+
+    规则格式为 "[请求方法] 路径"，未指定请求方法时匹配全部方法，路径支持:
+
+    - 精确路径，例如 "/auth/login"，末尾的斜杠不影响匹配.
+    - 通配符，例如 "/docs/*"，"*" 匹配任意字符.
+    - 路径模板，例如 "/users/{user_id}"，"{name}" 匹配一个路径段，"{name:int}" 匹配一个由数字组成的路径段，
+      "{name:path}" 匹配多个路径段.
+
+    规则按请求方法分组，每组预编译为一个正则表达式，匹配时按添加顺序返回第一条匹配规则的值.
+    """
+
+    def __init__(self, rules: Iterable[str] = ()):
+        self._rules: list[tuple[Optional[str], str, Any]] = []
+        self._compiled: Optional[dict[Optional[str], tuple[re.Pattern, list]]] = None
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule: str, value: Any = True) -> None:
+        """
+        添加规则.
+
+        Args:
+            rule: 规则，例如 "POST /auth/login".
+            value: 规则匹配时返回的值.
+        """
+        method, _, path = rule.strip().rpartition(" ")
+        self._rules.append((method.upper() or None, _compile_pattern(path), value))
+        self._compiled = None
+
+    def _compile(self) -> dict[Optional[str], tuple[re.Pattern, list]]:
+        compiled = {}
+        methods = {method for method, _, _ in self._rules if method is not None}
+        for group in [None, *methods]:
+            rules = [(regex, value) for method, regex, value in self._rules if method is None or method == group]
+            pattern = "|".join(f"(?P<r{index}>{regex})" for index, (regex, _) in enumerate(rules))
+            compiled[group] = (re.compile(pattern or "(?!)"), [value for _, value in rules])
+        return compiled
+
+    def match(self, method: str, path: str) -> Optional[Any]:
+        """
+        匹配请求.
+
+        Args:
+            method: 请求方法.
+            path: 请求路径.
+
+        Returns:
+            第一条匹配规则的值，没有匹配的规则时返回 None.
+        """
+        if self._compiled is None:
+            self._compiled = self._compile()
+        regex, values = self._compiled.get(method, self._compiled[None])
+        matched = regex.fullmatch(_normalize_path(path))
+        if matched is None:
+            return None
+        return values[int(matched.lastgroup[1:])]
+
+
+# 白名单匹配器
+auth_whitelist = PathMatcher(settings.AUTH_WHITELIST)
+
+
+def is_whitelisted(request: Request) -> bool:
+    """
+    判断请求是否在白名单中.
+
+    每个请求只匹配一次，结果保存在 request.state.whitelisted 中供后续的依赖复用.
+
+    Args:
+        request: FastAPI 的 Request 对象.
+
+    Returns:
+        如果请求在白名单中，则返回 True，否则返回 False.
+    """
+    whitelisted = getattr(request.state, "whitelisted", None)
+    if whitelisted is None:
+        whitelisted = auth_whitelist.match(request.method, request.url.path) is not None
+        request.state.whitelisted = whitelisted
+    return whitelisted
+
+
+class RoutePolicyTable:
+    """
+    路由授权表。
+
+    全部路由以 "请求方法 路径模板" 规则的形式按注册顺序编译到路径匹配器中，未声明权限的路由对应 None，
+    因此第一条匹配的规则与路由解析得到的路由一致，例如 "/users/me" 不会被其后注册的 "/users/{user_id}" 匹配.
+    """
+
+    def __init__(self):
+        self.policies: dict[tuple[str, str], PermissionRef] = {}
+        self._matcher = PathMatcher()
+
+    def add(self, method: str, route: APIRoute, permission: Optional[PermissionRef]) -> None:
+        """
+        添加路由权限.
+
+        Args:
+            method: 请求方法.
+            route: 路由.
+            permission: 所需权限，路由未声明权限时为 None.
+        """
+        if permission is not None:
+            self.policies[(method, route.path)] = permission
+        self._matcher.add(f"{method} {route.path}", permission)
+
+    def match(self, method: str, path: str) -> Optional[PermissionRef]:
+        """
+        查找请求所需的权限.
+
+        Args:
+            method: 请求方法.
+            path: 请求路径.
+
+        Returns:
+            所需权限，路由未声明权限时返回 None.
+        """
+        return self._matcher.match(method, path)
+
+    def as_list(self) -> list[dict]:
+        """
+        以列表形式导出授权表.
+
+        Returns:
+            授权表条目列表.
+        """
+        return [
+            {"method": method, "path": path, "code": permission.code, "type": permission.type}
+            for (method, path), permission in self.policies.items()
+        ]
+
+
+def _iter_permissions(dependant: Dependant) -> Iterator[PermissionRef]:
+    """递归查找依赖中声明的权限"""
+    for sub_dependant in dependant.dependencies:
+        permission = getattr(sub_dependant.call, "permission", None)
+        if isinstance(permission, PermissionRef):
+            yield permission
+        yield from _iter_permissions(sub_dependant)
+
+
+def compile_route_policies(app: FastAPI, whitelist: PathMatcher) -> RoutePolicyTable:
+    """
+    编译路由授权表.
+
+    Args:
+        app: FastAPI 应用程序实例.
+        whitelist: 白名单匹配器.
+
+    Returns:
+        路由授权表.
+
+    Raises:
+        RuntimeError: 如果存在未声明权限且不在白名单中的修改类路由，或声明了权限的白名单路由.
+    """
+    table = RoutePolicyTable()
+    unguarded = []
+    conflicting = []
+
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        permissions = list(_iter_permissions(route.dependant))
+        for method in sorted(route.methods):
+            table.add(method, route, permissions[0] if permissions else None)
+            whitelisted = whitelist.match(method, route.path) is not None
+            # 白名单路由不经过鉴权，声明的权限不会生效，授权表中列出的权限会误导管理员
+            if permissions and whitelisted:
+                conflicting.append(f"{method} {route.path}")
+            elif not permissions and method in MUTATING_METHODS and not whitelisted:
+                unguarded.append(f"{method} {route.path}")
+
+    if unguarded:
+        raise RuntimeError(f"以下修改类路由未声明权限: {', '.join(unguarded)}")
+    if conflicting:
+        raise RuntimeError(f"以下路由在白名单中，声明的权限不会生效: {', '.join(conflicting)}")
+    return table
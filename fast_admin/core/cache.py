@@ -0,0 +1,406 @@
+import asyncio
+import inspect
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+import orjson
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from fast_admin.core.config import settings
+
+"""
+缓存模块。
+
+此模块包含应用程序的缓存实现，包括：
+
+- 定义 TTLCache 类，一个带过期时间的进程内 LRU 缓存。
+- 定义 SharedCache 类，在 Redis 共享缓存前放置一层进程内近端缓存。
+- 定义 VersionCounter 类，一个可在多个 worker 之间共享的版本计数器。
+- 定义 bind_redis / unbind_redis 函数，为全部共享缓存绑定 Redis 客户端，
+  并通过 Redis 发布订阅在多个 worker 之间同步缓存失效消息。
+- 定义 on_invalidation / publish_invalidation 函数，供其他进程内状态订阅和发布失效消息。
+
+"""
+
+# 当前进程的唯一标识，用于忽略自身发布的失效消息
+WORKER_ID = uuid.uuid4().hex
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    带过期时间的 LRU 缓存。
+
+    缓存条目超过 ttl 秒后视为过期，条目数量超过 maxsize 时淘汰最久未使用的条目。
+    此缓存仅在事件循环线程中使用，因此不加锁。
+
+    Attributes:
+        maxsize: 缓存的最大条目数.
+        ttl: 缓存条目的默认有效期（秒）.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        获取缓存条目.
+
+        Args:
+            key: 缓存键.
+            default: 条目不存在或已过期时返回的默认值.
+
+        Returns:
+            缓存值或默认值.
+        """
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            return default
+        expire_at, value = item
+        if expire_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        写入缓存条目.
+
+        Args:
+            key: 缓存键.
+            value: 缓存值.
+            ttl: 条目的有效期（秒），为 None 时使用默认有效期.
+        """
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        删除缓存条目.
+
+        Args:
+            key: 缓存键.
+            default: 条目不存在时返回的默认值.
+
+        Returns:
+            被删除的缓存值或默认值.
+        """
+        item = self._data.pop(key, _MISSING)
+        return default if item is _MISSING else item[1]
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# 失效消息处理函数: 命名空间 -> 处理函数，参数为失效的键列表，空列表表示全部失效
+_invalidation_handlers: dict[str, Callable[[list], Any]] = {}
+_redis: Optional[Redis] = None
+_listener: Optional[asyncio.Task] = None
+
+
+def on_invalidation(namespace: str, handler: Callable[[list], Any]) -> None:
+    """
+    注册失效消息处理函数.
+
+    Args:
+        namespace: 命名空间.
+        handler: 处理函数，参数为失效的键列表，空列表表示全部失效，可以是协程函数.
+    """
+    _invalidation_handlers[namespace] = handler
+
+
+async def publish_invalidation(namespace: str, keys: list) -> None:
+    """
+    向其他 worker 发布失效消息，未绑定 Redis 时不做任何操作.
+
+    Args:
+        namespace: 命名空间.
+        keys: 失效的键列表，空列表表示全部失效.
+    """
+    if _redis is None:
+        return
+
+    try:
+        await _redis.publish(
+            settings.CACHE_INVALIDATION_CHANNEL,
+            orjson.dumps({"worker": WORKER_ID, "namespace": namespace, "keys": keys}),
+        )
+    except RedisError as exc:
+        logger.warning(f"发布失效消息失败: {exc}")
+
+
+class SharedCache:
+    """
+    跨 worker 共享的缓存。
+
+    读取顺序为 进程内近端缓存 -> Redis -> 调用方回源；写入时同时写入两级缓存。
+    失效时删除 Redis 中的条目并发布失效消息，各 worker 收到消息后删除近端缓存中的条目。
+    未绑定 Redis 时退化为单纯的进程内缓存。
+
+    Attributes:
+        namespace: 缓存命名空间，同时作为 Redis 键前缀.
+        ttl: Redis 中条目的有效期（秒）.
+        local: 进程内近端缓存.
+    """
+
+    def __init__(
+            self,
+            namespace: str,
+            maxsize: int = 1024,
+            ttl: float = 300,
+            near_ttl: Optional[float] = None,
+            encode: Callable[[Any], Any] = lambda value: value,
+            decode: Callable[[Any], Any] = lambda value: value,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl if near_ttl is None else near_ttl)
+        self._encode = encode
+        self._decode = decode
+        on_invalidation(namespace, lambda keys: self.drop_local(*keys))
+
+    def _redis_key(self, key: Hashable) -> str:
+        return f"{settings.APP_NAME}:{self.namespace}:{key}"
+
+    async def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        获取缓存条目.
+
+        Args:
+            key: 缓存键.
+            default: 条目不存在时返回的默认值.
+
+        Returns:
+            缓存值或默认值.
+        """
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if _redis is None:
+            return default
+
+        try:
+            raw = await _redis.get(self._redis_key(key))
+        except RedisError as exc:
+            logger.warning(f"读取共享缓存失败: {exc}")
+            return default
+        if raw is None:
+            return default
+
+        value = self._decode(orjson.loads(raw))
+        self.local.set(key, value)
+        return value
+
+    async def set(self, key: Hashable, value: Any) -> None:
+        """
+        写入缓存条目.
+
+        Args:
+            key: 缓存键.
+            value: 缓存值.
+        """
+        self.local.set(key, value)
+        if _redis is None:
+            return
+
+        try:
+            await _redis.set(self._redis_key(key), orjson.dumps(self._encode(value)), ex=int(self.ttl))
+        except RedisError as exc:
+            logger.warning(f"写入共享缓存失败: {exc}")
+
+    async def invalidate(self, *keys: Hashable) -> None:
+        """
+        使缓存条目失效，并通知其他 worker.
+
+        Args:
+            keys: 缓存键列表，为空时清空整个命名空间.
+        """
+        self.drop_local(*keys)
+        if _redis is None:
+            return
+
+        try:
+            if keys:
+                await _redis.delete(*[self._redis_key(key) for key in keys])
+            else:
+                async for redis_key in _redis.scan_iter(match=self._redis_key("*")):
+                    await _redis.delete(redis_key)
+        except RedisError as exc:
+            logger.warning(f"删除共享缓存失败: {exc}")
+        await publish_invalidation(self.namespace, list(keys))
+
+    def drop_local(self, *keys: Hashable) -> None:
+        """
+        删除近端缓存中的条目.
+
+        Args:
+            keys: 缓存键列表，为空时清空近端缓存.
+        """
+        if not keys:
+            self.local.clear()
+            return
+        for key in keys:
+            self.local.pop(key)
+
+
+class VersionCounter:
+    """
+    版本计数器。
+
+    计数保存在 Redis 中，由全部 worker 共享.
+    进程内计数在重启后归零且各 worker 互不相同，无法用于吊销，因此未绑定 Redis 时计数不可用，
+    由调用方回退到其他校验方式.
+
+    计数不存在时以当前时间 (微秒) 为初始值创建，而不是从 0 开始，
+    计数被淘汰或在 Redis 重启后丢失时，重新创建的计数大于之前的任何版本，已吊销的版本不会再次生效.
+
+    Attributes:
+        namespace: 计数器命名空间，同时作为 Redis 键前缀.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+
+    def _redis_key(self, key: Hashable) -> str:
+        return f"{settings.APP_NAME}:{self.namespace}:{key}"
+
+    @staticmethod
+    def _seed() -> int:
+        return time.time_ns() // 1000
+
+    async def get(self, key: Hashable) -> Optional[int]:
+        """
+        获取当前版本.
+
+        Args:
+            key: 计数键.
+
+        Returns:
+            当前版本，计数不存在、未绑定 Redis 或 Redis 不可用时返回 None.
+        """
+        if _redis is None:
+            return None
+
+        try:
+            value = await _redis.get(self._redis_key(key))
+        except RedisError as exc:
+            logger.warning(f"读取版本计数失败: {exc}")
+            return None
+        return int(value) if value is not None else None
+
+    async def ensure(self, key: Hashable) -> Optional[int]:
+        """
+        获取当前版本，计数不存在时创建.
+
+        Args:
+            key: 计数键.
+
+        Returns:
+            当前版本，未绑定 Redis 或 Redis 不可用时返回 None.
+        """
+        if _redis is None:
+            return None
+
+        redis_key = self._redis_key(key)
+        try:
+            async with _redis.pipeline(transaction=True) as pipe:
+                pipe.set(redis_key, self._seed(), nx=True)
+                pipe.get(redis_key)
+                _, value = await pipe.execute()
+        except RedisError as exc:
+            logger.warning(f"创建版本计数失败: {exc}")
+            return None
+        return int(value)
+
+    async def incr(self, *keys: Hashable) -> None:
+        """
+        递增版本，未绑定 Redis 时不做任何操作.
+
+        Args:
+            keys: 计数键列表.
+        """
+        if _redis is None:
+            return
+
+        seed = self._seed()
+        try:
+            async with _redis.pipeline(transaction=True) as pipe:
+                for key in keys:
+                    pipe.set(self._redis_key(key), seed, nx=True)
+                    pipe.incr(self._redis_key(key))
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning(f"递增版本计数失败: {exc}")
+
+
+async def _dispatch_invalidation(namespace: str, keys: list) -> None:
+    """调用命名空间对应的失效消息处理函数"""
+    handler = _invalidation_handlers.get(namespace)
+    if handler is None:
+        return
+    result = handler(keys)
+    if inspect.isawaitable(result):
+        await result
+
+
+async def _listen_invalidations(redis: Redis) -> None:
+    """订阅失效消息，并分发给对应的处理函数"""
+    while True:
+        try:
+            async with redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                await pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+                # 订阅中断期间可能错过失效消息，重新订阅后使全部进程内状态失效
+                for namespace in list(_invalidation_handlers):
+                    await _dispatch_invalidation(namespace, [])
+                async for message in pubsub.listen():
+                    data = orjson.loads(message["data"])
+                    if data["worker"] == WORKER_ID:
+                        continue
+                    await _dispatch_invalidation(data["namespace"], data["keys"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning(f"失效消息订阅中断，稍后重试: {exc}")
+            await asyncio.sleep(1)
+
+
+def bind_redis(redis: Redis) -> None:
+    """
+    为全部共享缓存绑定 Redis 客户端，并开始订阅失效消息.
+
+    Args:
+        redis: Redis 客户端，任何兼容 redis.asyncio 接口的客户端均可.
+    """
+    global _redis, _listener
+    _redis = redis
+    _listener = asyncio.create_task(_listen_invalidations(redis))
+
+
+async def unbind_redis() -> None:
+    """停止订阅失效消息，并解除 Redis 客户端的绑定"""
+    global _redis, _listener
+    if _listener is not None:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
+    _redis = None
+    _listener = None
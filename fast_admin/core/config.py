@@ -40,7 +40,16 @@ class Settings(BaseSettings):
     - ALGORITHM: 加密算法。
     - ACCESS_TOKEN_EXPIRE_MINUTES: 访问令牌的有效期（分钟）。
     - REFRESH_TOKEN_EXPIRE_MINUTES: 刷新令牌的有效期（分钟）。
-    - AUTH_WHITELIST: 白名单，不需要登录即可访问的路由列表。
+    - AUTH_WHITELIST: 白名单，不需要登录即可访问的路由规则列表，规则格式为 "[请求方法] 路径"，
+      路径支持通配符 "*" 和路径模板，例如 "POST /auth/login"、"/docs/*"、"/files/{file_id}"。
+      白名单中的路由不能声明权限，否则应用程序启动失败。
+    - TOKEN_CACHE_MAXSIZE: 已验证令牌缓存的最大条目数。
+    - TOKEN_CACHE_NEGATIVE_TTL: 无效令牌在缓存中的有效期（秒）。
+    - PASSWORD_EXECUTOR: 密码哈希与校验的执行器类型，"thread" 或 "process"。
+    - PASSWORD_MAX_WORKERS: 密码执行器的最大工作线程或进程数。
+    - PASSWORD_MAX_CONCURRENCY: 同时执行的密码哈希与校验的最大任务数。
+    - AUTH_STATELESS: 是否启用无状态认证，启用后访问令牌携带用户ID、超级管理员标识、权限掩码及其位索引布局和权限版本，
+      认证时只校验权限版本而不查询数据库。权限版本保存在 Redis 中，未配置 Redis 时仍从数据库加载用户。
     - BASE_DIR: 应用程序的根目录。
     - DATABASE_USER: 数据库用户名。
     - DATABASE_PASSWORD: 数据库密码。
@@ -53,11 +62,47 @@ class Settings(BaseSettings):
     - REDIS_HOST: Redis 主机名。
     - REDIS_PORT: Redis 端口号。
     - REDIS_DB: Redis 数据库号。
+    - PERMISSION_CACHE_MAXSIZE: 用户权限缓存的最大用户数。
+    - PERMISSION_CACHE_TTL: 用户权限缓存的有效期（秒）。
+    - USER_CACHE_TTL: 用户信息缓存的有效期（秒）。
+    - NEAR_CACHE_TTL: 共享缓存的进程内近端缓存有效期（秒）。
+    - CACHE_INVALIDATION_CHANNEL: 缓存失效消息的 Redis 发布订阅频道。
+    - COUNT_CACHE_MAXSIZE: 分页估算总数缓存的最大条目数。
+    - COUNT_CACHE_TTL: 分页估算总数缓存的有效期（秒），相同筛选条件的估算计数分页查询在有效期内复用总数，精确计数不缓存。
+    - LOG_SINK_MODE: 数据库日志的写入方式，"insert" 为批量插入，"copy" 为 PostgreSQL COPY 协议。
+    - LOG_ROLLUP_ENABLED: 是否在数据库日志写入后按分钟、级别和记录器累加日志汇总，供日志直方图使用。
+    - LOG_DEDUP_WINDOW: 数据库日志去重的时间窗口（秒），为 0 时不去重。
+    - LOG_DEDUP_BURST: 同一指纹的日志在一个时间窗口内逐条写入数据库的最大行数，超出的重复日志在窗口结束时合并为一行。
+    - LOG_DEDUP_MAX_FINGERPRINTS: 日志去重同时跟踪的最大指纹数。
+    - LOG_SINK_WRITE_TIMEOUT: 数据库日志每批写入的超时时间（秒），超时视为写入失败。
+    - LOG_BREAKER_FAILURE_THRESHOLD: 数据库日志连续写入失败多少次后断路。
+    - LOG_BREAKER_RESET_TIMEOUT: 数据库日志断路后到试探写入的冷却时间（秒）。
+    - LOG_SPOOL_PATH: 数据库日志暂存文件路径，为空时使用日志目录下的 db_spool.bin。
+    - LOG_SPOOL_MAX_BYTES: 数据库日志暂存文件的最大字节数，为 0 时不暂存，写入失败的日志被丢弃。
+    - LOG_SPOOL_REPLAY_RATE: 数据库恢复后每秒重放暂存日志的最大行数。
+    - LOG_SINK_BATCH_SIZE: 数据库日志每批写入的最大记录数。
+    - LOG_SINK_FLUSH_INTERVAL: 数据库日志两次写入的最大间隔（秒）。
+    - LOG_SINK_QUEUE_SIZE: 数据库日志队列的最大记录数。
+    - LOG_SINK_DROP_LEVELS: 数据库日志队列已满时可丢弃的日志级别，按丢弃的先后顺序排列，ERROR 及以上级别永不丢弃。
+    - LOG_STREAM_BUFFER_SIZE: 实时日志缓冲区的最大记录数。
+    - LOG_STREAM_HEARTBEAT: 实时日志接口在没有新日志时发送心跳的间隔（秒）。
+    - LOG_EXPORT_BATCH_SIZE: 导出日志时每批读取的行数。
+    - LOG_PARTITION_INTERVAL: logs 分区表的分区间隔，"day" 或 "month"。
+    - LOG_PARTITION_AHEAD: 提前创建的日志分区数量。
+    - LOG_PARTITION_MAINTENANCE_INTERVAL: 日志分区维护任务的执行间隔（秒）。
+    - LOG_RETENTION_DAYS: 数据库日志的保留天数，logs 为分区表时按分区删除超过保留期的日志。
+    - LOG_ARCHIVE_DAYS: 将早于多少天前的数据库日志移动到归档段文件，为 0 时不归档；应小于 LOG_RETENTION_DAYS。
+    - LOG_ARCHIVE_PATH: 日志归档目录，为空时使用日志目录下的 archive。
+    - LOG_ARCHIVE_SEGMENT_ROWS: 每个归档段的最大行数。
+    - LOG_ARCHIVE_BLOCK_ROWS: 归档段中每个压缩块的最大行数，即稀疏索引的粒度。
+    - LOG_ARCHIVE_INTERVAL: 日志归档任务的执行间隔（秒）。
+    - ACCESS_LOG_SAMPLE_RATE: 2xx/3xx 响应访问日志的采样比例 (0 到 1)，4xx/5xx 响应的访问日志全部输出。
+    - ACCESS_LOG_SUMMARY_ENABLED: 是否按分钟、请求方法和路由汇总访问日志并每分钟写入数据库。
     - ALLOW_ORIGINS: 允许跨域请求的源。
     - ALLOW_CREDENTIALS: 是否允许跨域请求携带凭据。
     - ALLOW_METHODS: 允许跨域请求的方法。
     - ALLOW_HEADERS: 允许跨域请求的头部。
-    - MIDDLEWARE: 中间件配置列表。
+    - MIDDLEWARE: 中间件配置列表，按序注册 fast_admin.core.middleware 中的 ASGI 中间件类，后注册的位于外层。
 
     """
     DEBUG: bool = False
@@ -71,12 +116,18 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    TOKEN_CACHE_MAXSIZE: int = 10000
+    TOKEN_CACHE_NEGATIVE_TTL: int = 60
     AUTH_WHITELIST: list = [
         "/docs",
         "/openapi.json",
         "/auth/login",
-        "/users/"
+        "/auth/refresh",
     ]
+    AUTH_STATELESS: bool = False
+    PASSWORD_EXECUTOR: str = "thread"
+    PASSWORD_MAX_WORKERS: int = 4
+    PASSWORD_MAX_CONCURRENCY: int = 8
     BASE_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
     DATABASE_USER: str = os.environ.get("DATABASE_USER")
@@ -92,6 +143,44 @@ class Settings(BaseSettings):
     REDIS_PORT: int = os.environ.get("REDIS_PORT")
     REDIS_DB: int = os.environ.get("REDIS_DB")
 
+    PERMISSION_CACHE_MAXSIZE: int = 1024
+    PERMISSION_CACHE_TTL: int = 300
+    USER_CACHE_TTL: int = 300
+    NEAR_CACHE_TTL: int = 60
+    CACHE_INVALIDATION_CHANNEL: str = "fast_admin:cache:invalidate"
+
+    COUNT_CACHE_MAXSIZE: int = 1024
+    COUNT_CACHE_TTL: float = 10
+    LOG_SINK_MODE: str = "insert"
+    LOG_ROLLUP_ENABLED: bool = True
+    LOG_DEDUP_WINDOW: float = 10
+    LOG_DEDUP_BURST: int = 1
+    LOG_DEDUP_MAX_FINGERPRINTS: int = 10000
+    LOG_SINK_WRITE_TIMEOUT: float = 5
+    LOG_BREAKER_FAILURE_THRESHOLD: int = 3
+    LOG_BREAKER_RESET_TIMEOUT: float = 30
+    LOG_SPOOL_PATH: str = ""
+    LOG_SPOOL_MAX_BYTES: int = 64 * 1024 * 1024
+    LOG_SPOOL_REPLAY_RATE: int = 1000
+    LOG_SINK_BATCH_SIZE: int = 500
+    LOG_SINK_FLUSH_INTERVAL: float = 1.0
+    LOG_SINK_QUEUE_SIZE: int = 10000
+    LOG_SINK_DROP_LEVELS: list = ["TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING"]
+    LOG_STREAM_BUFFER_SIZE: int = 1000
+    LOG_STREAM_HEARTBEAT: float = 15
+    LOG_EXPORT_BATCH_SIZE: int = 1000
+    LOG_PARTITION_INTERVAL: str = "day"
+    LOG_PARTITION_AHEAD: int = 7
+    LOG_PARTITION_MAINTENANCE_INTERVAL: int = 3600
+    LOG_RETENTION_DAYS: int = 30
+    LOG_ARCHIVE_DAYS: int = 0
+    LOG_ARCHIVE_PATH: str = ""
+    LOG_ARCHIVE_SEGMENT_ROWS: int = 100000
+    LOG_ARCHIVE_BLOCK_ROWS: int = 1000
+    LOG_ARCHIVE_INTERVAL: int = 3600
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    ACCESS_LOG_SUMMARY_ENABLED: bool = False
+
     ALLOW_ORIGINS: list = ["*"]
     ALLOW_CREDENTIALS: bool = True
     ALLOW_METHODS: list = ["*"]
@@ -99,9 +188,10 @@ class Settings(BaseSettings):
 
     MIDDLEWARE: list = [
         # 按序加载中间件配置列表
-        "process_time_middleware",
+        "ProcessTimeMiddleware",
         "cors_middleware",
-        "auth_middleware"
+        "AuthMiddleware",
+        "AccessLogMiddleware"
     ]
 
 
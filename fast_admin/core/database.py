@@ -1,6 +1,42 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import Request
 from redis.asyncio import Redis
+from tortoise import connections
+
+"""
+数据库与 Redis 连接模块。
+
+此模块提供连接相关的辅助函数，包括：
+
+- 定义 get_redis 函数，从应用程序状态获取 Redis 客户端。
+- 定义 advisory_lock 函数，获取 PostgreSQL 会话级咨询锁，保证多个工作进程中同一时刻只有一个执行后台维护任务。
+
+"""
 
 
 def get_redis(request: Request) -> Redis:
     return request.app.state.redis
+
+
+@asynccontextmanager
+async def advisory_lock(name: str) -> AsyncIterator[bool]:
+    """
+    尝试获取 PostgreSQL 会话级咨询锁，不等待其他进程释放.
+
+    锁由连接池中单独的连接持有，退出上下文时释放；进程异常退出时随连接断开自动释放。
+
+    Args:
+        name: 锁名称，通过 hashtext 转换为锁的键.
+
+    Yields:
+        是否获取到锁，未获取到时调用方应跳过本次执行.
+    """
+    async with connections.get("default").acquire_connection() as conn:
+        acquired = await conn.fetchval("SELECT pg_try_advisory_lock(hashtext($1))", name)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                await conn.fetchval("SELECT pg_advisory_unlock(hashtext($1))", name)
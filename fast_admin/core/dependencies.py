@@ -1,11 +1,14 @@
 from functools import wraps
+from typing import Optional, Union
 
-from fastapi import status, Depends
+from fastapi import status
 from fastapi.requests import Request
 
+from fast_admin.models.permission import permission_registry
 from fast_admin.models.user import User
-from fast_admin.core.config import settings
+from fast_admin.core.authorization import is_whitelisted
 from fast_admin.core.exceptions import CustomException
+from fast_admin.core.security import CurrentUser, TokenUser
 
 
 def permission_required_decorator(permission_code: str, permission_type: str = "operation"):
@@ -25,10 +28,10 @@ def permission_required_decorator(permission_code: str, permission_type: str = "
         async def wrapper(*args, **kwargs):
             # 获取当前用户
             request: Request = kwargs.get("request")
-            user: User = request.state.user
+            user: CurrentUser = getattr(request.state, "user", None)
 
             # 如果用户未登录且访问的是白名单内的路由，则允许访问
-            if not user and request.url.path in settings.AUTH_WHITELIST:
+            if not user and is_whitelisted(request):
                 return await func(*args, **kwargs)
 
             if not user:
@@ -38,7 +41,7 @@ def permission_required_decorator(permission_code: str, permission_type: str = "
                 )
 
             # 检查用户是否拥有该权限或是否是超级管理员
-            if user.is_superuser or user.has_permission(permission_code, permission_type):
+            if await user.has_permission(permission_code, permission_type):
                 return await func(*args, **kwargs)
 
             raise CustomException(
@@ -51,7 +54,7 @@ def permission_required_decorator(permission_code: str, permission_type: str = "
     return decorator
 
 
-async def get_current_user_from_request(request: Request):
+async def get_current_user_from_request(request: Request) -> Optional[Union[User, TokenUser]]:
     """
     获取当前用户的依赖函数.
 
@@ -59,10 +62,11 @@ async def get_current_user_from_request(request: Request):
         request: FastAPI 的 Request 对象.
 
     Returns:
-        User 或 None: 如果请求在白名单中，返回 None，否则返回当前用户.
+        User、TokenUser 或 None: 如果请求在白名单中，返回 None，否则返回已加载的当前用户身份信息，
+        可直接访问 id、username、is_superuser 等属性.
     """
     # 如果请求路径在白名单中，直接返回 None，表示允许匿名访问
-    if request.url.path in settings.AUTH_WHITELIST:
+    if is_whitelisted(request):
         return None
 
     # 获取中间件中设置的用户
@@ -72,13 +76,17 @@ async def get_current_user_from_request(request: Request):
             msg="用户未登录",
             status_code=status.HTTP_401_UNAUTHORIZED
         )
-    return user
+    return await user.get_identity()
 
 
 def permission_required(permission_code: str, permission_type: str = "operation"):
     """
     权限校验依赖函数.
 
+    权限代码在定义路由时解析为权限引用，校验时只需一次按位与运算.
+    返回的依赖函数通过 permission 属性声明所需权限，应用程序启动时据此编译路由授权表，
+    由认证中间件统一鉴权；已由中间件鉴权的请求在此直接通过.
+
     Args:
         permission_code: 权限代码.
         permission_type: 权限类型，默认为 "operation".
@@ -86,14 +94,27 @@ def permission_required(permission_code: str, permission_type: str = "operation"
     Returns:
         依赖注入函数.
     """
+    permission = permission_registry.ref(permission_code, permission_type)
+
+    async def verify_permission(request: Request):
+        # 中间件已根据路由授权表完成鉴权
+        if getattr(request.state, "authorized", False):
+            return True
 
-    async def verify_permission(user: User = Depends(get_current_user_from_request)):
-        # 如果用户为 None，说明在白名单中，直接允许通过
-        if user is None:
+        # 如果请求在白名单中，直接允许通过
+        if is_whitelisted(request):
             return True
 
+        # 使用中间件中设置的当前用户惰性代理，校验时才加载用户
+        user: CurrentUser = getattr(request.state, "user", None)
+        if not user:
+            raise CustomException(
+                msg="用户未登录",
+                status_code=status.HTTP_401_UNAUTHORIZED
+            )
+
         # 检查用户是否拥有该权限或是否是超级管理员
-        if user.is_superuser or await user.has_permission(permission_code, permission_type):
+        if await user.allows(permission):
             return True
 
         raise CustomException(
@@ -101,4 +122,5 @@ def permission_required(permission_code: str, permission_type: str = "operation"
             status_code=status.HTTP_403_FORBIDDEN
         )
 
+    verify_permission.permission = permission
     return verify_permission
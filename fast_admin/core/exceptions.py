@@ -4,7 +4,7 @@ from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 
-from fast_admin.core.logger import logger
+from loguru import logger
 
 """
 异常处理模块
@@ -0,0 +1,600 @@
+import asyncio
+import mmap
+import os
+import struct
+import threading
+import zlib
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Any, Callable, Iterator, Optional
+
+import orjson
+from fastapi import status
+from loguru import logger
+from tortoise import connections, timezone as tortoise_timezone
+from tortoise.queryset import QuerySet
+
+from fast_admin.core.config import settings
+from fast_admin.core.database import advisory_lock
+from fast_admin.core.exceptions import CustomException
+from fast_admin.core.pagination import COUNT_MODES, Pagination, count, keyset_batches
+from fast_admin.models.logs import Log
+
+"""
+日志归档模块。
+
+此模块将超过保留天数的日志从 logs 表移动到压缩的段文件，并支持按时间范围读取，包括：
+
+- 定义 write_segment 函数，将按时间排序的日志行写入一个段。
+- 定义 LogSegment 类，通过内存映射读取段的稀疏索引，只解压与查询时间范围和日志级别相交的块。
+- 定义 LogArchive 类，管理归档目录中的全部段，按筛选条件读取和计数归档日志。
+- 定义 paginate_with_archive 函数，对 logs 表与归档日志的合并结果分页，供日志查询接口使用。
+- 定义 archive_logs 函数和 run_log_archive 后台任务，将旧日志写入段后从 logs 表删除。
+
+每个段由两个文件组成：
+
+- <name>.seg: 数据文件，由若干块组成，每块是 zlib 压缩的 orjson 日志行数组，块内按 (timestamp, id) 升序排列。
+- <name>.idx: 稀疏索引，文件头之后每块一条定长记录，包含块内的最小和最大时间戳、日志级别位图、行数、
+  各日志级别的行数以及块在数据文件中的位置。
+
+只按时间范围和日志级别筛选时，完全落在时间范围内的块直接按索引中的行数计数和跳过，不解压。
+
+段写入完成后才写入索引文件，因此只有存在索引文件的段对查询可见。
+
+"""
+
+# 索引文件头：魔数、块数
+_HEADER = struct.Struct("<8sI")
+_MAGIC = b"FALOGIX2"
+
+# 日志级别在位图与行数中的位置，其他级别共用最后一个位置
+_LEVELS = ("TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "CRITICAL")
+_LEVEL_SLOTS = len(_LEVELS) + 1
+
+# 索引记录：最小时间戳 (微秒)、最大时间戳 (微秒)、数据偏移、数据长度、行数、日志级别位图、各日志级别的行数
+_ENTRY = struct.Struct(f"<qqQIII{_LEVEL_SLOTS}I")
+
+# 索引记录中各日志级别行数的起始位置
+_LEVEL_ROWS = 6
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# 归档的咨询锁名称，多个工作进程同时运行归档任务时只有一个执行
+ARCHIVE_LOCK = "fast_admin.log_archive"
+
+# 归档的字段，与 keyset_batches 读取的字段一致
+ARCHIVE_FIELDS = list(Log._meta.fields_db_projection)
+
+# 序列化后需要还原为 datetime 的字段
+_DATETIME_FIELDS = [name for name, field in Log._meta.fields_map.items() if field.field_type is datetime]
+
+
+def _level_slot(level: str) -> int:
+    """获取日志级别在位图与行数中的位置"""
+    return _LEVELS.index(level) if level in _LEVELS else len(_LEVELS)
+
+
+def level_mask(level: Optional[str]) -> int:
+    """
+    获取日志级别在位图中的位.
+
+    Args:
+        level: 日志级别，为空时匹配全部级别.
+
+    Returns:
+        日志级别的位.
+    """
+    if level is None:
+        return ~0
+    return 1 << _level_slot(level)
+
+
+def _aware(moment: datetime) -> datetime:
+    """不带时区的时间按 Tortoise-ORM 配置的时区处理"""
+    return tortoise_timezone.make_aware(moment) if tortoise_timezone.is_naive(moment) else moment
+
+
+def _micros(moment: datetime) -> int:
+    """将时间转换为 UTC 微秒时间戳"""
+    return (_aware(moment) - _EPOCH) // timedelta(microseconds=1)
+
+
+def write_segment(directory: str, name: str, rows: list[dict], block_rows: int = 1000) -> str:
+    """
+    将按 (timestamp, id) 升序排列的日志行写入一个段.
+
+    Args:
+        directory: 归档目录.
+        name: 段名称.
+        rows: 日志行列表，以 Log 字段名为键.
+        block_rows: 每块的最大行数.
+
+    Returns:
+        索引文件路径.
+    """
+    data_path = os.path.join(directory, f"{name}.seg")
+    index_path = os.path.join(directory, f"{name}.idx")
+    entries = []
+    offset = 0
+
+    with open(f"{data_path}.tmp", "wb") as file:
+        for start in range(0, len(rows), block_rows):
+            block = rows[start:start + block_rows]
+            payload = zlib.compress(orjson.dumps(block))
+            level_rows = [0] * _LEVEL_SLOTS
+            for row in block:
+                level_rows[_level_slot(row["level"])] += 1
+            mask = sum(1 << slot for slot, rows_count in enumerate(level_rows) if rows_count)
+            entries.append(_ENTRY.pack(
+                _micros(block[0]["timestamp"]), _micros(block[-1]["timestamp"]),
+                offset, len(payload), len(block), mask, *level_rows
+            ))
+            file.write(payload)
+            offset += len(payload)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(f"{data_path}.tmp", data_path)
+
+    with open(f"{index_path}.tmp", "wb") as file:
+        file.write(_HEADER.pack(_MAGIC, len(entries)))
+        file.write(b"".join(entries))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(f"{index_path}.tmp", index_path)
+    return index_path
+
+
+class LogSegment:
+    """
+    日志段。
+
+    索引与数据文件均通过内存映射读取；块按时间升序排列，按时间范围查找块时二分查找索引，不读取其他块。
+
+    Attributes:
+        index_path: 索引文件路径.
+        data_path: 数据文件路径.
+        min_timestamp: 段内的最小时间戳 (微秒).
+        max_timestamp: 段内的最大时间戳 (微秒).
+        rows: 段内的行数.
+    """
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self.data_path = f"{index_path[:-len('.idx')]}.seg"
+        with open(index_path, "rb") as file:
+            self._index = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(self.data_path, "rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(file.fileno()).st_size else b""
+
+        magic, self._count = _HEADER.unpack_from(self._index, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"无效的日志段索引文件: {index_path}")
+        self.min_timestamp = self._entry(0)[0] if self._count else 0
+        self.max_timestamp = self._entry(self._count - 1)[1] if self._count else 0
+        self.rows = sum(self._entry(i)[4] for i in range(self._count))
+
+    def _entry(self, i: int) -> tuple:
+        """读取第 i 条索引记录"""
+        return _ENTRY.unpack_from(self._index, _HEADER.size + i * _ENTRY.size)
+
+    def close(self) -> None:
+        """关闭内存映射"""
+        self._index.close()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def blocks(self, start: Optional[int], end: Optional[int], mask: int) -> Iterator[tuple]:
+        """
+        查找与时间范围相交且包含指定日志级别的块.
+
+        Args:
+            start: 起始时间戳 (微秒)，为空时不限制.
+            end: 结束时间戳 (微秒)，为空时不限制.
+            mask: 日志级别位图.
+
+        Yields:
+            按时间升序排列的 (最小时间戳, 最大时间戳, 数据偏移, 数据长度, 行数, 日志级别位图, *各日志级别的行数).
+        """
+        # 块按时间升序排列，块的最大时间戳也单调不减，二分查找第一个最大时间戳不小于起始时间的块
+        first = bisect_left(range(self._count), start, key=lambda i: self._entry(i)[1]) if start is not None else 0
+        for i in range(first, self._count):
+            entry = self._entry(i)
+            if end is not None and entry[0] > end:
+                return
+            if entry[5] & mask:
+                yield entry
+
+    def read_block(self, entry: tuple) -> list[dict]:
+        """
+        解压一个块.
+
+        Args:
+            entry: blocks 返回的索引记录.
+
+        Returns:
+            按 (timestamp, id) 升序排列的日志行列表.
+        """
+        offset, length = entry[2], entry[3]
+        rows = orjson.loads(zlib.decompress(self._data[offset:offset + length]))
+        for row in rows:
+            for field in _DATETIME_FIELDS:
+                if row.get(field):
+                    row[field] = datetime.fromisoformat(row[field])
+        return rows
+
+
+class LogArchive:
+    """
+    日志归档。
+
+    管理归档目录中的全部段，目录内容变化 (例如归档任务写入了新段) 时重新加载段列表。
+    查询方法会解压块并逐行筛选，是同步阻塞的，在事件循环中应通过 asyncio.to_thread 调用。
+
+    Attributes:
+        directory: 归档目录.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._segments: dict[str, LogSegment] = {}
+        self._mtime: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def segments(self) -> list[LogSegment]:
+        """
+        获取按时间升序排列的全部段.
+
+        Returns:
+            段列表.
+        """
+        with self._lock:
+            try:
+                mtime = os.stat(self.directory).st_mtime_ns
+            except FileNotFoundError:
+                return []
+            if mtime != self._mtime:
+                paths = {
+                    os.path.join(self.directory, filename)
+                    for filename in os.listdir(self.directory) if filename.endswith(".idx")
+                }
+                for path in set(self._segments) - paths:
+                    self._segments.pop(path).close()
+                for path in paths - set(self._segments):
+                    try:
+                        self._segments[path] = LogSegment(path)
+                    except (OSError, ValueError, struct.error) as exc:
+                        logger.warning(f"跳过无法读取的日志段 {path}: {exc!r}")
+                self._mtime = mtime
+            return sorted(self._segments.values(), key=lambda segment: segment.min_timestamp)
+
+    def horizon(self) -> Optional[datetime]:
+        """
+        获取已归档日志的最大时间戳.
+
+        Returns:
+            最大时间戳，没有归档日志时为空.
+        """
+        segments = [segment for segment in self.segments() if segment.rows]
+        if not segments:
+            return None
+        return datetime.fromtimestamp(max(segment.max_timestamp for segment in segments) / 1_000_000, timezone.utc)
+
+    def covers(self, moment: datetime) -> bool:
+        """
+        判断时间是否不晚于最新的归档日志，即从该时间开始的查询需要读取归档.
+
+        Args:
+            moment: 时间.
+
+        Returns:
+            如果需要读取归档，则返回 True.
+        """
+        horizon = self.horizon()
+        return horizon is not None and _aware(moment) <= horizon
+
+    def _scan(
+            self,
+            filters: Optional[dict[str, Any]],
+            contains: Optional[dict[str, Optional[str]]],
+            start_time: Optional[datetime],
+            end_time: Optional[datetime],
+            descending: bool,
+    ) -> Iterator[tuple[LogSegment, tuple, Optional[int], Callable[[dict], bool]]]:
+        """
+        按顺序查找与筛选条件相交的块.
+
+        Yields:
+            (段, 索引记录, 可由索引确定的匹配行数, 逐行筛选函数)；块未完全落在时间范围内，
+            或存在日志级别以外的筛选条件时，匹配行数为 None，需要解压后逐行筛选.
+        """
+        start_time = _aware(start_time) if start_time else None
+        end_time = _aware(end_time) if end_time else None
+        exact = {field: value for field, value in (filters or {}).items() if value is not None}
+        keywords = {field: value.lower() for field, value in (contains or {}).items() if value}
+        start = _micros(start_time) if start_time else None
+        end = _micros(end_time) if end_time else None
+        level = exact.get("level")
+        mask = level_mask(level)
+        # 只按时间范围和日志级别筛选时，可以由索引确定行数
+        indexed = not keywords and set(exact) <= {"level"}
+
+        def matches(row: dict) -> bool:
+            if start_time and row["timestamp"] < start_time:
+                return False
+            if end_time and row["timestamp"] > end_time:
+                return False
+            if any(row[field] != value for field, value in exact.items()):
+                return False
+            return all(row[field] and keyword in row[field].lower() for field, keyword in keywords.items())
+
+        segments = [
+            segment for segment in self.segments()
+            if segment.rows and (start is None or segment.max_timestamp >= start) and (end is None or segment.min_timestamp <= end)
+        ]
+        if descending:
+            segments.reverse()
+        for segment in segments:
+            entries = list(segment.blocks(start, end, mask))
+            if descending:
+                entries.reverse()
+            for entry in entries:
+                known = None
+                if indexed and (start is None or entry[0] >= start) and (end is None or entry[1] <= end):
+                    known = entry[_LEVEL_ROWS + _level_slot(level)] if level is not None else entry[4]
+                yield segment, entry, known, matches
+
+    def rows(
+            self,
+            filters: Optional[dict[str, Any]] = None,
+            contains: Optional[dict[str, Optional[str]]] = None,
+            start_time: Optional[datetime] = None,
+            end_time: Optional[datetime] = None,
+            descending: bool = False,
+            skip: int = 0,
+    ) -> Iterator[dict]:
+        """
+        按筛选条件读取归档日志.
+
+        Args:
+            filters: 精确匹配的字段与值.
+            contains: 不区分大小写包含匹配的字段与值.
+            start_time: 起始时间.
+            end_time: 结束时间.
+            descending: 是否按时间倒序排列.
+            skip: 跳过的行数，可由索引确定行数的块整块跳过，不解压.
+
+        Yields:
+            以 Log 字段名为键的日志行.
+        """
+        for segment, entry, known, matches in self._scan(filters, contains, start_time, end_time, descending):
+            if known is not None and known <= skip:
+                skip -= known
+                continue
+            rows = segment.read_block(entry)
+            if descending:
+                rows.reverse()
+            for row in filter(matches, rows):
+                if skip:
+                    skip -= 1
+                    continue
+                yield row
+
+    def count(
+            self,
+            filters: Optional[dict[str, Any]] = None,
+            contains: Optional[dict[str, Optional[str]]] = None,
+            start_time: Optional[datetime] = None,
+            end_time: Optional[datetime] = None,
+    ) -> int:
+        """
+        计算归档日志的行数，可由索引确定行数的块不解压.
+
+        Args:
+            filters: 精确匹配的字段与值.
+            contains: 不区分大小写包含匹配的字段与值.
+            start_time: 起始时间.
+            end_time: 结束时间.
+
+        Returns:
+            匹配的行数.
+        """
+        total = 0
+        for segment, entry, known, matches in self._scan(filters, contains, start_time, end_time, False):
+            total += known if known is not None else sum(1 for row in segment.read_block(entry) if matches(row))
+        return total
+
+    def estimate_count(
+            self,
+            filters: Optional[dict[str, Any]] = None,
+            start_time: Optional[datetime] = None,
+            end_time: Optional[datetime] = None,
+    ) -> int:
+        """
+        按索引估算归档日志的行数，只读取索引，不解压块.
+
+        Args:
+            filters: 精确匹配的字段与值，只使用日志级别.
+            start_time: 起始时间.
+            end_time: 结束时间.
+
+        Returns:
+            与时间范围相交的块中该日志级别的行数.
+        """
+        level = (filters or {}).get("level")
+        return sum(
+            entry[_LEVEL_ROWS + _level_slot(level)] if level is not None else entry[4]
+            for segment, entry, _, _ in self._scan({"level": level}, None, start_time, end_time, False)
+        )
+
+
+async def paginate_with_archive(
+        archive: LogArchive,
+        query: QuerySet[Log],
+        filters: Optional[dict[str, Any]] = None,
+        contains: Optional[dict[str, Optional[str]]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        page: int = 1,
+        page_size: int = 10,
+        count_mode: str = "exact",
+        descending: bool = True,
+) -> Pagination:
+    """
+    对 logs 表与归档日志的合并结果按时间排序分页.
+
+    归档日志均早于 logs 表中的日志，因此倒序时先读取 logs 表再读取归档，正序时相反；
+    只有当前页跨越两者时才需要计算前一部分的总数。
+
+    Args:
+        archive: 日志归档.
+        query: 已应用筛选条件的日志查询集.
+        filters: 精确匹配的字段与值.
+        contains: 不区分大小写包含匹配的字段与值.
+        start_time: 起始时间.
+        end_time: 结束时间.
+        page: 页码.
+        page_size: 每页数量.
+        count_mode: 总数的计算方式，exact、estimated 或 none；estimated 时归档部分按索引估算.
+        descending: 是否按时间倒序排列.
+
+    Returns:
+        Pagination 对象，包含分页后的结果.
+    """
+    if count_mode not in COUNT_MODES:
+        raise CustomException(
+            msg=f"不支持的计数方式: {count_mode}",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+
+    query = query.order_by("-timestamp", "-id") if descending else query.order_by("timestamp", "id")
+    projection = Log._meta.fields_db_projection
+
+    # 两部分的总数在一次请求内最多各计算一次
+    counts: dict[str, int] = {}
+
+    async def read_logs(skip: int, limit: int) -> list[Log]:
+        return await query.offset(skip).limit(limit)
+
+    async def read_archive(skip: int, limit: int) -> list[Log]:
+        rows = await asyncio.to_thread(
+            lambda: list(islice(archive.rows(filters, contains, start_time, end_time, descending, skip), limit))
+        )
+        return [Log._init_from_db(**{projection[field]: value for field, value in row.items()}) for row in rows]
+
+    async def count_logs() -> int:
+        if "logs" not in counts:
+            counts["logs"] = await count(query, "exact")
+        return counts["logs"]
+
+    async def count_archive() -> int:
+        if "archive" not in counts:
+            counts["archive"] = await asyncio.to_thread(archive.count, filters, contains, start_time, end_time)
+        return counts["archive"]
+
+    sources = [(read_logs, count_logs), (read_archive, count_archive)]
+    if not descending:
+        sources.reverse()
+
+    items: list[Log] = []
+    skip = (page - 1) * page_size
+    for read, count_source in sources:
+        rows = await read(skip, page_size - len(items))
+        items.extend(rows)
+        if len(items) >= page_size:
+            break
+        # 当前部分已读完，偏移量超出当前部分时减去其总数
+        skip = 0 if rows else max(0, skip - await count_source())
+
+    if count_mode == "exact":
+        total = await count_logs() + await count_archive()
+    elif count_mode == "estimated":
+        total = await count(query, "estimated") + await asyncio.to_thread(
+            archive.estimate_count, filters, start_time, end_time
+        )
+    else:
+        total = None
+    return Pagination(items=items, total=total, page=page, page_size=page_size)
+
+
+# 日志归档，logs 表的旧日志移动到此目录
+log_archive = LogArchive(settings.LOG_ARCHIVE_PATH or os.path.join(settings.BASE_DIR, 'logs', 'archive'))
+
+
+def _day(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y%m%d")
+
+
+async def archive_logs(
+        archive: LogArchive,
+        older_than_days: int,
+        segment_rows: int = 100000,
+        block_rows: int = 1000,
+) -> int:
+    """
+    将超过天数的日志写入归档段，并从 logs 表删除.
+
+    每个段最多 segment_rows 行且不跨越 UTC 日期，段名为 "logs_<日期>_<段内最小 ID>"。
+    段写入磁盘后才删除对应的日志行。
+
+    Args:
+        archive: 日志归档.
+        older_than_days: 归档早于多少天前 (按 UTC 日期对齐) 的日志.
+        segment_rows: 每个段的最大行数.
+        block_rows: 每块的最大行数.
+
+    Returns:
+        归档的行数.
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=older_than_days)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    os.makedirs(archive.directory, exist_ok=True)
+    table = Log._meta.db_table
+    conn = connections.get("default")
+    archived = 0
+
+    async for batch in keyset_batches(Log.filter(timestamp__lt=cutoff), ARCHIVE_FIELDS, segment_rows):
+        # 按 UTC 日期拆分为多个段
+        segments: dict[str, list[dict]] = {}
+        for row in batch:
+            segments.setdefault(_day(row["timestamp"]), []).append(row)
+        for day, rows in segments.items():
+            name = f"{table}_{day}_{min(row['id'] for row in rows)}"
+            await asyncio.to_thread(write_segment, archive.directory, name, rows, block_rows)
+            await conn.execute_query(
+                f'DELETE FROM "{table}" WHERE "id" = ANY($1::INT[]) AND "timestamp" < $2',
+                [[row["id"] for row in rows], cutoff],
+            )
+            archived += len(rows)
+    return archived
+
+
+async def run_log_archive(
+        archive: LogArchive,
+        older_than_days: int,
+        segment_rows: int = 100000,
+        block_rows: int = 1000,
+        period: float = 3600,
+) -> None:
+    """
+    后台任务，每隔 period 秒归档一次旧日志，直到任务被取消.
+
+    每次归档前尝试获取咨询锁，其他进程正在归档时跳过本次归档，避免重复写入段.
+
+    Args:
+        archive: 日志归档.
+        older_than_days: 归档早于多少天前的日志.
+        segment_rows: 每个段的最大行数.
+        block_rows: 每块的最大行数.
+        period: 两次归档的间隔（秒）.
+    """
+    while True:
+        try:
+            async with advisory_lock(ARCHIVE_LOCK) as acquired:
+                archived = await archive_logs(archive, older_than_days, segment_rows, block_rows) if acquired else 0
+            if archived:
+                logger.info(f"已归档 {archived} 条日志")
+        except Exception as exc:
+            logger.error(f"日志归档失败: {exc!r}")
+        await asyncio.sleep(period)
@@ -0,0 +1,144 @@
+import re
+import threading
+import time
+from typing import Optional
+
+"""
+日志去重模块。
+
+此模块包含数据库日志处理器之前的去重阶段，包括：
+
+- 定义 fingerprint 函数，根据日志级别、记录器、函数、行号和规范化后的消息模板计算日志指纹。
+- 定义 LogDeduplicator 类，按指纹限制每个时间窗口内写入数据库的日志行数，超出的重复日志合并为一行。
+
+"""
+
+# 消息中的可变部分，规范化时替换为占位符，使同一模板产生的消息得到相同的指纹
+_VARIABLE_PATTERNS = (
+    re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"),
+    re.compile(r"0x[0-9a-fA-F]+"),
+    re.compile(r"'[^']*'|\"[^\"]*\""),
+    re.compile(r"\d+(?:\.\d+)?"),
+)
+
+
+def normalize_message(message: str) -> str:
+    """
+    将消息中的 UUID、十六进制数、引号中的字符串和数字替换为占位符.
+
+    Args:
+        message: 日志消息.
+
+    Returns:
+        消息模板.
+    """
+    for pattern in _VARIABLE_PATTERNS:
+        message = pattern.sub("?", message)
+    return message
+
+
+def fingerprint(row: dict) -> tuple:
+    """
+    计算日志行的指纹.
+
+    Args:
+        row: 日志行.
+
+    Returns:
+        由日志级别、记录器、函数、行号和消息模板组成的指纹.
+    """
+    return (
+        row["level"],
+        row["logger_name"],
+        row["function_name"],
+        row["line_no"],
+        normalize_message(row["message"]),
+    )
+
+
+class _Window:
+    """一个指纹在当前时间窗口内的状态"""
+
+    __slots__ = ("started_at", "passed", "summary", "level_no")
+
+    def __init__(self, started_at: float, level_no: int):
+        self.started_at = started_at
+        self.passed = 0
+        self.summary: Optional[dict] = None
+        self.level_no = level_no
+
+
+class LogDeduplicator:
+    """
+    日志去重器。
+
+    每个指纹在 window 秒的时间窗口内，前 burst 条日志直接写入数据库，之后的重复日志不再逐条写入，
+    而是在窗口结束时合并为一行：内容取第一条被合并的日志，repeat_count 为合并的条数，
+    timestamp 与 last_timestamp 分别为第一条与最后一条被合并日志的时间。
+
+    offer 方法是线程安全的，由数据库日志处理器在放入队列前调用；expire 方法由处理器的后台任务定期调用。
+
+    Attributes:
+        window: 时间窗口（秒）.
+        burst: 每个指纹在一个时间窗口内逐条写入的最大行数.
+        max_fingerprints: 同时跟踪的最大指纹数，超出时新指纹的日志不去重.
+    """
+
+    def __init__(self, window: float = 10, burst: int = 1, max_fingerprints: int = 10000):
+        self.window = window
+        self.burst = burst
+        self.max_fingerprints = max_fingerprints
+        self._windows: dict[tuple, _Window] = {}
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def offer(self, row: dict, level_no: int) -> bool:
+        """
+        判断日志行是否应直接写入.
+
+        Args:
+            row: 日志行.
+            level_no: 日志级别编号.
+
+        Returns:
+            如果日志行应直接写入，则返回 True；如果已被合并到窗口的汇总行中，则返回 False.
+        """
+        key = fingerprint(row)
+        now = time.monotonic()
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None:
+                if len(self._windows) >= self.max_fingerprints:
+                    return True
+                state = self._windows[key] = _Window(now, level_no)
+
+            if state.passed < self.burst:
+                state.passed += 1
+                return True
+
+            if state.summary is None:
+                state.summary = {**row, "repeat_count": 1, "last_timestamp": row["timestamp"]}
+            else:
+                state.summary["repeat_count"] += 1
+                state.summary["last_timestamp"] = row["timestamp"]
+            self.suppressed += 1
+            return False
+
+    def expire(self, force: bool = False) -> list[tuple[dict, int]]:
+        """
+        结束已到期的时间窗口.
+
+        Args:
+            force: 是否结束全部时间窗口，用于停止时输出剩余的汇总行.
+
+        Returns:
+            到期窗口中合并的 (汇总行, 日志级别编号) 列表.
+        """
+        deadline = time.monotonic() - self.window
+        summaries = []
+        with self._lock:
+            for key in [key for key, state in self._windows.items() if force or state.started_at <= deadline]:
+                state = self._windows.pop(key)
+                if state.summary is not None:
+                    summaries.append((state.summary, state.level_no))
+        return summaries
@@ -0,0 +1,244 @@
+import asyncio
+import re
+from datetime import datetime, timedelta, timezone
+
+from loguru import logger
+from tortoise import connections
+from tortoise.transactions import in_transaction
+
+from fast_admin.core.database import advisory_lock
+from fast_admin.models.logs import Log
+
+"""
+日志分区模块。
+
+此模块将 logs 表转换为按 timestamp 范围分区的表，并维护分区，包括：
+
+- 定义 partition_logs_table 函数，将普通的 logs 表转换为分区表，是一次性的可选迁移。
+- 定义 create_log_partitions 函数，提前创建未来的分区。
+- 定义 drop_log_partitions 函数，删除超过保留期的分区，代替逐行删除旧日志。
+- 定义 maintain_log_partitions 函数和 run_log_partition_maintenance 后台任务，定期执行以上维护。
+
+按 start_time/end_time 过滤的日志查询会由 PostgreSQL 自动裁剪无关的分区。
+
+"""
+
+# 分区表名前缀，分区表名为前缀加分区起始日期，例如 logs_p20261018 (按天) 或 logs_p202610 (按月)
+PARTITION_PREFIX = f"{Log._meta.db_table}_p"
+
+# 分区维护的咨询锁名称，多个工作进程同时运行维护任务时只有一个执行
+PARTITION_LOCK = "fast_admin.log_partition"
+
+_PARTITION_NAME_FORMATS = {"day": "%Y%m%d", "month": "%Y%m"}
+
+# 匹配索引定义中的原表名，例如 "ON public.logs_legacy "
+_LEGACY_TABLE = re.compile(rf'ON (?:ONLY )?(?P<schema>(?:"?\w+"?\.)?)"?{Log._meta.db_table}_legacy"? ')
+
+
+def _period_start(moment: datetime, interval: str) -> datetime:
+    """获取时间所在分区的起始时间 (UTC)"""
+    moment = moment.astimezone(timezone.utc)
+    if interval == "day":
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == "month":
+        return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"不支持的分区间隔: {interval}")
+
+
+def _next_period(start: datetime, interval: str) -> datetime:
+    """获取下一个分区的起始时间"""
+    if interval == "day":
+        return start + timedelta(days=1)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def _interval_delta(interval: str, count: int) -> timedelta:
+    """获取 count 个分区间隔的近似时长，用于计算提前创建分区的截止时间"""
+    return timedelta(days=count if interval == "day" else count * 31)
+
+
+def partition_name(start: datetime, interval: str) -> str:
+    """
+    获取分区表名.
+
+    Args:
+        start: 分区起始时间.
+        interval: 分区间隔，"day" 或 "month".
+
+    Returns:
+        分区表名.
+    """
+    return f"{PARTITION_PREFIX}{start.strftime(_PARTITION_NAME_FORMATS[interval])}"
+
+
+async def is_partitioned() -> bool:
+    """
+    判断 logs 表是否为分区表.
+
+    Returns:
+        如果 logs 表是分区表，则返回 True，否则返回 False.
+    """
+    _, rows = await connections.get("default").execute_query(
+        "SELECT relkind FROM pg_class WHERE oid = to_regclass($1)", [Log._meta.db_table]
+    )
+    return bool(rows) and rows[0]["relkind"] == "p"
+
+
+async def _create_partitions(conn, start: datetime, end: datetime, interval: str) -> list[str]:
+    """创建覆盖 [start, end] 的全部分区，返回分区表名列表"""
+    names = []
+    period = _period_start(start, interval)
+    while period <= end:
+        upper = _next_period(period, interval)
+        name = partition_name(period, interval)
+        await conn.execute_script(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{Log._meta.db_table}" '
+            f"FOR VALUES FROM ('{period.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        names.append(name)
+        period = upper
+    return names
+
+
+async def partition_logs_table(interval: str = "day", ahead: int = 7) -> None:
+    """
+    将 logs 表转换为按 timestamp 范围分区的表.
+
+    在一个事务中创建分区表，按已有数据的时间范围创建分区并提前创建之后的 ahead 个分区，
+    并将原表中的数据复制到分区表后删除原表，原表的二级索引在分区表上重建。
+    分区表的主键为 (id, timestamp)，id 继续使用原有的序列.
+
+    Args:
+        interval: 分区间隔，"day" 或 "month".
+        ahead: 提前创建的分区数量.
+
+    Raises:
+        RuntimeError: 如果 logs 表已经是分区表.
+    """
+    if await is_partitioned():
+        raise RuntimeError("logs 表已经是分区表")
+
+    table = Log._meta.db_table
+    legacy = f"{table}_legacy"
+    async with in_transaction() as conn:
+        await conn.execute_script(f'''
+            ALTER TABLE "{table}" RENAME TO "{legacy}";
+            ALTER TABLE "{legacy}" RENAME CONSTRAINT "{table}_pkey" TO "{legacy}_pkey";
+            CREATE TABLE "{table}" (
+                LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING COMMENTS,
+                PRIMARY KEY ("id", "timestamp")
+            ) PARTITION BY RANGE ("timestamp");
+            ALTER SEQUENCE "{table}_id_seq" OWNED BY "{table}"."id";
+            COMMENT ON TABLE "{table}" IS '日志模型';
+        ''')
+
+        _, rows = await conn.execute_query(f'SELECT min("timestamp") AS "start" FROM "{legacy}"')
+        now = datetime.now(timezone.utc)
+        start = rows[0]["start"] or now
+        await _create_partitions(conn, start, _period_start(now, interval) + _interval_delta(interval, ahead), interval)
+
+        # 原表上的二级索引随原表一起删除，删除后在分区表上按原名重建
+        _, indexes = await conn.execute_query(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = $1 AND indexname <> $2", [legacy, f"{legacy}_pkey"]
+        )
+
+        await conn.execute_script(f'''
+            INSERT INTO "{table}" SELECT * FROM "{legacy}";
+            DROP TABLE "{legacy}";
+        ''')
+
+        for index in indexes:
+            await conn.execute_script(_LEGACY_TABLE.sub(f'ON \\g<schema>"{table}" ', index["indexdef"], count=1))
+
+
+async def create_log_partitions(interval: str = "day", ahead: int = 7) -> list[str]:
+    """
+    创建当前分区及之后的 ahead 个分区.
+
+    Args:
+        interval: 分区间隔，"day" 或 "month".
+        ahead: 提前创建的分区数量.
+
+    Returns:
+        分区表名列表，包括已存在的分区.
+    """
+    now = datetime.now(timezone.utc)
+    async with in_transaction() as conn:
+        return await _create_partitions(conn, now, _period_start(now, interval) + _interval_delta(interval, ahead), interval)
+
+
+async def drop_log_partitions(interval: str = "day", retention_days: int = 30) -> list[str]:
+    """
+    删除全部数据都超过保留期的分区.
+
+    Args:
+        interval: 分区间隔，"day" 或 "month".
+        retention_days: 日志保留天数.
+
+    Returns:
+        已删除的分区表名列表.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    name_format = _PARTITION_NAME_FORMATS[interval]
+
+    conn = connections.get("default")
+    _, rows = await conn.execute_query(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass($1)",
+        [Log._meta.db_table],
+    )
+
+    dropped = []
+    for row in rows:
+        name = row["relname"]
+        try:
+            start = datetime.strptime(name[len(PARTITION_PREFIX):], name_format).replace(tzinfo=timezone.utc)
+        except ValueError:
+            # 不是按当前分区间隔命名的分区，不做处理
+            continue
+        if _next_period(start, interval) <= cutoff:
+            await conn.execute_script(f'DROP TABLE IF EXISTS "{name}"')
+            dropped.append(name)
+    return sorted(dropped)
+
+
+async def maintain_log_partitions(interval: str = "day", ahead: int = 7, retention_days: int = 30) -> None:
+    """
+    维护日志分区：提前创建未来的分区，并删除超过保留期的分区。logs 表不是分区表时不做处理.
+
+    Args:
+        interval: 分区间隔，"day" 或 "month".
+        ahead: 提前创建的分区数量.
+        retention_days: 日志保留天数.
+    """
+    if not await is_partitioned():
+        return
+    await create_log_partitions(interval, ahead)
+    await drop_log_partitions(interval, retention_days)
+
+
+async def run_log_partition_maintenance(
+        interval: str = "day",
+        ahead: int = 7,
+        retention_days: int = 30,
+        period: float = 3600,
+) -> None:
+    """
+    后台任务，每隔 period 秒维护一次日志分区，直到任务被取消.
+
+    每次维护前尝试获取咨询锁，其他进程正在维护时跳过本次维护.
+
+    Args:
+        interval: 分区间隔，"day" 或 "month".
+        ahead: 提前创建的分区数量.
+        retention_days: 日志保留天数.
+        period: 两次维护的间隔（秒）.
+    """
+    while True:
+        try:
+            async with advisory_lock(PARTITION_LOCK) as acquired:
+                if acquired:
+                    await maintain_log_partitions(interval, ahead, retention_days)
+        except Exception as exc:
+            logger.error(f"日志分区维护失败: {exc!r}")
+        await asyncio.sleep(period)
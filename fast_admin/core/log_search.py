@@ -0,0 +1,162 @@
+import asyncio
+import re
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import status
+from tortoise import connections
+
+from fast_admin.core.exceptions import CustomException
+from fast_admin.models.logs import Log
+
+"""
+日志搜索模块。
+
+此模块基于 PostgreSQL 全文检索与 pg_trgm 三元组索引搜索日志的消息和异常信息，包括：
+
+- 定义 SEARCH_VECTOR 全文检索表达式，与迁移中创建的 GIN 表达式索引一致。
+- 定义 search_logs 函数，按匹配方式生成参数化的 SQL，并按相关度排序。
+
+匹配方式：
+
+- phrase: 短语匹配，使用全文检索索引。
+- prefix: 前缀匹配，每个词都按前缀匹配，使用全文检索索引。
+- fuzzy: 模糊匹配，使用 pg_trgm 的词相似度与三元组索引；pg_trgm 扩展不可用时回退为 ILIKE 子串匹配。
+
+"""
+
+MATCH_MODES = ("phrase", "prefix", "fuzzy")
+
+# 全文检索表达式，必须与迁移中的表达式索引完全一致才能使用索引
+SEARCH_VECTOR = """to_tsvector('simple', "message" || ' ' || coalesce("exception", ''))"""
+
+# pg_trgm 扩展是否可用，首次搜索时检查
+_trgm_available: Optional[bool] = None
+
+
+async def trgm_available() -> bool:
+    """
+    检查 pg_trgm 扩展是否可用.
+
+    Returns:
+        如果 pg_trgm 扩展已安装，则返回 True，否则返回 False.
+    """
+    global _trgm_available
+    if _trgm_available is None:
+        _, rows = await connections.get("default").execute_query(
+            "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+        )
+        _trgm_available = bool(rows)
+    return _trgm_available
+
+
+def _prefix_query(q: str) -> str:
+    """将搜索词转换为每个词都按前缀匹配的 tsquery 文本"""
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        raise CustomException(
+            msg="搜索词不能为空",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def _escape_like(value: str) -> str:
+    """转义 LIKE 的通配符"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def search_logs(
+        q: str,
+        match: str = "phrase",
+        filters: Optional[dict[str, Any]] = None,
+        contains: Optional[dict[str, Optional[str]]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        page: int = 1,
+        page_size: int = 10,
+        count_mode: str = "exact",
+) -> tuple[list[Log], Optional[int]]:
+    """
+    搜索日志的消息和异常信息，结果按相关度倒序、时间倒序排列.
+
+    Args:
+        q: 搜索词.
+        match: 匹配方式，phrase、prefix 或 fuzzy.
+        filters: 精确匹配的字段与值，字段名必须是 Log 的字段.
+        contains: 不区分大小写包含匹配的字段与值，字段名必须是 Log 的字段.
+        start_time: 起始时间.
+        end_time: 结束时间.
+        page: 页码.
+        page_size: 每页数量.
+        count_mode: 总数的计算方式，exact 或 none，其他值按 none 处理.
+
+    Returns:
+        (当前页的日志列表, 总数).
+
+    Raises:
+        CustomException: 如果匹配方式不支持或搜索词为空.
+    """
+    if match not in MATCH_MODES:
+        raise CustomException(
+            msg=f"不支持的匹配方式: {match}",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+
+    values: list = []
+
+    def param(value: Any) -> str:
+        values.append(value)
+        return f"${len(values)}"
+
+    if match == "phrase":
+        tsquery = f"phraseto_tsquery('simple', {param(q)})"
+        conditions = [f"{SEARCH_VECTOR} @@ {tsquery}"]
+        rank = f"ts_rank({SEARCH_VECTOR}, {tsquery})"
+    elif match == "prefix":
+        tsquery = f"to_tsquery('simple', {param(_prefix_query(q))})"
+        conditions = [f"{SEARCH_VECTOR} @@ {tsquery}"]
+        rank = f"ts_rank({SEARCH_VECTOR}, {tsquery})"
+    elif await trgm_available():
+        term = param(q)
+        conditions = [f'({term} <% "message" OR {term} <% "exception")']
+        rank = f'greatest(word_similarity({term}, "message"), coalesce(word_similarity({term}, "exception"), 0))'
+    else:
+        pattern = param(f"%{_escape_like(q)}%")
+        conditions = [f'("message" ILIKE {pattern} OR "exception" ILIKE {pattern})']
+        rank = "0"
+
+    projection = Log._meta.fields_db_projection
+    for field, value in (filters or {}).items():
+        if value is not None:
+            conditions.append(f'"{projection[field]}" = {param(value)}')
+    for field, value in (contains or {}).items():
+        if value:
+            conditions.append(f'"{projection[field]}" ILIKE {param(f"%{_escape_like(value)}%")}')
+    if start_time:
+        conditions.append(f'"timestamp" >= {param(start_time)}')
+    if end_time:
+        conditions.append(f'"timestamp" <= {param(end_time)}')
+
+    table = Log._meta.db_table
+    where = " AND ".join(conditions)
+    columns = ", ".join(f'"{column}"' for column in projection.values())
+    filter_values = list(values)
+
+    conn = connections.get("default")
+    items_sql = (
+        f'SELECT {columns} FROM "{table}" WHERE {where} '
+        f'ORDER BY {rank} DESC, "timestamp" DESC, "id" DESC '
+        f"LIMIT {param(page_size)} OFFSET {param((page - 1) * page_size)}"
+    )
+    items_query = conn.execute_query(items_sql, values)
+
+    if count_mode == "exact":
+        count_query = conn.execute_query(f'SELECT count(*) AS "total" FROM "{table}" WHERE {where}', filter_values)
+        (_, rows), (_, count_rows) = await asyncio.gather(items_query, count_query)
+        total = count_rows[0]["total"]
+    else:
+        _, rows = await items_query
+        total = None
+
+    return [Log._init_from_db(**dict(row)) for row in rows], total
@@ -0,0 +1,399 @@
+import asyncio
+import sys
+import threading
+import traceback
+from collections import deque
+from itertools import count
+from typing import Optional
+
+from loguru import logger
+from tortoise import connections
+
+from fast_admin.core.log_dedup import LogDeduplicator
+from fast_admin.core.log_spool import CircuitBreaker, LogSpool
+from fast_admin.models.log_rollup import add_to_rollup
+from fast_admin.models.logs import Log
+
+"""
+数据库日志模块。
+
+此模块包含将日志批量写入数据库的处理器，包括：
+
+- 定义 DatabaseLogSink 类，将日志记录缓存在有界队列中，按数量或时间间隔批量写入数据库。
+- 定义 copy_rows 函数，通过 PostgreSQL 的 COPY 协议批量写入日志。
+- 定义 is_sink_error_record 函数，判断日志记录是否是处理器自身的错误日志。
+
+"""
+
+# ERROR 级别的日志编号，此级别及以上的日志不会因队列已满而被丢弃
+ERROR_LEVEL_NO = 40
+
+# COPY 写入的字段，即 Log 模型中除主键和由数据库填充默认值的字段之外的全部字段
+COPY_FIELDS = tuple(
+    field_name for field_name in Log._meta.fields_db_projection
+    if field_name not in (Log._meta.pk_attr, "created_at", "updated_at")
+)
+COPY_COLUMNS = [Log._meta.fields_db_projection[field_name] for field_name in COPY_FIELDS]
+
+
+def is_sink_error_record(record: dict) -> bool:
+    """
+    判断 loguru 日志记录是否是数据库日志处理器自身的错误日志，用作处理器的过滤条件.
+
+    处理器的错误日志只写入控制台与日志文件，避免写入失败的日志再次进入处理器.
+
+    Args:
+        record: loguru 的日志记录.
+
+    Returns:
+        如果是处理器的错误日志，则返回 True.
+    """
+    return "log_sink_error" in record["extra"]
+
+
+def record_to_row(record: dict) -> dict:
+    """
+    将 loguru 的日志记录转换为 logs 表的一行.
+
+    Args:
+        record: loguru 的日志记录.
+
+    Returns:
+        以 Log 字段名为键的字典.
+    """
+    exception = record.get("exception")
+    return {
+        "level": record["level"].name,
+        "message": record["message"],
+        "timestamp": record["time"],
+        "process": str(record["process"].id),
+        "thread": str(record["thread"].id),
+        "logger_name": record.get("name") or "",
+        "module": record.get("module") or "",
+        "line_no": record.get("line") or 0,
+        "function_name": record.get("function") or "",
+        "exception": "".join(traceback.format_exception(*exception)) if exception else None,
+        "repeat_count": 1,
+        "last_timestamp": None,
+    }
+
+
+async def copy_rows(rows: list[dict]) -> bool:
+    """
+    通过 COPY 协议以二进制格式批量写入日志行.
+
+    Args:
+        rows: 日志行列表.
+
+    Returns:
+        如果写入成功，则返回 True；如果数据库连接不支持 COPY (例如 SQLite)，则返回 False.
+    """
+    client = connections.get("default")
+    async with client.acquire_connection() as connection:
+        if not hasattr(connection, "copy_records_to_table"):
+            return False
+        await connection.copy_records_to_table(
+            Log._meta.db_table,
+            records=[tuple(row[field_name] for field_name in COPY_FIELDS) for row in rows],
+            columns=COPY_COLUMNS,
+        )
+    return True
+
+
+class DatabaseLogSink:
+    """
+    批量写入数据库的日志处理器。
+
+    write 方法是线程安全且不阻塞的，只将日志记录放入有界队列；
+    后台任务在队列达到 batch_size 条或距上次写入超过 flush_interval 秒时，用一次批量插入写入数据库。
+
+    队列已满时按 drop_levels 的顺序丢弃最旧的低级别日志，ERROR 及以上级别的日志永不丢弃。
+
+    写入方式 mode 为 "copy" 时通过 COPY 协议写入，数据库不支持时自动回退为批量插入。
+    rollup 为 True 时每批日志写入后累加到按分钟汇总的日志汇总表。
+    指定 deduplicator 时日志先经过去重器，重复的日志按时间窗口合并为一行后再放入队列。
+
+    写入超过 write_timeout 秒视为失败；指定 breaker 时连续失败后断路，断路期间不再访问数据库；
+    指定 spool 时写入失败或断路期间的日志追加到本地暂存文件，断路器恢复后以每秒 replay_rate 行的速度重放。
+    后台任务的每个步骤单独捕获异常 (例如磁盘已满时追加暂存文件失败)，记录到日志文件并计入 errors 后继续运行。
+
+    Attributes:
+        mode: 写入方式，"insert" 或 "copy".
+        rollup: 是否更新日志汇总.
+        deduplicator: 日志去重器，为 None 时不去重.
+        breaker: 断路器，为 None 时每批日志都尝试写入数据库.
+        spool: 暂存文件，为 None 时写入失败的日志被丢弃.
+        write_timeout: 每批写入的超时时间（秒）.
+        replay_rate: 每秒重放暂存日志的最大行数.
+        batch_size: 每批写入的最大记录数.
+        flush_interval: 两次写入的最大间隔（秒）.
+        queue_size: 队列的最大记录数.
+        drop_levels: 队列已满时可丢弃的日志级别，按丢弃的先后顺序排列.
+    """
+
+    def __init__(
+            self,
+            mode: str = "insert",
+            rollup: bool = True,
+            deduplicator: Optional[LogDeduplicator] = None,
+            breaker: Optional[CircuitBreaker] = None,
+            spool: Optional[LogSpool] = None,
+            write_timeout: float = 5,
+            replay_rate: int = 1000,
+            batch_size: int = 500,
+            flush_interval: float = 1.0,
+            queue_size: int = 10000,
+            drop_levels: tuple[str, ...] = ("TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING"),
+    ):
+        if mode not in ("insert", "copy"):
+            raise ValueError(f"不支持的日志写入方式: {mode}")
+        self.mode = mode
+        self.rollup = rollup
+        self.deduplicator = deduplicator
+        self.breaker = breaker
+        self.spool = spool
+        self.write_timeout = write_timeout
+        self.replay_rate = replay_rate
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.drop_levels = tuple(drop_levels)
+
+        # 按级别分桶保存 (序号, 记录)，丢弃时从可丢弃级别的桶中取最旧的记录，写入时按序号合并
+        self._buckets: dict[str, deque] = {}
+        self._size = 0
+        self._seq = count()
+        self._lock = threading.Lock()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.replayed = 0
+        self.errors = 0
+
+    def write(self, message) -> None:
+        """
+        接收日志记录，供 loguru 调用.
+
+        Args:
+            message: loguru 的日志消息.
+        """
+        record = message.record
+        row, level_no = record_to_row(record), record["level"].no
+        if self.deduplicator is not None and not self.deduplicator.offer(row, level_no):
+            return
+        self.put(row, level_no)
+
+    def put(self, row: dict, level_no: int) -> None:
+        """
+        将日志行放入队列.
+
+        Args:
+            row: 日志行.
+            level_no: 日志级别编号.
+        """
+        with self._lock:
+            if self._size >= self.queue_size and not self._evict(row["level"], level_no):
+                self.dropped += 1
+                return
+            self._buckets.setdefault(row["level"], deque()).append((next(self._seq), row))
+            self._size += 1
+            full = self._size >= self.batch_size
+
+        if full and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _evict(self, level: str, level_no: int) -> bool:
+        """队列已满时为新记录腾出空间，返回是否可以放入新记录"""
+        for drop_level in self.drop_levels:
+            if drop_level == level:
+                # 新记录本身的级别比队列中剩余的可丢弃记录更低，直接丢弃新记录
+                return False
+            bucket = self._buckets.get(drop_level)
+            if bucket:
+                bucket.popleft()
+                self._size -= 1
+                self.dropped += 1
+                return True
+        # 没有可丢弃的记录，ERROR 及以上级别的记录允许超出队列容量
+        return level_no >= ERROR_LEVEL_NO
+
+    def take(self, limit: int) -> list[dict]:
+        """
+        按写入顺序从队列中取出日志行.
+
+        Args:
+            limit: 最大行数.
+
+        Returns:
+            日志行列表.
+        """
+        rows = []
+        with self._lock:
+            while len(rows) < limit and self._size:
+                bucket = min((bucket for bucket in self._buckets.values() if bucket), key=lambda b: b[0][0])
+                rows.append(bucket.popleft()[1])
+                self._size -= 1
+        return rows
+
+    async def write_rows(self, rows: list[dict]) -> None:
+        """
+        将日志行写入数据库.
+
+        Args:
+            rows: 日志行列表.
+        """
+        if self.mode == "copy":
+            if await copy_rows(rows):
+                return
+            # 数据库不支持 COPY，此后改用批量插入
+            self.mode = "insert"
+        await Log.bulk_create([Log(**row) for row in rows])
+
+    async def _write(self, rows: list[dict]) -> bool:
+        """写入一批日志行并更新断路器与日志汇总，返回是否写入成功"""
+        if self.breaker is not None and not self.breaker.allow():
+            return False
+        try:
+            await asyncio.wait_for(self.write_rows(rows), timeout=self.write_timeout)
+        except Exception as exc:
+            # 此处不能使用 loguru 记录，否则失败的日志会再次进入本处理器
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            print(f"日志写入数据库失败 ({len(rows)} 条): {exc!r}", file=sys.stderr)
+            return False
+        if self.breaker is not None:
+            self.breaker.record_success()
+        self.flushed += len(rows)
+        if self.rollup:
+            await self.write_rollup(rows)
+        return True
+
+    async def flush(self) -> None:
+        """将队列中的全部日志写入数据库，写入失败时追加到暂存文件"""
+        while True:
+            rows = self.take(self.batch_size)
+            if not rows:
+                return
+            if await self._write(rows):
+                continue
+            spooled = 0
+            if self.spool is not None:
+                try:
+                    spooled = await asyncio.to_thread(self.spool.append, rows)
+                except OSError as exc:
+                    self._report_error(f"追加暂存文件失败，丢弃 {len(rows)} 条日志", exc)
+            self.failed += len(rows) - spooled
+
+    async def replay(self) -> None:
+        """断路器闭合时重放暂存文件中的日志，每次调用最多重放 replay_rate * flush_interval 行"""
+        if self.spool is None or not self.spool.depth:
+            return
+        if self.breaker is not None and self.breaker.state != "closed":
+            return
+        budget = max(int(self.replay_rate * self.flush_interval), 1)
+        while budget > 0:
+            rows = await asyncio.to_thread(self.spool.read, min(budget, self.batch_size))
+            if not rows or not await self._write(rows):
+                return
+            await asyncio.to_thread(self.spool.ack, len(rows))
+            self.replayed += len(rows)
+            budget -= len(rows)
+
+    async def write_rollup(self, rows: list[dict]) -> None:
+        """
+        将已写入的日志行累加到日志汇总，失败时只输出到标准错误，不影响日志本身的写入.
+
+        Args:
+            rows: 日志行列表.
+        """
+        try:
+            await add_to_rollup(rows)
+        except Exception as exc:
+            print(f"日志汇总更新失败，遗漏 {len(rows)} 条: {exc!r}", file=sys.stderr)
+
+    def _report_error(self, message: str, exc: BaseException) -> None:
+        """记录后台任务的错误，只写入控制台与日志文件"""
+        self.errors += 1
+        logger.bind(log_sink_error=True).opt(exception=exc).error(f"数据库日志处理器: {message}: {exc!r}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                self.expire_duplicates()
+            except Exception as exc:
+                self._report_error("合并重复日志失败", exc)
+            try:
+                await self.flush()
+            except Exception as exc:
+                self._report_error("写入日志失败", exc)
+            try:
+                await self.replay()
+            except Exception as exc:
+                self._report_error("重放暂存日志失败", exc)
+
+    def expire_duplicates(self, force: bool = False) -> None:
+        """
+        将去重器中到期时间窗口的汇总行放入队列.
+
+        Args:
+            force: 是否结束全部时间窗口.
+        """
+        if self.deduplicator is None:
+            return
+        for row, level_no in self.deduplicator.expire(force):
+            self.put(row, level_no)
+
+    def start(self) -> None:
+        """在当前事件循环中启动后台写入任务"""
+        if self._task is not None:
+            return
+        if self.spool is not None:
+            self.spool.open()
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台写入任务，并写入队列中剩余的日志"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._loop = None
+        self.expire_duplicates(force=True)
+        await self.flush()
+
+    def metrics(self) -> dict:
+        """
+        获取运行指标.
+
+        Returns:
+            包含已写入、已丢弃、写入失败、排队中、被合并的重复记录数，断路器状态、暂存文件深度、
+            被隔离的损坏暂存记录数以及后台任务错误次数的字典.
+        """
+        return {
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "queued": self._size,
+            "suppressed": self.deduplicator.suppressed if self.deduplicator is not None else 0,
+            "circuit": self.breaker.state if self.breaker is not None else "closed",
+            "spool_depth": self.spool.depth if self.spool is not None else 0,
+            "spool_bytes": self.spool.pending_bytes if self.spool is not None else 0,
+            "replayed": self.replayed,
+            "spool_corrupted": self.spool.corrupted if self.spool is not None else 0,
+            "errors": self.errors,
+        }
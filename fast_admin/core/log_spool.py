@@ -0,0 +1,244 @@
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+
+import orjson
+
+"""
+日志暂存模块。
+
+此模块包含数据库不可用时保护数据库日志处理器的组件，包括：
+
+- 定义 CircuitBreaker 类，连续写入失败达到阈值后断开，在冷却时间后放行一次试探写入。
+- 定义 LogSpool 类，断路期间将日志行追加到本地暂存文件，数据库恢复后按批读取重放。
+
+"""
+
+# 每条记录的长度前缀，4 字节大端无符号整数
+_LENGTH = struct.Struct(">I")
+
+# 序列化后需要还原为 datetime 的字段
+_DATETIME_FIELDS = ("timestamp", "last_timestamp")
+
+
+class CircuitBreaker:
+    """
+    断路器。
+
+    状态为 closed 时放行全部写入；连续失败 failure_threshold 次后变为 open，拒绝写入；
+    open 持续 reset_timeout 秒后变为 half_open，放行一次试探写入，成功则恢复为 closed，失败则重新 open。
+
+    Attributes:
+        failure_threshold: 断开前允许的连续失败次数.
+        reset_timeout: 断开后到试探写入的冷却时间（秒）.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> str:
+        """当前状态，closed、open 或 half_open"""
+        if self.failures < self.failure_threshold:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """
+        判断是否放行写入.
+
+        Returns:
+            状态为 closed 或 half_open 时返回 True.
+        """
+        return self.state != "open"
+
+    def record_success(self) -> None:
+        """记录一次写入成功"""
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        """记录一次写入失败"""
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+
+class LogSpool:
+    """
+    日志暂存文件。
+
+    文件只追加写入，每条记录为 4 字节长度前缀加 orjson 序列化的日志行，文件大小不超过 max_bytes。
+    已重放的位置保存在 "<path>.offset" 文件中，进程重启后从该位置继续重放；全部重放后清空文件。
+
+    无法解析的记录移动到 "<path>.corrupt" 隔离文件并跳过，不会阻塞之后的重放；
+    打开时末尾未写完整的记录 (例如进程在写入时退出) 同样移入隔离文件并截断，避免之后追加的记录与之错位。
+
+    Attributes:
+        path: 暂存文件路径.
+        max_bytes: 暂存文件的最大字节数.
+        corrupted: 被隔离的损坏记录数.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._offset_path = f"{path}.offset"
+        self._corrupt_path = f"{path}.corrupt"
+        self._lock = threading.Lock()
+        self._size = 0
+        self._offset = 0
+        self._read_offset = 0
+        self.depth = 0
+        self.dropped = 0
+        self.corrupted = 0
+
+    def open(self) -> None:
+        """读取已有的暂存文件与重放位置，统计待重放的记录数，并隔离末尾未写完整的记录"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock:
+            self._size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            self._offset = 0
+            if os.path.exists(self._offset_path):
+                with open(self._offset_path, "rb") as file:
+                    try:
+                        self._offset = min(int(file.read() or 0), self._size)
+                    except ValueError:
+                        self._offset = 0
+            self._read_offset = self._offset
+
+            self.depth = 0
+            end = self._offset
+            for end, _ in self._iter_records(self._offset):
+                self.depth += 1
+            if end < self._size:
+                with open(self.path, "r+b") as file:
+                    file.seek(end)
+                    self._quarantine(file.read())
+                    file.truncate(end)
+                self._size = end
+
+    def _quarantine(self, data: bytes) -> None:
+        """将无法解析的记录追加到隔离文件"""
+        with open(self._corrupt_path, "ab") as file:
+            file.write(_LENGTH.pack(len(data)) + data)
+        self.corrupted += 1
+
+    @staticmethod
+    def _decode(data: bytes) -> dict:
+        """解析一条记录，无法解析时抛出 ValueError 或 TypeError"""
+        row = orjson.loads(data)
+        if not isinstance(row, dict):
+            raise TypeError(f"暂存记录不是对象: {type(row).__name__}")
+        for field in _DATETIME_FIELDS:
+            if row.get(field):
+                row[field] = datetime.fromisoformat(row[field])
+        return row
+
+    @property
+    def pending_bytes(self) -> int:
+        """待重放的字节数"""
+        return self._size - self._offset
+
+    def _iter_records(self, offset: int):
+        """从 offset 开始逐条读取记录，返回 (下一条记录的位置, 记录内容)"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            while header := file.read(_LENGTH.size):
+                if len(header) < _LENGTH.size:
+                    return
+                (length,) = _LENGTH.unpack(header)
+                data = file.read(length)
+                if len(data) < length:
+                    # 最后一条记录未写完整 (例如进程在写入时退出)，忽略
+                    return
+                offset += _LENGTH.size + length
+                yield offset, data
+
+    def append(self, rows: list[dict]) -> int:
+        """
+        追加日志行.
+
+        Args:
+            rows: 日志行列表.
+
+        Returns:
+            已追加的行数，暂存文件已满时剩余的行被丢弃.
+        """
+        chunks = []
+        size = 0
+        with self._lock:
+            for row in rows:
+                data = orjson.dumps(row)
+                if self._size + size + _LENGTH.size + len(data) > self.max_bytes:
+                    break
+                chunks.append(_LENGTH.pack(len(data)) + data)
+                size += _LENGTH.size + len(data)
+            if chunks:
+                with open(self.path, "ab") as file:
+                    file.write(b"".join(chunks))
+                self._size += size
+                self.depth += len(chunks)
+            self.dropped += len(rows) - len(chunks)
+        return len(chunks)
+
+    def read(self, limit: int) -> list[dict]:
+        """
+        读取下一批待重放的日志行，调用 ack 后才视为已重放.
+
+        Args:
+            limit: 最大行数.
+
+        Returns:
+            日志行列表.
+        """
+        rows = []
+        with self._lock:
+            self._read_offset = self._offset
+            for offset, data in self._iter_records(self._offset):
+                try:
+                    row = self._decode(data)
+                except (ValueError, TypeError):
+                    if rows:
+                        # 先重放已读取的行，下次读取时再隔离此记录
+                        break
+                    # 隔离损坏的记录并立即越过，不等待 ack
+                    self._quarantine(data)
+                    self._read_offset = offset
+                    self._commit(1)
+                    continue
+                self._read_offset = offset
+                rows.append(row)
+                if len(rows) >= limit:
+                    break
+        return rows
+
+    def ack(self, count: int) -> None:
+        """
+        确认上一次 read 读取的日志行已重放.
+
+        Args:
+            count: 已重放的行数.
+        """
+        with self._lock:
+            self._commit(count)
+
+    def _commit(self, count: int) -> None:
+        """将重放位置推进到上一次读取的位置，调用方需持有锁"""
+        self._offset = self._read_offset
+        self.depth -= count
+        if self._offset >= self._size:
+            # 全部重放完毕，清空暂存文件
+            open(self.path, "wb").close()
+            self._size = self._offset = self._read_offset = 0
+            self.depth = 0
+        with open(self._offset_path, "w") as file:
+            file.write(str(self._offset))
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from collections import deque
+from itertools import count
+from typing import Optional
+
+from fast_admin.core.log_sink import record_to_row
+
+"""
+实时日志模块。
+
+此模块包含供实时日志接口使用的内存环形缓冲区，包括：
+
+- 定义 LogRingBuffer 类，作为 loguru 的处理器保存最近的日志记录，并在新日志到达时唤醒等待的订阅者。
+
+"""
+
+
+class LogRingBuffer:
+    """
+    日志环形缓冲区。
+
+    write 方法是线程安全且不阻塞的，只将日志记录追加到有界的环形缓冲区，超出容量时覆盖最旧的记录；
+    订阅者记录已读取的序号，通过 wait 方法等待并读取之后的新记录，不访问数据库。
+
+    Attributes:
+        capacity: 缓冲区的最大记录数.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._entries: deque[tuple[int, dict]] = deque(maxlen=capacity)
+        self._seq = count(1)
+        self._last_seq = 0
+        self._lock = threading.Lock()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+        self._notify_pending = False
+
+    def write(self, message) -> None:
+        """
+        接收日志记录，供 loguru 调用.
+
+        Args:
+            message: loguru 的日志消息.
+        """
+        record = message.record
+        row = record_to_row(record)
+        row["level_no"] = record["level"].no
+
+        with self._lock:
+            self._last_seq = next(self._seq)
+            row["seq"] = self._last_seq
+            self._entries.append((self._last_seq, row))
+            # 同一轮事件循环内的多条日志只唤醒一次订阅者
+            notify = self._loop is not None and not self._notify_pending
+            self._notify_pending = self._notify_pending or notify
+
+        if notify:
+            self._loop.call_soon_threadsafe(self._notify)
+
+    def _notify(self) -> None:
+        with self._lock:
+            self._notify_pending = False
+        # 唤醒当前全部等待者，之后的等待者等待新的事件
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    def start(self) -> None:
+        """在当前事件循环中启用订阅者唤醒"""
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+    @property
+    def last_seq(self) -> int:
+        """最新一条记录的序号"""
+        return self._last_seq
+
+    def since(self, seq: int) -> list[dict]:
+        """
+        读取序号之后的记录.
+
+        Args:
+            seq: 已读取的最后一条记录的序号.
+
+        Returns:
+            按序号排列的记录列表，订阅者落后超过缓冲区容量时只返回缓冲区中的记录.
+        """
+        with self._lock:
+            if seq >= self._last_seq:
+                return []
+            return [row for entry_seq, row in self._entries if entry_seq > seq]
+
+    async def wait(self, seq: int, timeout: float) -> list[dict]:
+        """
+        等待序号之后的新记录.
+
+        Args:
+            seq: 已读取的最后一条记录的序号.
+            timeout: 最长等待时间（秒）.
+
+        Returns:
+            按序号排列的记录列表，超时时返回空列表.
+        """
+        rows = self.since(seq)
+        if rows or self._event is None:
+            return rows
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return []
+        return self.since(seq)
@@ -5,28 +5,43 @@ from datetime import datetime
 
 from loguru import logger
 
-from fast_admin.models.logs import Log
+from fast_admin.core.access_log import AccessLogAggregator, is_access_record
 from fast_admin.core.config import settings
-
-
-class AsyncioHandler:
-    """将日志信息写入到数据库的处理器"""
-
-    async def write(self, message) -> None:
-        """写入日志记录到数据库"""
-        record = message.record
-
-        await Log.create(
-            level=record["level"].name,
-            message=record["message"],
-            process=str(record.get("process")),
-            thread=str(record.get("thread")),
-            logger_name=record.get("name", ""),
-            module=record.get("module", ""),
-            line_no=record.get("line", 0),
-            function_name=record.get("function", ""),
-            exception=record.get("exception", ""),
-        )
+from fast_admin.core.log_dedup import LogDeduplicator
+from fast_admin.core.log_spool import CircuitBreaker, LogSpool
+from fast_admin.core.log_sink import DatabaseLogSink, is_sink_error_record
+from fast_admin.core.log_stream import LogRingBuffer
+
+# 数据库日志处理器
+db_log_sink = DatabaseLogSink(
+    mode=settings.LOG_SINK_MODE,
+    rollup=settings.LOG_ROLLUP_ENABLED,
+    deduplicator=LogDeduplicator(
+        window=settings.LOG_DEDUP_WINDOW,
+        burst=settings.LOG_DEDUP_BURST,
+        max_fingerprints=settings.LOG_DEDUP_MAX_FINGERPRINTS,
+    ) if settings.LOG_DEDUP_WINDOW > 0 else None,
+    breaker=CircuitBreaker(
+        failure_threshold=settings.LOG_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.LOG_BREAKER_RESET_TIMEOUT,
+    ),
+    spool=LogSpool(
+        path=settings.LOG_SPOOL_PATH or os.path.join(settings.BASE_DIR, 'logs', 'db_spool.bin'),
+        max_bytes=settings.LOG_SPOOL_MAX_BYTES,
+    ) if settings.LOG_SPOOL_MAX_BYTES > 0 else None,
+    write_timeout=settings.LOG_SINK_WRITE_TIMEOUT,
+    replay_rate=settings.LOG_SPOOL_REPLAY_RATE,
+    batch_size=settings.LOG_SINK_BATCH_SIZE,
+    flush_interval=settings.LOG_SINK_FLUSH_INTERVAL,
+    queue_size=settings.LOG_SINK_QUEUE_SIZE,
+    drop_levels=tuple(settings.LOG_SINK_DROP_LEVELS),
+)
+
+# 实时日志缓冲区
+log_stream_buffer = LogRingBuffer(capacity=settings.LOG_STREAM_BUFFER_SIZE)
+
+# 访问日志汇总器
+access_log_aggregator = AccessLogAggregator() if settings.ACCESS_LOG_SUMMARY_ENABLED else None
 
 
 def setup_logging() -> None:
@@ -58,15 +73,26 @@ def setup_logging() -> None:
         diagnose=True,  # 启用诊断信息
     )
 
-    # 添加异步数据库处理器
+    # 添加数据库处理器，处理器自身维护有界队列并批量写入，因此不使用 loguru 的队列
+    # 访问日志只写入控制台与日志文件，按路由汇总后由访问日志汇总任务写入数据库
+    # 数据库处理器自身的错误日志同样只写入控制台与日志文件
+    db_log_sink.start()
     logger.add(
-        AsyncioHandler().write,
+        db_log_sink.write,
         format=log_format,
         level="INFO",
-        enqueue=True,
-        serialize=True,
+        filter=lambda record: not is_access_record(record) and not is_sink_error_record(record),
+        enqueue=False,
         backtrace=True,
+    )
 
+    # 添加实时日志缓冲区，供实时日志接口推送
+    log_stream_buffer.start()
+    logger.add(
+        log_stream_buffer.write,
+        level="DEBUG" if settings.DEBUG else "INFO",
+        filter=lambda record: not is_access_record(record),
+        enqueue=False,
     )
 
     # 日志文件路径
@@ -100,7 +126,13 @@ def setup_logging() -> None:
     logging.basicConfig(handlers=[InterceptHandler()], level=0, force=True)
 
     # 重定向Uvicorn的日志到Loguru
-    for logger_name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+    for logger_name in ("uvicorn", "uvicorn.error"):
         uvicorn_logger = logging.getLogger(logger_name)
         uvicorn_logger.handlers = [InterceptHandler()]
         uvicorn_logger.propagate = False
+
+    # 访问日志由 AccessLogMiddleware 输出，关闭 uvicorn 自带的访问日志
+    access_logger = logging.getLogger("uvicorn.access")
+    access_logger.handlers = []
+    access_logger.propagate = False
+    access_logger.disabled = True
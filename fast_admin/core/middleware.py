@@ -1,42 +1,166 @@
 import time
 
-from fastapi import Request, Response, status
+from fastapi import Request, status
 from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from fast_admin.core.access_log import log_access
+from fast_admin.core.authorization import is_whitelisted
 from fast_admin.core.config import settings
-from fast_admin.core.security import get_current_user
+from fast_admin.core.exceptions import CustomException
+from fast_admin.core.logger import access_log_aggregator
+from fast_admin.core.security import CurrentUser, authenticate_token
 
+"""
+中间件模块。
 
-# 自定义中间件，用于记录请求处理时间
-async def process_time_middleware(request: Request, call_next):
-    # Request处理
-    start_time = time.time()
-    response: Response = await call_next(request)
-    # Response处理
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+此模块中的中间件均为纯 ASGI 中间件，直接包装下游应用的 receive 与 send，
+不经过 BaseHTTPMiddleware，因此不会为每个请求创建额外的任务和响应流副本，流式响应与后台任务不受影响。
 
+"""
 
-async def auth_middleware(request: Request, call_next):
+
+class ProcessTimeMiddleware:
+    """
+    请求处理时间中间件.
+
+    在响应头 X-Process-Time 中返回从收到请求到开始发送响应的时间（秒）。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter_ns()
+
+        async def send_with_process_time(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                process_time = (time.perf_counter_ns() - start_time) / 1_000_000_000
+                MutableHeaders(scope=message).append("X-Process-Time", str(process_time))
+            await send(message)
+
+        await self.app(scope, receive, send_with_process_time)
+
+
+class AuthMiddleware:
     """
     身份验证中间件.
 
-    此中间件用于验证请求中的 JWT 令牌，并获取当前用户信息。
+    此中间件用于验证请求中的 JWT 令牌，并将当前用户的惰性代理保存到 request.state.user，
+    用户信息在首次使用时才从数据库加载。
+    若请求的路由在路由授权表中声明了权限，则在此完成鉴权。
     """
-    if request.url.path not in settings.AUTH_WHITELIST:
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response = await self.authorize(Request(scope))
+        if response is not None:
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def authorize(request: Request):
+        """
+        验证请求.
+
+        Args:
+            request: FastAPI 的 Request 对象.
+
+        Returns:
+            验证失败时返回错误响应，否则返回 None.
+        """
+        if is_whitelisted(request):
+            return None
+
         authorization = request.headers.get("Authorization")
         if authorization and authorization.startswith("Bearer "):
             token = authorization.split(" ")[1]
-            # 获取当前用户
-            request.state.user = await get_current_user(token)
+            try:
+                token_data = authenticate_token(token)
+            except CustomException as exc:
+                return ORJSONResponse(
+                    status_code=exc.status_code,
+                    content={"message": exc.msg}
+                )
+            request.state.user = CurrentUser(token_data)
         else:
             return ORJSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"message": "未提供有效的身份验证令牌"}
             )
-    return await call_next(request)
+
+        route_policies = getattr(request.app.state, "route_policies", None)
+        permission = route_policies.match(request.method, request.url.path) if route_policies else None
+        if permission is not None:
+            try:
+                allowed = await request.state.user.allows(permission)
+            except CustomException as exc:
+                return ORJSONResponse(
+                    status_code=exc.status_code,
+                    content={"message": exc.msg}
+                )
+            if not allowed:
+                return ORJSONResponse(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    content={"message": "无权访问该资源"}
+                )
+            request.state.authorized = True
+        return None
+
+
+class AccessLogMiddleware:
+    """
+    访问日志中间件.
+
+    此中间件应位于中间件列表的最后 (最外层)，使认证失败等由内层中间件直接返回的响应也被记录。
+    路由模板与当前用户在内层处理完成后从请求中读取，不查询数据库。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter_ns()
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request = Request(scope)
+            user = getattr(request.state, "user", None)
+            log_access(
+                method=request.method,
+                path=request.url.path,
+                route=getattr(scope.get("route"), "path", None),
+                status_code=status_code,
+                duration_ms=(time.perf_counter_ns() - start_time) / 1_000_000,
+                user_id=user.user_id if user is not None else None,
+                sample_rate=settings.ACCESS_LOG_SAMPLE_RATE,
+                aggregator=access_log_aggregator,
+            )
 
 
 # 使用FastAPI自带的CORSMiddleware跨域中间件
@@ -1,36 +1,260 @@
-from typing import TypeVar, Generic
+import asyncio
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, AsyncIterator, TypeVar, Generic, Optional
+
+import orjson
 from pydantic import BaseModel
-from fastapi import Query
+from fastapi import Query, status
+from tortoise.expressions import Q
 from tortoise.queryset import QuerySet
 
+from fast_admin.core.cache import TTLCache
+from fast_admin.core.config import settings
+from fast_admin.core.exceptions import CustomException
+
 ModelType = TypeVar("ModelType")
 
+# 总数的计算方式：exact 精确计数，estimated 使用查询计划的估算行数，none 不计算总数
+COUNT_MODES = ("exact", "estimated", "none")
+
+# 估算总数缓存，以查询语句为键，相同筛选条件的查询在有效期内复用估算的总数；精确计数不缓存
+count_cache = TTLCache(maxsize=settings.COUNT_CACHE_MAXSIZE, ttl=settings.COUNT_CACHE_TTL)
+
 
 class Pagination(BaseModel, Generic[ModelType]):
     """分页结果模型"""
     items: list[ModelType]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
 
 
+class CursorPagination(BaseModel, Generic[ModelType]):
+    """游标分页结果模型"""
+    items: list[ModelType]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    page_size: int
+
+
+async def estimate_count(query: QuerySet[ModelType]) -> int:
+    """
+    使用查询计划的估算行数作为总数
+
+    估算行数来自表的统计信息 (pg_class.reltuples) 与筛选条件的选择率，只执行 EXPLAIN 而不扫描数据
+
+    Args:
+        query: Tortoise-ORM 查询集
+
+    Returns:
+        估算的总数
+    """
+    _, rows = await query.model._meta.db.execute_query(f"EXPLAIN (FORMAT JSON) {query.sql()}")
+    plan = rows[0]["QUERY PLAN"]
+    if isinstance(plan, str):
+        plan = orjson.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count(query: QuerySet[ModelType], count_mode: str = "exact") -> Optional[int]:
+    """
+    按计数方式计算查询结果的总数
+
+    精确计数每次都查询数据库，保证新增或删除的数据立即反映在总数中；
+    估算的总数本身就不精确，相同筛选条件的结果在 COUNT_CACHE_TTL 秒内复用
+
+    Args:
+        query: Tortoise-ORM 查询集
+        count_mode: 计数方式，exact、estimated 或 none
+
+    Returns:
+        总数，计数方式为 none 时返回 None
+    """
+    if count_mode == "none":
+        return None
+    if count_mode == "exact":
+        return await query.count()
+
+    key = query.sql()
+    total = count_cache.get(key)
+    if total is None:
+        total = await estimate_count(query)
+        count_cache.set(key, total)
+    return total
+
+
 async def paginate(
         query: QuerySet[ModelType],
         page: int = Query(1, ge=1, description="页码"),
         page_size: int = Query(10, ge=1, le=100, description="每页数量"),
+        count_mode: str = "exact",
 ) -> Pagination[ModelType]:
     """
     对查询结果进行分页
 
+    总数与当前页的数据并发查询，两个查询分别使用连接池中的连接
+
     Args:
         query: Tortoise-ORM 查询集
         page: 页码
         page_size: 每页数量
+        count_mode: 总数的计算方式，exact、estimated 或 none
 
     Returns:
         Pagination 对象，包含分页后的结果
     """
-    total: int = await query.count()
-    items: list = await query.offset((page - 1) * page_size).limit(page_size)
+    if count_mode not in COUNT_MODES:
+        raise CustomException(
+            msg=f"不支持的计数方式: {count_mode}",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+
+    total, items = await asyncio.gather(
+        count(query, count_mode),
+        query.offset((page - 1) * page_size).limit(page_size),
+    )
 
     return Pagination(items=items, total=total, page=page, page_size=page_size)
+
+
+def encode_cursor(value: datetime, pk: int, direction: str) -> str:
+    """
+    编码游标
+
+    Args:
+        value: 排序字段的值
+        pk: 主键
+        direction: 翻页方向，"next" 或 "prev"
+
+    Returns:
+        不透明的游标字符串
+    """
+    payload = orjson.dumps({"v": value.isoformat(), "k": pk, "d": direction})
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int, str]:
+    """
+    解码游标
+
+    Args:
+        cursor: 游标字符串
+
+    Returns:
+        (排序字段的值, 主键, 翻页方向)
+
+    Raises:
+        CustomException: 如果游标无效
+    """
+    try:
+        payload = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        direction = payload["d"]
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return datetime.fromisoformat(payload["v"]), int(payload["k"]), direction
+    except (binascii.Error, orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+        raise CustomException(
+            msg="无效的游标",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+
+
+def _keyset_filter(query: QuerySet[ModelType], field: str, value: Any, pk: int, op: str) -> QuerySet[ModelType]:
+    """
+    筛选 (field, id) 小于 (op 为 lt) 或大于 (op 为 gt) 给定值的数据
+
+    field 上的范围条件使 (field, id) 的复合索引可以直接定位到起始位置
+    """
+    return query.filter(
+        Q(**{f"{field}__{op}e": value}),
+        Q(**{f"{field}__{op}": value}) | Q(**{f"id__{op}": pk}),
+    )
+
+
+async def cursor_paginate(
+        query: QuerySet[ModelType],
+        cursor: Optional[str] = None,
+        page_size: int = 10,
+        field: str = "timestamp",
+        descending: bool = True,
+) -> CursorPagination[ModelType]:
+    """
+    按 (field, id) 进行键集分页
+
+    翻页条件直接作用于排序字段与主键，配合 (field, id) 的复合索引，任意深度的翻页都只读取一页的数据，
+    且翻页过程中插入新数据不会导致结果重复或遗漏
+
+    Args:
+        query: Tortoise-ORM 查询集
+        cursor: 游标，为空时返回第一页
+        page_size: 每页数量
+        field: 排序字段
+        descending: 是否倒序排列
+
+    Returns:
+        CursorPagination 对象，包含分页后的结果与前后页游标
+    """
+    direction = "next"
+    if cursor:
+        value, pk, direction = decode_cursor(cursor)
+        # 向后翻页取排序在游标之后的数据，向前翻页取排序在游标之前的数据
+        after = (direction == "next") == descending
+        query = _keyset_filter(query, field, value, pk, "lt" if after else "gt")
+
+    # 向前翻页时反向排序取数据，再恢复为原有顺序
+    reverse = direction == "prev"
+    prefix = "-" if descending != reverse else ""
+    rows: list = await query.order_by(f"{prefix}{field}", f"{prefix}id").limit(page_size + 1)
+
+    has_more = len(rows) > page_size
+    items = rows[:page_size]
+    if reverse:
+        items.reverse()
+
+    # 沿翻页方向是否还有数据由多取的一行判断，反方向在传入游标时总是有数据
+    has_next = has_more if direction == "next" else True
+    has_prev = has_more if direction == "prev" else bool(cursor)
+
+    next_cursor = prev_cursor = None
+    if items:
+        first, last = items[0], items[-1]
+        if has_next:
+            next_cursor = encode_cursor(getattr(last, field), last.id, "next")
+        if has_prev:
+            prev_cursor = encode_cursor(getattr(first, field), first.id, "prev")
+
+    return CursorPagination(items=items, next_cursor=next_cursor, prev_cursor=prev_cursor, page_size=page_size)
+
+
+async def keyset_batches(
+        query: QuerySet[ModelType],
+        fields: list[str],
+        batch_size: int = 1000,
+        field: str = "timestamp",
+) -> AsyncIterator[list[dict]]:
+    """
+    按 (field, id) 升序分批读取查询结果
+
+    每批都从上一批的最后一行之后开始读取，内存中只保留一批数据
+
+    Args:
+        query: Tortoise-ORM 查询集
+        fields: 读取的字段，必须包含 field 和 id
+        batch_size: 每批的行数
+        field: 排序字段
+
+    Yields:
+        以字段名为键的字典列表
+    """
+    batch_query = query
+    while True:
+        rows = await batch_query.order_by(field, "id").limit(batch_size).values(*fields)
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        last = rows[-1]
+        batch_query = _keyset_filter(query, field, last[field], last["id"], "gt")
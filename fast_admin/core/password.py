@@ -0,0 +1,140 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from passlib.context import CryptContext
+
+from fast_admin.core.config import settings
+
+"""
+密码模块。
+
+bcrypt 的哈希与校验每次耗时数百毫秒，直接在 async 函数中调用会阻塞事件循环。
+此模块包含：
+
+- 定义 pwd_context，项目统一使用的密码哈希上下文。
+- 定义 PasswordService 类，在线程池或进程池中执行哈希与校验，并限制并发数、统计排队耗时。
+
+"""
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _hash(password: str) -> tuple[str, float]:
+    """在执行器中计算密码哈希，同时返回开始执行的时间"""
+    started_at = time.monotonic()
+    return pwd_context.hash(password), started_at
+
+
+def _verify(password: str, password_hash: str) -> tuple[bool, float]:
+    """在执行器中校验密码，同时返回开始执行的时间"""
+    started_at = time.monotonic()
+    return pwd_context.verify(password, password_hash), started_at
+
+
+class PasswordService:
+    """
+    异步密码服务。
+
+    哈希与校验在线程池或进程池中执行，同时执行的任务数不超过 max_concurrency，
+    超出的请求在事件循环中排队等待，因此登录高峰只会增加登录接口本身的延迟。
+
+    Attributes:
+        executor_type: 执行器类型，"thread" 或 "process".
+        max_workers: 执行器的最大工作线程或进程数.
+        max_concurrency: 同时执行的最大任务数.
+    """
+
+    def __init__(self, executor_type: str = "thread", max_workers: int = 4, max_concurrency: int = 8):
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"不支持的执行器类型: {executor_type}")
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._calls = 0
+        self._waiting = 0
+        self._queue_time_total = 0.0
+        self._queue_time_max = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password")
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        queued_at = time.monotonic()
+        self._waiting += 1
+        try:
+            async with self._semaphore:
+                result, started_at = await asyncio.get_running_loop().run_in_executor(
+                    self._get_executor(), func, *args
+                )
+        finally:
+            self._waiting -= 1
+
+        queue_time = started_at - queued_at
+        self._calls += 1
+        self._queue_time_total += queue_time
+        self._queue_time_max = max(self._queue_time_max, queue_time)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """
+        计算密码哈希.
+
+        Args:
+            password: 明文密码.
+
+        Returns:
+            密码哈希值.
+        """
+        return await self._run(_hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        """
+        校验密码.
+
+        Args:
+            password: 明文密码.
+            password_hash: 密码哈希值.
+
+        Returns:
+            如果密码正确，则返回 True，否则返回 False.
+        """
+        return await self._run(_verify, password, password_hash)
+
+    def metrics(self) -> dict:
+        """
+        获取运行指标.
+
+        Returns:
+            包含完成次数、当前排队数以及平均、最大排队耗时（秒）的字典.
+        """
+        return {
+            "calls": self._calls,
+            "waiting": self._waiting,
+            "queue_time_avg": self._queue_time_total / self._calls if self._calls else 0.0,
+            "queue_time_max": self._queue_time_max,
+        }
+
+    def shutdown(self) -> None:
+        """关闭执行器"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_service = PasswordService(
+    executor_type=settings.PASSWORD_EXECUTOR,
+    max_workers=settings.PASSWORD_MAX_WORKERS,
+    max_concurrency=settings.PASSWORD_MAX_CONCURRENCY,
+)
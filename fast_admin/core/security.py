@@ -1,26 +1,88 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Optional, Union
 from zoneinfo import ZoneInfo
 
 from fastapi import status
 from jwt import encode, decode, PyJWTError
 from pydantic import ValidationError
 
+from fast_admin.core.cache import TTLCache
 from fast_admin.core.config import settings
-from fast_admin.models.user import User, get_user_by_username
+from fast_admin.models.user import User, get_user_by_username, permission_versions
 from fast_admin.core.exceptions import CustomException
+from fast_admin.models.permission import PermissionRef, permission_registry
 from fast_admin.schemas.token import TokenPayload
 
 time_zone = ZoneInfo(settings.TIMEZONE)
 
+# 已验证令牌缓存: 令牌摘要 -> TokenPayload，无效令牌缓存为 _INVALID_TOKEN
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAXSIZE, ttl=settings.TOKEN_CACHE_NEGATIVE_TTL)
+_INVALID_TOKEN = object()
 
-def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
+
+class TokenUser:
+    """
+    由无状态访问令牌还原的当前用户.
+
+    只包含令牌中携带的身份与权限信息，提供与 User 相同的权限校验接口.
+
+    Attributes:
+        id: 用户 ID.
+        username: 用户名.
+        is_superuser: 是否是超级管理员.
+        mask: 权限掩码.
+    """
+
+    def __init__(self, id: int, username: str, is_superuser: bool, mask: int):
+        self.id = id
+        self.username = username
+        self.is_superuser = is_superuser
+        self.mask = mask
+
+    async def permission_mask(self) -> int:
+        """获取令牌中携带的权限掩码"""
+        return self.mask
+
+    async def has_permission(self, permission_code: str, permission_type: str = "operation") -> bool:
+        """检查用户是否拥有指定权限"""
+        if self.is_superuser:
+            return True
+        return bool(permission_registry.ref(permission_code, permission_type).mask & self.mask)
+
+
+async def create_permission_claims(user: User) -> dict:
+    """
+    创建无状态认证所需的令牌声明.
+
+    Args:
+        user: 用户.
+
+    Returns:
+        包含用户 ID、超级管理员标识、权限掩码、掩码的位索引布局和权限版本的声明.
+    """
+    return {
+        "uid": user.id,
+        "su": user.is_superuser,
+        "pm": format(await user.permission_mask(), "x"),
+        "pl": permission_registry.layout,
+        "pv": await permission_versions.ensure(user.id),
+    }
+
+
+def create_access_token(
+        subject: Union[str, Any],
+        expires_delta: timedelta = None,
+        claims: Optional[dict] = None,
+) -> str:
     """
     创建访问令牌.
 
     Args:
         subject: 令牌主题，通常是用户名.
         expires_delta: 令牌过期时间，如果为 None，则使用默认过期时间.
+        claims: 额外的令牌声明，例如无状态认证的权限声明.
 
     Returns:
         访问令牌.
@@ -31,7 +93,7 @@ def create_access_token(subject: Union[str, Any], expires_delta: timedelta = Non
         expire = datetime.now(time_zone) + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject), "type": "access"}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject), "type": "access"}
     encoded_jwt = encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -58,33 +120,181 @@ def create_refresh_token(subject: Union[str, Any], expires_delta: timedelta = No
     return encoded_jwt
 
 
-async def get_current_user(token: str) -> User:
+def decode_token(token: str) -> TokenPayload:
     """
-    获取当前用户.
+    验证并解析令牌，优先从缓存读取.
+
+    有效令牌缓存至其过期时间，无效令牌缓存 TOKEN_CACHE_NEGATIVE_TTL 秒，
+    重复的令牌无需再次进行签名验证和模型校验.
 
     Args:
-        token: 访问令牌.
+        token: 令牌.
 
     Returns:
-        当前用户信息.
+        令牌负载.
 
     Raises:
-        CustomException: 如果令牌无效、用户不存在或令牌类型错误.
+        CustomException: 如果令牌无效.
     """
-    try:
-        payload = decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
-        if token_data.type != "access":
-            raise CustomException(
-                msg="令牌类型错误",
-                status_code=status.HTTP_401_UNAUTHORIZED,
+    key = hashlib.sha256(token.encode()).digest()
+    token_data = token_cache.get(key)
+    if token_data is None:
+        try:
+            payload = decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
             )
-    except (PyJWTError, ValidationError):
+            token_data = TokenPayload(**payload)
+        except (PyJWTError, ValidationError):
+            token_data = _INVALID_TOKEN
+            token_cache.set(key, token_data)
+        else:
+            token_cache.set(key, token_data, ttl=token_data.exp.timestamp() - time.time())
+
+    if token_data is _INVALID_TOKEN:
         raise CustomException(
             msg="令牌无效",
             status_code=status.HTTP_401_UNAUTHORIZED,
         )
-    user = await get_user_by_username(username=token_data.sub)
-    return user
+    return token_data
+
+
+def authenticate_token(token: str) -> TokenPayload:
+    """
+    验证访问令牌.
+
+    Args:
+        token: 访问令牌.
+
+    Returns:
+        令牌负载.
+
+    Raises:
+        CustomException: 如果令牌无效或令牌类型错误.
+    """
+    token_data = decode_token(token)
+    if token_data.type != "access":
+        raise CustomException(
+            msg="令牌类型错误",
+            status_code=status.HTTP_401_UNAUTHORIZED,
+        )
+    return token_data
+
+
+async def load_user(token_data: TokenPayload) -> Union[User, TokenUser]:
+    """
+    根据访问令牌负载加载用户身份信息.
+
+    启用无状态认证且令牌携带权限声明时，只校验权限版本，直接由令牌还原用户；
+    令牌未携带权限版本、权限版本不可用 (未绑定 Redis、Redis 不可用或计数已被淘汰)，
+    或签发令牌后权限的位索引布局已变化时，不信任令牌中的权限声明，回退到查询数据库.
+
+    Args:
+        token_data: 访问令牌负载.
+
+    Returns:
+        用户身份信息，不包含预加载的角色.
+
+    Raises:
+        CustomException: 如果令牌已失效或用户不存在.
+    """
+    if (
+            settings.AUTH_STATELESS
+            and token_data.uid is not None
+            and token_data.pv is not None
+            and token_data.pl == permission_registry.layout
+    ):
+        version = await permission_versions.get(token_data.uid)
+        if version is not None:
+            if version != token_data.pv:
+                raise CustomException(
+                    msg="令牌已失效，请重新登录",
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                )
+            return TokenUser(
+                id=token_data.uid,
+                username=token_data.sub,
+                is_superuser=bool(token_data.su),
+                mask=int(token_data.pm or "0", 16),
+            )
+
+    return await get_user_by_username(username=token_data.sub)
+
+
+class CurrentUser:
+    """
+    当前用户的惰性代理.
+
+    认证中间件只验证令牌，不查询数据库；用户在首次调用加载函数时才加载，加载结果在请求内复用:
+
+    - get_identity: 身份信息，即不含角色的用户行 (无状态认证时直接由令牌还原).
+    - permission_mask: 身份信息 + 权限掩码.
+
+    属性访问无法等待数据库查询，因此路由应通过 get_current_user_from_request 依赖获取已加载的身份信息，
+    而不是直接访问代理的属性；代理只在身份信息加载后转发属性访问.
+
+    Attributes:
+        token_data: 访问令牌负载.
+    """
+
+    def __init__(self, token_data: TokenPayload):
+        self.token_data = token_data
+        self._identity: Optional[Union[User, TokenUser]] = None
+        self._mask: Optional[int] = None
+
+    @property
+    def username(self) -> str:
+        """用户名，直接取自令牌"""
+        return self.token_data.sub
+
+    @property
+    def user_id(self) -> Optional[int]:
+        """用户 ID，优先取自已加载的身份信息，否则取自令牌 (仅无状态认证)；两者都没有时为空"""
+        identity = self.__dict__.get("_identity")
+        return identity.id if identity is not None else self.token_data.uid
+
+    async def get_identity(self) -> Union[User, TokenUser]:
+        """加载用户身份信息"""
+        if self._identity is None:
+            self._identity = await load_user(self.token_data)
+        return self._identity
+
+    async def permission_mask(self) -> int:
+        """加载用户的权限掩码"""
+        if self._mask is None:
+            self._mask = await (await self.get_identity()).permission_mask()
+        return self._mask
+
+    async def has_permission(self, permission_code: str, permission_type: str = "operation") -> bool:
+        """检查用户是否拥有指定权限或是否是超级管理员"""
+        return await self.allows(permission_registry.ref(permission_code, permission_type))
+
+    async def allows(self, permission: PermissionRef) -> bool:
+        """检查用户是否拥有权限引用对应的权限或是否是超级管理员"""
+        identity = await self.get_identity()
+        if identity.is_superuser:
+            return True
+        return bool(permission.mask & await self.permission_mask())
+
+    def __getattr__(self, name: str) -> Any:
+        identity = self.__dict__.get("_identity")
+        if identity is None:
+            raise AttributeError(
+                f"当前用户尚未加载，无法访问属性 {name}，请使用 get_current_user_from_request 依赖或先调用 get_identity"
+            )
+        return getattr(identity, name)
+
+
+async def get_current_user(token: str) -> Union[User, TokenUser]:
+    """
+    获取当前用户.
+
+    Args:
+        token: 访问令牌.
+
+    Returns:
+        当前用户信息.
+
+    Raises:
+        CustomException: 如果令牌无效、用户不存在或令牌类型错误.
+    """
+    return await load_user(authenticate_token(token))
@@ -1,11 +1,22 @@
+import asyncio
+from contextlib import suppress
+
 from fastapi import FastAPI
 from tortoise.contrib.fastapi import register_tortoise
 from contextlib import asynccontextmanager
 from aerich import Command
+from redis.asyncio import Redis
 
+from fast_admin.core.cache import bind_redis, unbind_redis
 from fast_admin.core.config import settings, TORTOISE_ORM
-from fast_admin.core.logger import setup_logging
+from fast_admin.core.password import password_service
+from fast_admin.core.logger import setup_logging, db_log_sink, access_log_aggregator
+from fast_admin.core.access_log import run_access_log_summary
+from fast_admin.core.log_partition import run_log_partition_maintenance
+from fast_admin.core.log_archive import log_archive, run_log_archive
 from fast_admin.core import middleware, exceptions
+from fast_admin.core.authorization import auth_whitelist, compile_route_policies
+from fast_admin.models.permission import permission_registry
 from fast_admin.api import router
 
 """
@@ -23,7 +34,7 @@ async def lifespan(app: FastAPI):
     """
     FastAPI 应用程序的 Lifespan 上下文管理器。
 
-    此函数在应用程序启动和关闭时执行，用于管理数据库迁移和 Tortoise-ORM 注册。
+    此函数在应用程序启动和关闭时执行，用于管理数据库迁移、Tortoise-ORM 注册和 Redis 客户端。
 
     Args:
         app: FastAPI 应用程序实例。
@@ -46,19 +57,62 @@ async def lifespan(app: FastAPI):
     # await command.migrate()
     await command.upgrade(run_in_transaction=True)
 
-    # 注册 Redis 客户端到 FastAPI 应用程序状态
-    # app.state.redis = Redis(
-    #     host=settings.REDIS_HOST,
-    #     port=settings.REDIS_PORT,
-    #     db=settings.REDIS_DB,
-    #     decode_responses=True
-    # )
+    # 加载权限注册表
+    await permission_registry.load()
+
+    # 编译路由授权表，存在未声明权限的修改类路由时启动失败
+    app.state.route_policies = compile_route_policies(app, auth_whitelist)
+
+    # 注册 Redis 客户端到 FastAPI 应用程序状态，并作为用户与权限的共享缓存
+    if settings.REDIS_HOST:
+        app.state.redis = Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            decode_responses=True
+        )
+        bind_redis(app.state.redis)
 
     # 设置应用程序日志
     setup_logging()
 
+    # 启动日志分区维护任务，logs 不是分区表时任务不做处理
+    partition_task = asyncio.create_task(run_log_partition_maintenance(
+        interval=settings.LOG_PARTITION_INTERVAL,
+        ahead=settings.LOG_PARTITION_AHEAD,
+        retention_days=settings.LOG_RETENTION_DAYS,
+        period=settings.LOG_PARTITION_MAINTENANCE_INTERVAL,
+    ))
+
+    # 启动日志归档任务
+    archive_task = asyncio.create_task(run_log_archive(
+        log_archive,
+        older_than_days=settings.LOG_ARCHIVE_DAYS,
+        segment_rows=settings.LOG_ARCHIVE_SEGMENT_ROWS,
+        block_rows=settings.LOG_ARCHIVE_BLOCK_ROWS,
+        period=settings.LOG_ARCHIVE_INTERVAL,
+    )) if settings.LOG_ARCHIVE_DAYS > 0 else None
+
+    # 启动访问日志汇总任务
+    summary_task = asyncio.create_task(run_access_log_summary(access_log_aggregator)) if access_log_aggregator else None
+
     yield
 
+    partition_task.cancel()
+    if archive_task:
+        archive_task.cancel()
+    if summary_task:
+        # 等待任务写入剩余的汇总
+        summary_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await summary_task
+    await db_log_sink.stop()
+    password_service.shutdown()
+
+    if settings.REDIS_HOST:
+        await unbind_redis()
+        await app.state.redis.aclose()
+
 
 app = FastAPI(
     title=settings.APP_TITLE,
@@ -72,9 +126,9 @@ for middleware_name in settings.MIDDLEWARE:
     if middleware_name == "cors_middleware":
         middleware.cors_middleware(app, settings)
     else:
-        # 获取并注册中间件
-        middleware_function = getattr(middleware, middleware_name)
-        app.middleware("http")(middleware_function)
+        # 获取并注册中间件，后注册的中间件位于外层
+        middleware_class = getattr(middleware, middleware_name)
+        app.add_middleware(middleware_class)
 
 # 注册异常处理器
 exceptions.register_exception(app)
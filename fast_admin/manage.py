@@ -0,0 +1,330 @@
+import argparse
+import asyncio
+import getpass
+import random
+import time
+from datetime import datetime, timezone
+
+from fastapi import FastAPI
+from loguru import logger
+from starlette.middleware.base import BaseHTTPMiddleware
+from tortoise import Tortoise, run_async
+
+from fast_admin.core import middleware
+from fast_admin.core.config import settings, TORTOISE_ORM
+from fast_admin.core.database import advisory_lock
+from fast_admin.core.log_archive import ARCHIVE_LOCK, log_archive, archive_logs as archive_old_logs
+from fast_admin.core.log_search import search_logs
+from fast_admin.core.log_partition import (
+    PARTITION_LOCK, partition_logs_table, create_log_partitions, drop_log_partitions
+)
+from fast_admin.core.log_sink import copy_rows
+from fast_admin.core.password import password_service
+from fast_admin.core.security import create_access_token
+from fast_admin.models.effective_permission import rebuild_effective_permissions
+from fast_admin.models.log_rollup import rebuild_rollup
+from fast_admin.models.logs import Log
+from fast_admin.models.user import User
+
+"""
+管理命令模块。
+
+此模块提供需要在应用程序之外执行的维护命令，用法：
+
+    pdm run manage <命令> [参数]
+
+"""
+
+
+async def create_superuser(args: argparse.Namespace) -> None:
+    """创建超级管理员，用于创建第一个管理员账号"""
+    if await User.exists(username=args.username):
+        raise SystemExit(f"用户 {args.username} 已存在")
+    password = args.password or getpass.getpass("密码: ")
+    try:
+        password_hash = await password_service.hash(password)
+    finally:
+        password_service.shutdown()
+    await User.create(username=args.username, password_hash=password_hash, is_superuser=True)
+    print(f"已创建超级管理员 {args.username}")
+
+
+async def rebuild_permissions(args: argparse.Namespace) -> None:
+    """重建用户有效权限表"""
+    await rebuild_effective_permissions(*args.user_ids)
+
+
+async def rebuild_log_rollup(args: argparse.Namespace) -> None:
+    """从日志表重建日志汇总"""
+    await rebuild_rollup(args.start, args.end)
+
+
+async def partition_logs(args: argparse.Namespace) -> None:
+    """将 logs 表转换为按时间范围分区的表"""
+    async with advisory_lock(PARTITION_LOCK) as acquired:
+        if not acquired:
+            print("其他进程正在维护日志分区，请稍后重试")
+            return
+        await partition_logs_table(args.interval, args.ahead)
+
+
+async def maintain_log_partitions(args: argparse.Namespace) -> None:
+    """提前创建日志分区，并删除超过保留期的分区"""
+    async with advisory_lock(PARTITION_LOCK) as acquired:
+        if not acquired:
+            print("其他进程正在维护日志分区，请稍后重试")
+            return
+        created = await create_log_partitions(args.interval, args.ahead)
+        dropped = await drop_log_partitions(args.interval, args.retention_days)
+    print(f"已有分区: {', '.join(created)}")
+    print(f"已删除分区: {', '.join(dropped) or '无'}")
+
+
+async def archive_logs(args: argparse.Namespace) -> None:
+    """将旧日志从 logs 表移动到归档段文件"""
+    async with advisory_lock(ARCHIVE_LOCK) as acquired:
+        if not acquired:
+            print("其他进程正在归档日志，请稍后重试")
+            return
+        archived = await archive_old_logs(log_archive, args.days, args.segment_rows, args.block_rows)
+    print(f"已归档 {archived} 条日志到 {log_archive.directory}")
+
+
+# 压测写入的日志使用的记录器名称，压测结束后据此删除
+BENCHMARK_LOGGER_NAME = "fast_admin.benchmark"
+
+
+async def benchmark_log_sink(args: argparse.Namespace) -> None:
+    """比较逐行插入、批量插入和 COPY 三种方式写入日志的吞吐量"""
+    rows = [
+        {
+            "level": "INFO",
+            "message": f"benchmark message {index}",
+            "timestamp": datetime.now(timezone.utc),
+            "process": "0",
+            "thread": "0",
+            "logger_name": BENCHMARK_LOGGER_NAME,
+            "module": "manage",
+            "line_no": index,
+            "function_name": "benchmark_log_sink",
+            "exception": None,
+            "repeat_count": 1,
+            "last_timestamp": None,
+        }
+        for index in range(args.rows)
+    ]
+
+    async def create() -> None:
+        for row in rows:
+            await Log.create(**row)
+
+    async def bulk_create() -> None:
+        for start in range(0, len(rows), args.batch_size):
+            await Log.bulk_create([Log(**row) for row in rows[start:start + args.batch_size]])
+
+    async def copy() -> None:
+        for start in range(0, len(rows), args.batch_size):
+            if not await copy_rows(rows[start:start + args.batch_size]):
+                raise RuntimeError("当前数据库不支持 COPY")
+
+    try:
+        for name, write in (("create", create), ("bulk_create", bulk_create), ("copy", copy)):
+            started_at = time.perf_counter()
+            try:
+                await write()
+            except RuntimeError as exc:
+                print(f"{name:<12} 跳过: {exc}")
+                continue
+            elapsed = time.perf_counter() - started_at
+            print(f"{name:<12} {args.rows} 行 {elapsed:8.3f} 秒 {args.rows / elapsed:12.0f} 行/秒")
+    finally:
+        await Log.filter(logger_name=BENCHMARK_LOGGER_NAME).delete()
+
+
+async def benchmark_middleware(args: argparse.Namespace) -> None:
+    """比较无中间件、ASGI 中间件与经过 BaseHTTPMiddleware 包装的中间件的每请求耗时"""
+    # 访问日志写入空处理器，只计算中间件本身的耗时
+    logger.remove()
+    logger.add(lambda message: None, level="INFO")
+
+    names = [name for name in settings.MIDDLEWARE if name != "cors_middleware"]
+
+    async def pass_through(request, call_next):
+        return await call_next(request)
+
+    def build(stack: str) -> FastAPI:
+        app = FastAPI()
+
+        @app.get("/benchmark")
+        async def endpoint():
+            return {"ok": True}
+
+        for name in names if stack != "none" else ():
+            app.add_middleware(getattr(middleware, name))
+            if stack == "base_http":
+                # 旧版本通过 app.middleware("http") 注册，每个中间件都经过一层 BaseHTTPMiddleware
+                app.add_middleware(BaseHTTPMiddleware, dispatch=pass_through)
+        return app
+
+    headers = [(b"authorization", f"Bearer {create_access_token('benchmark')}".encode())]
+
+    async def request(app: FastAPI) -> None:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/benchmark",
+            "raw_path": b"/benchmark",
+            "root_path": "",
+            "query_string": b"",
+            "headers": headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("127.0.0.1", 8000),
+        }
+        completed = asyncio.Event()
+        received = False
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await completed.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                completed.set()
+
+        await app(scope, receive, send)
+
+    baseline = None
+    for name, stack in (("无中间件", "none"), ("ASGI", "asgi"), ("BaseHTTP", "base_http")):
+        app = build(stack)
+        for _ in range(args.warmup):
+            await request(app)
+        started_at = time.perf_counter_ns()
+        for _ in range(args.requests):
+            await request(app)
+        per_request = (time.perf_counter_ns() - started_at) / args.requests / 1000
+        baseline = per_request if baseline is None else baseline
+        print(f"{name:<10} {per_request:10.1f} 微秒/请求 中间件开销 {per_request - baseline:10.1f} 微秒/请求")
+
+
+# 压测搜索时生成日志消息使用的词表
+BENCHMARK_WORDS = (
+    "user", "login", "failed", "timeout", "database", "connection", "refused", "permission", "denied",
+    "request", "completed", "cache", "miss", "token", "expired", "role", "updated", "retry", "queue", "full",
+)
+
+
+async def benchmark_log_search(args: argparse.Namespace) -> None:
+    """比较 icontains 子串过滤与索引搜索的查询耗时"""
+    try:
+        for start in range(0, args.seed, args.batch_size):
+            rows = [
+                {
+                    "level": random.choice(("INFO", "WARNING", "ERROR")),
+                    "message": " ".join(random.choices(BENCHMARK_WORDS, k=12)),
+                    "timestamp": datetime.now(timezone.utc),
+                    "process": "0",
+                    "thread": "0",
+                    "logger_name": BENCHMARK_LOGGER_NAME,
+                    "module": "manage",
+                    "line_no": start,
+                    "function_name": "benchmark_log_search",
+                    "exception": None,
+                    "repeat_count": 1,
+                    "last_timestamp": None,
+                }
+                for _ in range(min(args.batch_size, args.seed - start))
+            ]
+            if not await copy_rows(rows):
+                await Log.bulk_create([Log(**row) for row in rows])
+        if args.seed:
+            await Log._meta.db.execute_script(f'ANALYZE "{Log._meta.db_table}"')
+
+        cases = [("icontains", lambda: Log.filter(message__icontains=args.term).limit(args.page_size))]
+        for match in ("phrase", "prefix", "fuzzy"):
+            cases.append((match, lambda match=match: search_logs(args.term, match, page_size=args.page_size, count_mode="none")))
+
+        for name, run in cases:
+            started_at = time.perf_counter()
+            for _ in range(args.repeat):
+                await run()
+            elapsed = (time.perf_counter() - started_at) / args.repeat
+            print(f"{name:<10} {elapsed * 1000:10.2f} 毫秒/次")
+    finally:
+        if args.seed:
+            await Log.filter(logger_name=BENCHMARK_LOGGER_NAME).delete()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="manage", description="fast_admin 管理命令")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_create_superuser = subparsers.add_parser("create-superuser", help="创建超级管理员")
+    parser_create_superuser.add_argument("username", help="用户名")
+    parser_create_superuser.add_argument("--password", help="密码，缺省时交互输入")
+    parser_create_superuser.set_defaults(handler=create_superuser)
+
+    parser_rebuild_permissions = subparsers.add_parser("rebuild-permissions", help="重建用户有效权限表")
+    parser_rebuild_permissions.add_argument("user_ids", nargs="*", type=int, help="用户 ID，缺省时重建全部用户")
+    parser_rebuild_permissions.set_defaults(handler=rebuild_permissions)
+
+    parser_rebuild_log_rollup = subparsers.add_parser("rebuild-log-rollup", help="从日志表重建日志汇总")
+    parser_rebuild_log_rollup.add_argument("--start", type=datetime.fromisoformat, help="起始时间，ISO 格式，缺省时不限制")
+    parser_rebuild_log_rollup.add_argument("--end", type=datetime.fromisoformat, help="结束时间，ISO 格式，缺省时不限制")
+    parser_rebuild_log_rollup.set_defaults(handler=rebuild_log_rollup)
+
+    parser_partition_logs = subparsers.add_parser("partition-logs", help="将 logs 表转换为按时间范围分区的表")
+    parser_partition_logs.add_argument("--interval", choices=["day", "month"], default=settings.LOG_PARTITION_INTERVAL, help="分区间隔")
+    parser_partition_logs.add_argument("--ahead", type=int, default=settings.LOG_PARTITION_AHEAD, help="提前创建的分区数量")
+    parser_partition_logs.set_defaults(handler=partition_logs)
+
+    parser_maintain_log_partitions = subparsers.add_parser("maintain-log-partitions", help="提前创建日志分区并删除过期分区")
+    parser_maintain_log_partitions.add_argument("--interval", choices=["day", "month"], default=settings.LOG_PARTITION_INTERVAL, help="分区间隔")
+    parser_maintain_log_partitions.add_argument("--ahead", type=int, default=settings.LOG_PARTITION_AHEAD, help="提前创建的分区数量")
+    parser_maintain_log_partitions.add_argument("--retention-days", type=int, default=settings.LOG_RETENTION_DAYS, help="日志保留天数")
+    parser_maintain_log_partitions.set_defaults(handler=maintain_log_partitions)
+
+    parser_archive_logs = subparsers.add_parser("archive-logs", help="将旧日志从 logs 表移动到归档段文件")
+    parser_archive_logs.add_argument("--days", type=int, default=settings.LOG_ARCHIVE_DAYS or settings.LOG_RETENTION_DAYS, help="归档早于多少天前的日志")
+    parser_archive_logs.add_argument("--segment-rows", type=int, default=settings.LOG_ARCHIVE_SEGMENT_ROWS, help="每个段的最大行数")
+    parser_archive_logs.add_argument("--block-rows", type=int, default=settings.LOG_ARCHIVE_BLOCK_ROWS, help="每个压缩块的最大行数")
+    parser_archive_logs.set_defaults(handler=archive_logs)
+
+    parser_benchmark_log_sink = subparsers.add_parser("benchmark-log-sink", help="压测日志写入数据库的吞吐量")
+    parser_benchmark_log_sink.add_argument("--rows", type=int, default=10000, help="每种方式写入的行数")
+    parser_benchmark_log_sink.add_argument("--batch-size", type=int, default=500, help="批量写入的每批行数")
+    parser_benchmark_log_sink.set_defaults(handler=benchmark_log_sink)
+
+    parser_benchmark_log_search = subparsers.add_parser("benchmark-log-search", help="压测日志搜索的查询耗时")
+    parser_benchmark_log_search.add_argument("term", help="搜索词")
+    parser_benchmark_log_search.add_argument("--seed", type=int, default=0, help="压测前写入的日志行数，压测结束后删除")
+    parser_benchmark_log_search.add_argument("--batch-size", type=int, default=5000, help="写入日志的每批行数")
+    parser_benchmark_log_search.add_argument("--page-size", type=int, default=10, help="每次查询返回的行数")
+    parser_benchmark_log_search.add_argument("--repeat", type=int, default=10, help="每种方式的查询次数")
+    parser_benchmark_log_search.set_defaults(handler=benchmark_log_search)
+
+    parser_benchmark_middleware = subparsers.add_parser("benchmark-middleware", help="压测中间件的每请求耗时")
+    parser_benchmark_middleware.add_argument("--requests", type=int, default=10000, help="每种方式的请求数")
+    parser_benchmark_middleware.add_argument("--warmup", type=int, default=500, help="每种方式计时前的预热请求数")
+    parser_benchmark_middleware.set_defaults(handler=benchmark_middleware, database=False)
+
+    args = parser.parse_args()
+
+    async def run() -> None:
+        await Tortoise.init(config=TORTOISE_ORM)
+        await args.handler(args)
+
+    if getattr(args, "database", True):
+        run_async(run())
+    else:
+        asyncio.run(args.handler(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+from tortoise import fields, connections
+
+from fast_admin.models.base import BaseModel
+
+
+class AccessLogSummary(BaseModel):
+    """
+    访问日志汇总模型
+
+    按分钟、请求方法和路由汇总的访问次数与耗时，由访问日志汇总任务每分钟写入一次，代替逐请求写入日志表.
+
+    Attributes:
+        bucket_start: 分钟桶的起始时间.
+        method: 请求方法.
+        route: 路由路径模板.
+        count: 请求次数.
+        error_count: 状态码为 4xx 和 5xx 的请求次数.
+        total_ms: 总耗时（毫秒）.
+        max_ms: 最大耗时（毫秒）.
+    """
+    id = fields.IntField(pk=True, description="ID")
+    bucket_start = fields.DatetimeField(description="分钟桶的起始时间")
+    method = fields.CharField(max_length=10, description="请求方法")
+    route = fields.CharField(max_length=255, description="路由路径模板")
+    count = fields.IntField(default=0, description="请求次数")
+    error_count = fields.IntField(default=0, description="错误请求次数")
+    total_ms = fields.FloatField(default=0, description="总耗时（毫秒）")
+    max_ms = fields.FloatField(default=0, description="最大耗时（毫秒）")
+
+    class Meta:
+        table = "access_log_summary"
+        unique_together = (("bucket_start", "method", "route"),)
+
+
+_UPSERT_SQL = """
+    INSERT INTO "access_log_summary" ("bucket_start", "method", "route", "count", "error_count", "total_ms", "max_ms")
+    SELECT * FROM unnest(
+        $1::TIMESTAMPTZ[], $2::VARCHAR[], $3::VARCHAR[], $4::INT[], $5::INT[], $6::DOUBLE PRECISION[], $7::DOUBLE PRECISION[]
+    )
+    ON CONFLICT ("bucket_start", "method", "route")
+    DO UPDATE SET "count" = "access_log_summary"."count" + EXCLUDED."count",
+                  "error_count" = "access_log_summary"."error_count" + EXCLUDED."error_count",
+                  "total_ms" = "access_log_summary"."total_ms" + EXCLUDED."total_ms",
+                  "max_ms" = greatest("access_log_summary"."max_ms", EXCLUDED."max_ms"),
+                  "updated_at" = CURRENT_TIMESTAMP
+"""
+
+_COLUMNS = ("bucket_start", "method", "route", "count", "error_count", "total_ms", "max_ms")
+
+
+async def add_access_summary(rows: list[dict]) -> None:
+    """
+    将访问日志汇总行累加到访问日志汇总表.
+
+    Args:
+        rows: 以 AccessLogSummary 字段名为键的汇总行列表.
+    """
+    if not rows:
+        return
+    await connections.get("default").execute_query(
+        _UPSERT_SQL, [[row[column] for row in rows] for column in _COLUMNS]
+    )
@@ -0,0 +1,82 @@
+from tortoise import fields
+from tortoise.transactions import in_transaction
+
+from fast_admin.models.base import BaseModel
+
+
+class UserEffectivePermission(BaseModel):
+    """
+    用户有效权限模型
+
+    由 user_role、role_permission 和 permission 物化而来，在用户、角色或权限变更时增量维护，
+    查询用户的权限只需一次索引查询.
+
+    Attributes:
+        user: 用户.
+        permission: 权限.
+        code: 权限代码.
+        type: 权限类型.
+    """
+    id = fields.IntField(pk=True, description="ID")
+    user = fields.ForeignKeyField(
+        "fast_admin.User",
+        related_name="effective_permissions",
+        on_delete=fields.CASCADE,
+        description="用户"
+    )
+    permission = fields.ForeignKeyField(
+        "fast_admin.Permission",
+        related_name="effective_users",
+        on_delete=fields.CASCADE,
+        description="权限"
+    )
+    code = fields.CharField(max_length=255, description="权限代码")
+    type = fields.CharField(max_length=20, description="权限类型")
+
+    class Meta:
+        table = "user_effective_permission"
+        unique_together = (("user", "permission"),)
+        indexes = (("user", "code", "type"),)
+
+
+_REBUILD_SQL = """
+    INSERT INTO "user_effective_permission" ("user_id", "permission_id", "code", "type")
+    SELECT DISTINCT ur."user_id", p."id", p."code", p."type"
+    FROM "user_role" ur
+    JOIN "role_permission" rp ON rp."role_id" = ur."role_id"
+    JOIN "permission" p ON p."id" = rp."permission_id"
+    {where}
+    ON CONFLICT ("user_id", "permission_id") DO NOTHING
+"""
+
+
+async def rebuild_effective_permissions(*user_ids: int) -> None:
+    """
+    重建用户的有效权限.
+
+    Args:
+        user_ids: 用户 ID 列表，为空时重建全部用户.
+    """
+    async with in_transaction() as conn:
+        if user_ids:
+            await conn.execute_query(
+                'DELETE FROM "user_effective_permission" WHERE "user_id" = ANY($1::INT[])', [list(user_ids)]
+            )
+            await conn.execute_query(
+                _REBUILD_SQL.format(where='WHERE ur."user_id" = ANY($1::INT[])'), [list(user_ids)]
+            )
+        else:
+            await conn.execute_query('TRUNCATE "user_effective_permission"')
+            await conn.execute_query(_REBUILD_SQL.format(where=""))
+
+
+async def rename_effective_permission(permission_id: int, code: str, type: str) -> None:
+    """
+    同步权限代码与类型的变更.
+
+    Args:
+        permission_id: 权限 ID.
+        code: 权限代码.
+        type: 权限类型.
+    """
+    await UserEffectivePermission.filter(permission_id=permission_id).update(code=code, type=type)
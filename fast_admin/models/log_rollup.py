@@ -0,0 +1,140 @@
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from tortoise import fields, connections
+from tortoise.transactions import in_transaction
+
+from fast_admin.models.base import BaseModel
+
+
+class LogRollup(BaseModel):
+    """
+    日志汇总模型
+
+    按分钟、日志级别和记录器名称汇总的日志数量，由数据库日志处理器在每批日志写入后增量更新，
+    日志直方图只读取此表而不扫描日志表.
+
+    Attributes:
+        bucket_start: 分钟桶的起始时间.
+        level: 日志级别.
+        logger_name: 记录器名称.
+        count: 日志数量.
+    """
+    id = fields.IntField(pk=True, description="ID")
+    bucket_start = fields.DatetimeField(description="分钟桶的起始时间")
+    level = fields.CharField(max_length=20, description="日志级别")
+    logger_name = fields.CharField(max_length=255, default="", description="记录器名称")
+    count = fields.IntField(default=0, description="日志数量")
+
+    class Meta:
+        table = "log_rollup"
+        unique_together = (("bucket_start", "level", "logger_name"),)
+
+
+_UPSERT_SQL = """
+    INSERT INTO "log_rollup" ("bucket_start", "level", "logger_name", "count")
+    SELECT * FROM unnest($1::TIMESTAMPTZ[], $2::VARCHAR[], $3::VARCHAR[], $4::INT[])
+    ON CONFLICT ("bucket_start", "level", "logger_name")
+    DO UPDATE SET "count" = "log_rollup"."count" + EXCLUDED."count", "updated_at" = CURRENT_TIMESTAMP
+"""
+
+_REBUILD_SQL = """
+    INSERT INTO "log_rollup" ("bucket_start", "level", "logger_name", "count")
+    SELECT date_trunc('minute', "timestamp"), "level", coalesce("logger_name", ''), sum("repeat_count")
+    FROM "logs"
+    WHERE {where}
+    GROUP BY 1, 2, 3
+    ON CONFLICT ("bucket_start", "level", "logger_name")
+    DO UPDATE SET "count" = EXCLUDED."count", "updated_at" = CURRENT_TIMESTAMP
+"""
+
+
+async def add_to_rollup(rows: list[dict]) -> None:
+    """
+    将一批日志行累加到日志汇总.
+
+    Args:
+        rows: 以 Log 字段名为键的日志行列表.
+    """
+    counter = Counter()
+    for row in rows:
+        key = (row["timestamp"].replace(second=0, microsecond=0), row["level"], row["logger_name"] or "")
+        counter[key] += row.get("repeat_count", 1)
+    if not counter:
+        return
+    buckets, levels, logger_names = zip(*counter)
+    await connections.get("default").execute_query(
+        _UPSERT_SQL, [list(buckets), list(levels), list(logger_names), list(counter.values())]
+    )
+
+
+async def rebuild_rollup(start: Optional[datetime] = None, end: Optional[datetime] = None) -> None:
+    """
+    从日志表重建时间范围内的日志汇总，范围按分钟对齐.
+
+    Args:
+        start: 起始时间，为空时不限制.
+        end: 结束时间，为空时不限制.
+    """
+    values, log_conditions, rollup_conditions = [], [], []
+    if start:
+        values.append(start)
+        log_conditions.append(f"\"timestamp\" >= date_trunc('minute', ${len(values)}::TIMESTAMPTZ)")
+        rollup_conditions.append(f"\"bucket_start\" >= date_trunc('minute', ${len(values)}::TIMESTAMPTZ)")
+    if end:
+        values.append(end)
+        log_conditions.append(f"\"timestamp\" < date_trunc('minute', ${len(values)}::TIMESTAMPTZ) + INTERVAL '1 minute'")
+        rollup_conditions.append(f"\"bucket_start\" <= date_trunc('minute', ${len(values)}::TIMESTAMPTZ)")
+
+    async with in_transaction() as conn:
+        await conn.execute_query(
+            f'DELETE FROM "log_rollup" WHERE {" AND ".join(rollup_conditions) or "TRUE"}', values
+        )
+        await conn.execute_query(_REBUILD_SQL.format(where=" AND ".join(log_conditions) or "TRUE"), values)
+
+
+async def log_histogram(
+        bucket_seconds: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        level: Optional[str] = None,
+        logger_name: Optional[str] = None,
+) -> list[dict]:
+    """
+    从日志汇总中按桶宽度统计日志数量.
+
+    Args:
+        bucket_seconds: 桶宽度（秒），为 60 的整数倍.
+        start: 起始时间.
+        end: 结束时间.
+        level: 日志级别.
+        logger_name: 记录器名称.
+
+    Returns:
+        按桶起始时间排列的 {bucket_start, level, logger_name, count} 列表.
+    """
+    values: list = [bucket_seconds]
+    conditions = []
+    for condition, value in (
+            ('"bucket_start" >= {}', start),
+            ('"bucket_start" <= {}', end),
+            ('"level" = {}', level),
+            ('"logger_name" = {}', logger_name),
+    ):
+        if value is not None:
+            values.append(value)
+            conditions.append(condition.format(f"${len(values)}"))
+
+    _, rows = await connections.get("default").execute_query(
+        f"""
+        SELECT to_timestamp(floor(extract(EPOCH FROM "bucket_start") / $1::INT) * $1::INT) AS "bucket_start",
+               "level", "logger_name", sum("count")::INT AS "count"
+        FROM "log_rollup"
+        WHERE {" AND ".join(conditions) or "TRUE"}
+        GROUP BY 1, 2, 3
+        ORDER BY 1, 2, 3
+        """,
+        values,
+    )
+    return [dict(row) for row in rows]
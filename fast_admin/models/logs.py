@@ -1,4 +1,5 @@
 from tortoise import fields
+from tortoise.contrib.postgres.indexes import BrinIndex
 
 from fast_admin.models.base import BaseModel
 
@@ -17,7 +18,16 @@ class Log(BaseModel):
     line_no = fields.IntField(null=True, description="行号")
     function_name = fields.CharField(max_length=255, null=True, description="函数名称")
     exception = fields.TextField(null=True, description="异常信息")
+    repeat_count = fields.IntField(default=1, description="重复次数")
+    last_timestamp = fields.DatetimeField(null=True, description="最后一次重复的时间戳")
 
     class Meta:
         table = "logs"
         ordering = ["-timestamp"]  # 默认按时间倒序排列
+        indexes = (
+            ("timestamp", "id"),  # 游标分页按 (timestamp, id) 翻页
+            ("level", "timestamp"),
+            ("logger_name", "timestamp"),
+            ("module", "function_name", "timestamp"),
+            BrinIndex(fields=("timestamp",), name="idx_logs_timesta_brin"),  # 大范围的时间过滤
+        )
@@ -1,5 +1,9 @@
+import hashlib
+from typing import Iterable, Optional
+
 from tortoise import fields
 
+from fast_admin.core.cache import on_invalidation, publish_invalidation
 from fast_admin.models.base import BaseModel
 
 
@@ -14,12 +18,162 @@ class Permission(BaseModel):
                建议使用 "资源:操作" 的格式，例如 "user:list" 表示对用户资源进行列表操作.
         type: 权限类型 (例如: "page", "operation", "data").
         description: 权限描述.
+        bit: 权限掩码的位索引，由数据库序列在创建权限时分配，之后不再改变，删除权限后也不会复用.
     """
     id = fields.IntField(pk=True, description="权限ID")
     name = fields.CharField(max_length=255, unique=True, description="权限名称")
     code = fields.CharField(max_length=255, unique=True, description="权限代码")
     type = fields.CharField(max_length=20, choices=[("page", "页面权限"), ("operation", "操作权限"), ("data", "数据权限")], description="权限类型")
     description = fields.TextField(null=True, blank=True)
+    bit = fields.IntField(unique=True, generated=True, description="权限掩码的位索引")
 
     def __str__(self):
         return f"{self.name} ({self.code})"
+
+
+class PermissionRef:
+    """
+    权限引用.
+
+    在定义路由时通过 PermissionRegistry.ref 创建，掩码由注册表维护，
+    权限校验时只需将其与用户的权限掩码做一次按位与运算.
+
+    Attributes:
+        code: 权限代码.
+        type: 权限类型.
+        mask: 权限掩码，权限不存在时为 0.
+    """
+    __slots__ = ("code", "type", "mask")
+
+    def __init__(self, code: str, type: str):
+        self.code = code
+        self.type = type
+        self.mask = 0
+
+
+class PermissionRegistry:
+    """
+    权限注册表.
+
+    权限的位索引保存在权限表的 bit 字段中，由数据库序列按创建顺序分配，只增不减，因此在所有 worker 中保持一致，
+    新增、修改或删除权限都不会移动其他权限的位索引.
+    注册表维护权限 ID 到位索引的映射以及 (权限代码, 权限类型) 到权限引用的映射；
+    用户的权限掩码为其全部有效权限的位的按位或，见 mask_of.
+
+    删除权限会回收其位索引，layout 为已回收位索引集合的指纹，只在位索引被回收时变化，
+    以掩码形式保存的数据 (用户权限缓存、无状态访问令牌) 需要同时记录 layout，布局变化后不再使用.
+
+    Attributes:
+        layout: 位索引布局的指纹.
+    """
+
+    def __init__(self):
+        self._refs: dict[tuple[str, str], PermissionRef] = {}
+        self._keys: dict[int, tuple[str, str]] = {}
+        self._bits: dict[int, int] = {}
+        self.layout = self._fingerprint()
+        on_invalidation("registry_permissions", lambda ids: self.refresh_permissions(*ids, publish=False))
+
+    def _fingerprint(self) -> str:
+        """
+        计算已回收位索引集合的指纹.
+
+        已回收的位索引即最大位索引以下不属于任何权限的位索引 (创建权限失败时跳过的序列值也计入其中)，
+        新增权限只会分配更大的位索引，因此不会改变指纹.
+        """
+        assigned = set(self._bits.values())
+        retired = [bit for bit in range(max(assigned, default=-1)) if bit not in assigned]
+        return hashlib.sha256(",".join(map(str, retired)).encode()).hexdigest()[:16]
+
+    def ref(self, code: str, type: str = "operation") -> PermissionRef:
+        """
+        获取权限引用，不存在时创建.
+
+        Args:
+            code: 权限代码.
+            type: 权限类型.
+
+        Returns:
+            权限引用.
+        """
+        key = (code, type)
+        ref = self._refs.get(key)
+        if ref is None:
+            ref = self._refs[key] = PermissionRef(code, type)
+        return ref
+
+    def bit(self, permission_id: int) -> Optional[int]:
+        """
+        获取权限的位索引.
+
+        Args:
+            permission_id: 权限 ID.
+
+        Returns:
+            位索引，权限不存在时返回 None.
+        """
+        return self._bits.get(permission_id)
+
+    def mask_of(self, permission_ids: Iterable[int]) -> int:
+        """
+        计算权限集合的掩码，忽略不存在的权限.
+
+        Args:
+            permission_ids: 权限 ID 列表.
+
+        Returns:
+            权限掩码.
+        """
+        mask = 0
+        for permission_id in permission_ids:
+            bit = self._bits.get(permission_id)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def _set_permission(self, permission_id: int, bit: Optional[int], key: Optional[tuple[str, str]]) -> None:
+        old_bit = self._bits.pop(permission_id, None)
+        old_key = self._keys.pop(permission_id, None)
+        if old_key is not None:
+            self.ref(*old_key).mask &= ~(1 << old_bit)
+        if key is None:
+            return
+        self._bits[permission_id] = bit
+        self._keys[permission_id] = key
+        self.ref(*key).mask |= 1 << bit
+
+    async def load(self) -> None:
+        """从数据库全量加载注册表"""
+        rows = await Permission.all().values_list("id", "bit", "code", "type")
+
+        for ref in self._refs.values():
+            ref.mask = 0
+        self._bits.clear()
+        self._keys.clear()
+
+        for permission_id, bit, code, type in rows:
+            self._set_permission(permission_id, bit, (code, type))
+        self.layout = self._fingerprint()
+
+    async def refresh_permissions(self, *permission_ids: int, publish: bool = True) -> None:
+        """
+        从数据库增量刷新权限，权限已删除时移除，其他权限的位索引不受影响.
+
+        Args:
+            permission_ids: 权限 ID 列表，为空时全量加载.
+            publish: 是否通知其他 worker 刷新.
+        """
+        if not permission_ids:
+            await self.load()
+        else:
+            rows = await Permission.filter(id__in=permission_ids).values_list("id", "bit", "code", "type")
+            for permission_id in permission_ids:
+                self._set_permission(permission_id, None, None)
+            for permission_id, bit, code, type in rows:
+                self._set_permission(permission_id, bit, (code, type))
+            self.layout = self._fingerprint()
+        if publish:
+            await publish_invalidation("registry_permissions", list(permission_ids))
+
+
+permission_registry = PermissionRegistry()
@@ -1,13 +1,47 @@
-from passlib.context import CryptContext
+from datetime import datetime
 
 from tortoise import fields
 from starlette import status
 
+from fast_admin.core.cache import SharedCache, VersionCounter
+from fast_admin.core.config import settings
 from fast_admin.core.exceptions import CustomException
+from fast_admin.core.password import password_service
 from fast_admin.models.base import BaseModel
+from .effective_permission import UserEffectivePermission, rebuild_effective_permissions
+from .permission import permission_registry
 from .role import Role
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 缓存的用户字段，即 get_user_by_username 加载的用户行
+# 不包含密码哈希，避免写入共享的 Redis；登录时由 User.verify_password 单独查询
+USER_CACHE_FIELDS = ("id", "username", "is_active", "is_superuser", "created_at", "updated_at")
+
+# 用户权限缓存: "位索引布局:用户ID" -> 权限掩码，掩码可能超过 64 位，因此在 Redis 中以十六进制字符串保存
+# 键中包含权限注册表的位索引布局，布局变化后旧的掩码不再被读取，随有效期过期
+user_permission_cache = SharedCache(
+    namespace="user_permissions",
+    maxsize=settings.PERMISSION_CACHE_MAXSIZE,
+    ttl=settings.PERMISSION_CACHE_TTL,
+    near_ttl=settings.NEAR_CACHE_TTL,
+    encode=lambda mask: format(mask, "x"),
+    decode=lambda mask: int(mask, 16),
+)
+
+# 用户权限版本: 用户ID -> 版本，用户的角色或权限变更时递增，用于使无状态访问令牌失效
+permission_versions = VersionCounter(namespace="permission_versions")
+
+# 用户信息缓存: 用户名 -> 用户行
+user_cache = SharedCache(
+    namespace="users",
+    maxsize=settings.PERMISSION_CACHE_MAXSIZE,
+    ttl=settings.USER_CACHE_TTL,
+    near_ttl=settings.NEAR_CACHE_TTL,
+    decode=lambda row: {
+        **row,
+        "created_at": datetime.fromisoformat(row["created_at"]),
+        "updated_at": datetime.fromisoformat(row["updated_at"]),
+    },
+)
 
 
 class User(BaseModel):
@@ -52,15 +86,22 @@ class User(BaseModel):
         if self.is_superuser:
             return True
 
-        for role in await self.roles:
-            for permission in await role.permissions:
-                if permission.code == permission_code and permission.type == permission_type:
-                    return True
-        return False
+        return bool(permission_registry.ref(permission_code, permission_type).mask & await self.permission_mask())
 
-    def verify_password(self, password: str):
+    async def permission_mask(self) -> int:
         """
-        验证密码是否正确.
+        获取用户的权限掩码，即用户全部有效权限的位的按位或.
+
+        Returns:
+            权限掩码.
+        """
+        return await get_user_permission_mask(self.id)
+
+    async def verify_password(self, password: str):
+        """
+        验证密码是否正确，在密码执行器中执行，不阻塞事件循环.
+
+        缓存的用户行不包含密码哈希，因此每次验证都按主键从数据库读取.
 
         Args:
             password: 明文密码.
@@ -68,12 +109,17 @@ class User(BaseModel):
         Returns:
             如果密码正确，则返回 True，否则返回 False.
         """
-        return pwd_context.verify(password, self.password_hash)
+        password_hash = await User.filter(id=self.id).first().values_list("password_hash", flat=True)
+        if password_hash is None:
+            return False
+        return await password_service.verify(password, password_hash)
 
 
 async def get_user_by_username(username: str):
     """
-    根据用户名获取用户信息.
+    根据用户名获取用户信息，优先从缓存读取.
+
+    返回的用户不包含预加载的角色，权限请使用 User.permission_mask 获取.
 
     Args:
         username: 用户名.
@@ -84,7 +130,74 @@ async def get_user_by_username(username: str):
     Raises:
         CustomException: 如果用户不存在.
     """
-    user = await User.filter(username=username).prefetch_related('roles__permissions').first()
-    if not user:
-        raise CustomException(msg="用户不存在", status_code=status.HTTP_404_NOT_FOUND)
-    return user
+    row = await user_cache.get(username)
+    if row is None:
+        row = await User.filter(username=username).first().values(*USER_CACHE_FIELDS)
+        if not row:
+            raise CustomException(msg="用户不存在", status_code=status.HTTP_404_NOT_FOUND)
+        await user_cache.set(username, row)
+    return User._init_from_db(**row)
+
+
+async def get_user_permission_mask(user_id: int) -> int:
+    """
+    获取用户的权限掩码，优先从缓存读取，未命中时只需一次 user_effective_permission 索引查询.
+
+    Args:
+        user_id: 用户 ID.
+
+    Returns:
+        权限掩码.
+    """
+    key = _permission_cache_key(user_id)
+    mask = await user_permission_cache.get(key)
+    if mask is None:
+        permission_ids = await UserEffectivePermission.filter(user_id=user_id).values_list("permission_id", flat=True)
+        mask = permission_registry.mask_of(permission_ids)
+        await user_permission_cache.set(key, mask)
+    return mask
+
+
+def _permission_cache_key(user_id: int) -> str:
+    """用户权限缓存的键，包含当前的位索引布局"""
+    return f"{permission_registry.layout}:{user_id}"
+
+
+async def get_role_user_ids(role_id: int) -> list[int]:
+    """
+    获取拥有指定角色的用户 ID.
+
+    Args:
+        role_id: 角色 ID.
+
+    Returns:
+        用户 ID 列表.
+    """
+    return await User.filter(roles__id=role_id).values_list("id", flat=True)
+
+
+async def refresh_user_permissions(*user_ids: int) -> None:
+    """
+    在用户的角色或角色的权限变更后刷新用户的权限.
+
+    重建用户的有效权限，使用户的权限缓存失效，并递增用户的权限版本使已签发的无状态访问令牌失效.
+
+    Args:
+        user_ids: 用户 ID 列表.
+    """
+    if not user_ids:
+        return
+    await rebuild_effective_permissions(*user_ids)
+    await user_permission_cache.invalidate(*[_permission_cache_key(user_id) for user_id in user_ids])
+    await permission_versions.incr(*user_ids)
+
+
+async def invalidate_user(*usernames: str) -> None:
+    """
+    使用户信息缓存失效，并通知其他 worker.
+
+    Args:
+        usernames: 用户名列表.
+    """
+    if usernames:
+        await user_cache.invalidate(*usernames)
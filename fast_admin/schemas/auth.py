@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class PasswordMetrics(BaseModel):
+    """密码服务运行指标模型"""
+
+    calls: int
+    waiting: int
+    queue_time_avg: float
+    queue_time_max: float
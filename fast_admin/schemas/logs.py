@@ -17,7 +17,34 @@ class LogOut(BaseModel):
     line_no: Optional[int] = None
     function_name: Optional[str] = None
     exception: Optional[str] = None
+    repeat_count: int = 1
+    last_timestamp: Optional[datetime] = None
 
     class Config:
         # 允许从 ORM 对象加载数据
         from_attributes = True
+
+
+class LogSinkMetrics(BaseModel):
+    """数据库日志处理器运行指标模型"""
+
+    flushed: int
+    dropped: int
+    failed: int
+    queued: int
+    suppressed: int
+    circuit: str
+    spool_depth: int
+    spool_bytes: int
+    replayed: int
+    spool_corrupted: int
+    errors: int
+
+
+class LogHistogramBucket(BaseModel):
+    """日志直方图桶模型"""
+
+    bucket_start: datetime
+    level: str
+    logger_name: str
+    count: int
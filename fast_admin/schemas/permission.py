@@ -33,3 +33,13 @@ class Permission(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class RoutePolicy(BaseModel):
+    """
+    路由授权表条目响应数据模型.
+    """
+    method: str
+    path: str
+    code: str
+    type: str
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Optional
 
 from pydantic import BaseModel
 
@@ -25,7 +26,17 @@ class TokenPayload(BaseModel):
         exp: 令牌过期时间.
         sub: 令牌主题，通常是用户名.
         type: 令牌类型.
+        uid: 用户 ID (仅无状态认证).
+        su: 是否是超级管理员 (仅无状态认证).
+        pm: 十六进制的权限掩码 (仅无状态认证).
+        pl: 权限掩码的位索引布局 (仅无状态认证).
+        pv: 权限版本 (仅无状态认证).
     """
     exp: datetime
     sub: str
     type: str
+    uid: Optional[int] = None
+    su: Optional[bool] = None
+    pm: Optional[str] = None
+    pl: Optional[str] = None
+    pv: Optional[int] = None
@@ -0,0 +1,35 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "user_effective_permission" (
+    "created_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "code" VARCHAR(255) NOT NULL,
+    "type" VARCHAR(20) NOT NULL,
+    "permission_id" INT NOT NULL REFERENCES "permission" ("id") ON DELETE CASCADE,
+    "user_id" INT NOT NULL REFERENCES "user" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_user_effect_user_id_5b1f0e" UNIQUE ("user_id", "permission_id")
+);
+CREATE INDEX IF NOT EXISTS "idx_user_effect_user_id_9c2d4a" ON "user_effective_permission" ("user_id", "code", "type");
+COMMENT ON COLUMN "user_effective_permission"."created_at" IS '创建时间';
+COMMENT ON COLUMN "user_effective_permission"."updated_at" IS '更新时间';
+COMMENT ON COLUMN "user_effective_permission"."id" IS 'ID';
+COMMENT ON COLUMN "user_effective_permission"."code" IS '权限代码';
+COMMENT ON COLUMN "user_effective_permission"."type" IS '权限类型';
+COMMENT ON COLUMN "user_effective_permission"."permission_id" IS '权限';
+COMMENT ON COLUMN "user_effective_permission"."user_id" IS '用户';
+COMMENT ON TABLE "user_effective_permission" IS '用户有效权限模型';
+INSERT INTO "user_effective_permission" ("user_id", "permission_id", "code", "type")
+SELECT DISTINCT ur."user_id", p."id", p."code", p."type"
+FROM "user_role" ur
+JOIN "role_permission" rp ON rp."role_id" = ur."role_id"
+JOIN "permission" p ON p."id" = rp."permission_id"
+ON CONFLICT ("user_id", "permission_id") DO NOTHING;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "user_effective_permission";"""
@@ -0,0 +1,26 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_logs_search_7d2f9a" ON "logs" USING GIN (to_tsvector('simple', "message" || ' ' || coalesce("exception", '')));
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'pg_trgm 扩展不可用，日志模糊搜索将回退为 ILIKE: %', SQLERRM;
+END $$;
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+        CREATE INDEX IF NOT EXISTS "idx_logs_message_3b6e0d" ON "logs" USING GIN ("message" gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS "idx_logs_excepti_8a1c5f" ON "logs" USING GIN ("exception" gin_trgm_ops);
+    END IF;
+END $$;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_logs_excepti_8a1c5f";
+DROP INDEX IF EXISTS "idx_logs_message_3b6e0d";
+DROP INDEX IF EXISTS "idx_logs_search_7d2f9a";"""
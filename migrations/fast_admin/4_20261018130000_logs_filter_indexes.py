@@ -0,0 +1,17 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_logs_level_2c9e4b" ON "logs" ("level", "timestamp" DESC);
+CREATE INDEX IF NOT EXISTS "idx_logs_logger__6f3a1d" ON "logs" ("logger_name", "timestamp" DESC);
+CREATE INDEX IF NOT EXISTS "idx_logs_module_9b4d7e" ON "logs" ("module", "function_name", "timestamp" DESC);
+CREATE INDEX IF NOT EXISTS "idx_logs_timesta_brin" ON "logs" USING BRIN ("timestamp");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_logs_timesta_brin";
+DROP INDEX IF EXISTS "idx_logs_module_9b4d7e";
+DROP INDEX IF EXISTS "idx_logs_logger__6f3a1d";
+DROP INDEX IF EXISTS "idx_logs_level_2c9e4b";"""
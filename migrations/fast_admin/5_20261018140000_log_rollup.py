@@ -0,0 +1,28 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "log_rollup" (
+    "created_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "bucket_start" TIMESTAMPTZ NOT NULL,
+    "level" VARCHAR(20) NOT NULL,
+    "logger_name" VARCHAR(255) NOT NULL  DEFAULT '',
+    "count" INT NOT NULL  DEFAULT 0,
+    CONSTRAINT "uid_log_rollup_bucket__3e7a2c" UNIQUE ("bucket_start", "level", "logger_name")
+);
+COMMENT ON COLUMN "log_rollup"."created_at" IS '创建时间';
+COMMENT ON COLUMN "log_rollup"."updated_at" IS '更新时间';
+COMMENT ON COLUMN "log_rollup"."id" IS 'ID';
+COMMENT ON COLUMN "log_rollup"."bucket_start" IS '分钟桶的起始时间';
+COMMENT ON COLUMN "log_rollup"."level" IS '日志级别';
+COMMENT ON COLUMN "log_rollup"."logger_name" IS '记录器名称';
+COMMENT ON COLUMN "log_rollup"."count" IS '日志数量';
+COMMENT ON TABLE "log_rollup" IS '日志汇总模型';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "log_rollup";"""
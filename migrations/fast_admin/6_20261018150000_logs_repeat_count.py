@@ -0,0 +1,15 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "logs" ADD "repeat_count" INT NOT NULL  DEFAULT 1;
+ALTER TABLE "logs" ADD "last_timestamp" TIMESTAMPTZ;
+COMMENT ON COLUMN "logs"."repeat_count" IS '重复次数';
+COMMENT ON COLUMN "logs"."last_timestamp" IS '最后一次重复的时间戳';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "logs" DROP COLUMN "repeat_count";
+ALTER TABLE "logs" DROP COLUMN "last_timestamp";"""
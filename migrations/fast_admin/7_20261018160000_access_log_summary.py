@@ -0,0 +1,34 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "access_log_summary" (
+    "created_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "bucket_start" TIMESTAMPTZ NOT NULL,
+    "method" VARCHAR(10) NOT NULL,
+    "route" VARCHAR(255) NOT NULL,
+    "count" INT NOT NULL  DEFAULT 0,
+    "error_count" INT NOT NULL  DEFAULT 0,
+    "total_ms" DOUBLE PRECISION NOT NULL  DEFAULT 0,
+    "max_ms" DOUBLE PRECISION NOT NULL  DEFAULT 0,
+    CONSTRAINT "uid_access_log_bucket__5d8c1f" UNIQUE ("bucket_start", "method", "route")
+);
+COMMENT ON COLUMN "access_log_summary"."created_at" IS '创建时间';
+COMMENT ON COLUMN "access_log_summary"."updated_at" IS '更新时间';
+COMMENT ON COLUMN "access_log_summary"."id" IS 'ID';
+COMMENT ON COLUMN "access_log_summary"."bucket_start" IS '分钟桶的起始时间';
+COMMENT ON COLUMN "access_log_summary"."method" IS '请求方法';
+COMMENT ON COLUMN "access_log_summary"."route" IS '路由路径模板';
+COMMENT ON COLUMN "access_log_summary"."count" IS '请求次数';
+COMMENT ON COLUMN "access_log_summary"."error_count" IS '错误请求次数';
+COMMENT ON COLUMN "access_log_summary"."total_ms" IS '总耗时（毫秒）';
+COMMENT ON COLUMN "access_log_summary"."max_ms" IS '最大耗时（毫秒）';
+COMMENT ON TABLE "access_log_summary" IS '访问日志汇总模型';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "access_log_summary";"""
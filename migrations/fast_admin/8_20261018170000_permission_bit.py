@@ -0,0 +1,21 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "permission" ADD "bit" INT;
+CREATE SEQUENCE IF NOT EXISTS "permission_bit_seq" AS INT MINVALUE 0 START 0 OWNED BY "permission"."bit";
+UPDATE "permission" SET "bit" = "ranked"."bit" FROM (
+    SELECT "id", ROW_NUMBER() OVER (ORDER BY "code") - 1 AS "bit" FROM "permission"
+) AS "ranked" WHERE "permission"."id" = "ranked"."id";
+SELECT setval('permission_bit_seq', COALESCE((SELECT MAX("bit") + 1 FROM "permission"), 0), false);
+ALTER TABLE "permission" ALTER COLUMN "bit" SET DEFAULT nextval('permission_bit_seq');
+ALTER TABLE "permission" ALTER COLUMN "bit" SET NOT NULL;
+ALTER TABLE "permission" ADD CONSTRAINT "uid_permission_bit_8f2c41" UNIQUE ("bit");
+COMMENT ON COLUMN "permission"."bit" IS '权限掩码的位索引';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "permission" DROP COLUMN "bit";
+DROP SEQUENCE IF EXISTS "permission_bit_seq";"""
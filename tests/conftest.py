@@ -0,0 +1,15 @@
+import os
+
+# Settings 在导入时读取环境变量，测试使用不依赖外部服务的默认值
+for name, value in {
+    "SECRET_KEY": "test-secret-key",
+    "DATABASE_USER": "postgres",
+    "DATABASE_PASSWORD": "postgres",
+    "DATABASE_HOST": "localhost",
+    "DATABASE_PORT": "5432",
+    "DATABASE_NAME": "fast_admin_test",
+    "REDIS_HOST": "",
+    "REDIS_PORT": "6379",
+    "REDIS_DB": "0",
+}.items():
+    os.environ.setdefault(name, value)
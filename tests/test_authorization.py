@@ -0,0 +1,110 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from loguru import logger
+
+from fast_admin.api import router, users
+from fast_admin.core import security
+from fast_admin.core.authorization import PathMatcher, auth_whitelist, compile_route_policies
+from fast_admin.core.dependencies import permission_required
+from fast_admin.core.exceptions import register_exception
+from fast_admin.core.middleware import AccessLogMiddleware, AuthMiddleware
+from fast_admin.core.security import TokenUser, create_access_token
+
+
+class FakeProfile:
+    """/users/me 查询用户资料所需的 User 接口"""
+
+    @staticmethod
+    def get(id: int):
+        return FakeProfile()
+
+    async def prefetch_related(self, *relations):
+        return {"id": 7, "username": "alice", "is_active": True, "is_superuser": False, "roles": []}
+
+
+@pytest.fixture
+def app(monkeypatch):
+    async def get_user_by_username(username):
+        return TokenUser(id=7, username=username, is_superuser=False, mask=0)
+
+    monkeypatch.setattr(security, "get_user_by_username", get_user_by_username)
+    monkeypatch.setattr(users, "User", FakeProfile)
+
+    app = FastAPI()
+    app.add_middleware(AuthMiddleware)
+    register_exception(app)
+    app.include_router(router)
+    app.state.route_policies = compile_route_policies(app, auth_whitelist)
+    return app
+
+
+def auth(username: str = "alice") -> dict:
+    return {"Authorization": f"Bearer {create_access_token(username)}"}
+
+
+def test_own_profile_needs_no_permission(app):
+    response = TestClient(app).get("/users/me", headers=auth())
+
+    assert response.status_code == 200
+    assert response.json()["id"] == 7
+
+
+def test_route_templates_still_require_permission(app):
+    response = TestClient(app).get("/users/8", headers=auth())
+
+    assert response.status_code == 403
+
+
+def test_first_matching_route_decides_policy():
+    app = FastAPI()
+
+    @app.get("/items/latest")
+    async def latest():
+        return {}
+
+    @app.get("/items/{item_id}", dependencies=[Depends(permission_required("item:read"))])
+    async def item(item_id: int):
+        return {}
+
+    table = compile_route_policies(app, PathMatcher())
+
+    assert table.match("GET", "/items/latest") is None
+    assert table.match("GET", "/items/1").code == "item:read"
+    assert table.as_list() == [{"method": "GET", "path": "/items/{item_id}", "code": "item:read", "type": "operation"}]
+
+
+def test_creating_users_requires_login(app):
+    response = TestClient(app).post("/users/", json={"username": "mallory", "password": "secret", "is_superuser": True})
+
+    assert response.status_code == 401
+
+
+def test_whitelisted_route_cannot_declare_permission():
+    app = FastAPI()
+
+    @app.post("/signup", dependencies=[Depends(permission_required("user:create"))])
+    async def signup():
+        return {}
+
+    with pytest.raises(RuntimeError, match="POST /signup"):
+        compile_route_policies(app, PathMatcher(["POST /signup"]))
+
+
+def test_password_metrics_require_permission(app):
+    response = TestClient(app).get("/auth/metrics", headers=auth())
+
+    assert response.status_code == 403
+
+
+def test_access_log_records_user_id(app):
+    app.add_middleware(AccessLogMiddleware)
+    records = []
+    sink_id = logger.add(records.append, filter=lambda record: "access" in record["extra"])
+    try:
+        TestClient(app).get("/users/me", headers=auth())
+    finally:
+        logger.remove(sink_id)
+
+    assert records[0].record["extra"]["user_id"] == 7
+    assert "user" not in records[0].record["extra"]
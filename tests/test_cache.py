@@ -0,0 +1,228 @@
+import asyncio
+
+import orjson
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from fast_admin.core import cache as cache_module
+from fast_admin.core.cache import SharedCache, TTLCache, VersionCounter, bind_redis, unbind_redis
+from fast_admin.core.config import settings
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def invalidation_handlers(monkeypatch):
+    # 重新订阅时会通知全部处理函数，隔离其他模块注册的处理函数 (例如需要数据库的权限注册表)
+    monkeypatch.setattr(cache_module, "_invalidation_handlers", {})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+async def wait_for(predicate, timeout=2.0):
+    async with asyncio.timeout(timeout):
+        while not await predicate():
+            await asyncio.sleep(0.01)
+
+
+async def bind(redis):
+    """绑定 Redis，并等待失效消息订阅就绪"""
+    bind_redis(redis)
+
+    async def subscribed():
+        counts = dict(await redis.pubsub_numsub(settings.CACHE_INVALIDATION_CHANNEL))
+        return counts.get(settings.CACHE_INVALIDATION_CHANNEL.encode(), 0) > 0
+
+    await wait_for(subscribed)
+
+
+def test_ttl_cache_hit_and_miss(clock):
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b", "default") == "default"
+
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+
+
+def test_ttl_cache_expires(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=30)
+
+    clock.now += 10
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    clock.now += 20
+    assert "b" not in cache
+    assert len(cache) == 0
+
+
+def test_shared_cache_without_redis_is_local():
+    async def run():
+        shared = SharedCache("test_local")
+        assert await shared.get("a") is None
+        await shared.set("a", 1)
+        assert await shared.get("a") == 1
+        await shared.invalidate("a")
+        assert await shared.get("a") is None
+
+    asyncio.run(run())
+
+
+def test_shared_cache_reads_through_redis():
+    async def run():
+        redis = FakeRedis(server=FakeServer())
+        await bind(redis)
+        try:
+            shared = SharedCache("test_shared", ttl=60, encode=sorted, decode=set)
+            assert await shared.get(1) is None
+
+            await shared.set(1, {"b", "a"})
+            assert 0 < await redis.ttl(shared._redis_key(1)) <= 60
+
+            # 近端缓存未命中时从 Redis 读取并解码
+            shared.drop_local()
+            assert await shared.get(1) == {"a", "b"}
+            assert 1 in shared.local
+
+            await shared.invalidate(1)
+            assert await redis.get(shared._redis_key(1)) is None
+            assert await shared.get(1) is None
+        finally:
+            await unbind_redis()
+
+    asyncio.run(run())
+
+
+def test_shared_cache_expires_from_redis():
+    async def run():
+        redis = FakeRedis(server=FakeServer())
+        await bind(redis)
+        try:
+            shared = SharedCache("test_expire", ttl=60, near_ttl=0)
+            await shared.set("a", 1)
+            await redis.expire(shared._redis_key("a"), 0)
+            assert await shared.get("a") is None
+        finally:
+            await unbind_redis()
+
+    asyncio.run(run())
+
+
+def test_invalidation_from_other_worker_drops_local_entry():
+    async def run():
+        server = FakeServer()
+        redis = FakeRedis(server=server)
+        other_worker = FakeRedis(server=server)
+        await bind(redis)
+        try:
+            shared = SharedCache("test_remote")
+            await shared.set("a", 1)
+            await shared.set("b", 2)
+
+            await other_worker.publish(
+                settings.CACHE_INVALIDATION_CHANNEL,
+                orjson.dumps({"worker": "other", "namespace": "test_remote", "keys": ["a"]}),
+            )
+
+            async def dropped():
+                return "a" not in shared.local
+
+            await wait_for(dropped)
+            assert shared.local.get("b") == 2
+        finally:
+            await unbind_redis()
+
+    asyncio.run(run())
+
+
+def test_invalidate_publishes_to_other_workers():
+    async def run():
+        server = FakeServer()
+        redis = FakeRedis(server=server)
+        other_worker = FakeRedis(server=server)
+        await bind(redis)
+        try:
+            shared = SharedCache("test_publish")
+            async with other_worker.pubsub(ignore_subscribe_messages=True) as pubsub:
+                await pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+                await shared.invalidate("a", "b")
+                async with asyncio.timeout(2):
+                    message = None
+                    while message is None:
+                        message = await pubsub.get_message(timeout=0.1)
+
+            data = orjson.loads(message["data"])
+            assert data["worker"] == cache_module.WORKER_ID
+            assert data["namespace"] == "test_publish"
+            assert data["keys"] == ["a", "b"]
+        finally:
+            await unbind_redis()
+
+    asyncio.run(run())
+
+
+def test_version_counter_requires_redis():
+    async def run():
+        versions = VersionCounter("test_versions_local")
+        await versions.incr(1)
+        assert await versions.get(1) is None
+        assert await versions.ensure(1) is None
+
+        redis = FakeRedis(server=FakeServer())
+        await bind(redis)
+        try:
+            assert await versions.get(1) is None
+            version = await versions.ensure(1)
+            assert await versions.ensure(1) == await versions.get(1) == version
+
+            await versions.incr(1, 2)
+            await versions.incr(1)
+            assert await versions.get(1) == version + 2
+            assert await versions.get(2) is not None
+        finally:
+            await unbind_redis()
+
+    asyncio.run(run())
+
+
+def test_lost_version_counter_never_restores_revoked_versions():
+    async def run():
+        redis = FakeRedis(server=FakeServer())
+        await bind(redis)
+        try:
+            versions = VersionCounter("test_versions_lost")
+            revoked = await versions.ensure(1)
+            await versions.incr(1)
+
+            # 模拟计数被淘汰或 Redis 重启后丢失
+            await redis.delete(versions._redis_key(1))
+            assert await versions.get(1) is None
+
+            assert await versions.ensure(1) > revoked + 1
+            await redis.delete(versions._redis_key(1))
+            await versions.incr(1)
+            assert await versions.get(1) > revoked + 1
+        finally:
+            await unbind_redis()
+
+    asyncio.run(run())
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from tortoise import Tortoise, connections
+
+from fast_admin.core import log_archive as archive_module
+from fast_admin.core.config import TORTOISE_ORM
+from fast_admin.core.database import advisory_lock
+
+"""
+咨询锁的测试，需要 DATABASE_* 环境变量指向的 PostgreSQL，数据库不可用时跳过。
+
+"""
+
+
+def run_with_database(test):
+    async def run():
+        await Tortoise.init(config=TORTOISE_ORM)
+        try:
+            try:
+                await connections.get("default").execute_query("SELECT 1")
+            except OSError as exc:
+                pytest.skip(f"PostgreSQL 不可用: {exc!r}")
+            await test()
+        finally:
+            await Tortoise.close_connections()
+
+    asyncio.run(run())
+
+
+def test_advisory_lock_is_exclusive():
+    async def test():
+        async with advisory_lock("test.lock") as first:
+            assert first
+            async with advisory_lock("test.lock") as second:
+                assert not second
+            async with advisory_lock("test.other") as other:
+                assert other
+        async with advisory_lock("test.lock") as again:
+            assert again
+
+    run_with_database(test)
+
+
+def test_archive_pass_is_skipped_while_locked(monkeypatch):
+    calls = []
+
+    async def archive_logs(*args):
+        calls.append(args)
+        return 0
+
+    monkeypatch.setattr(archive_module, "archive_logs", archive_logs)
+
+    async def test():
+        async with advisory_lock(archive_module.ARCHIVE_LOCK):
+            task = asyncio.create_task(archive_module.run_log_archive(archive_module.log_archive, 30, period=3600))
+            await asyncio.sleep(0.2)
+            task.cancel()
+        assert calls == []
+
+        task = asyncio.create_task(archive_module.run_log_archive(archive_module.log_archive, 30, period=3600))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        assert len(calls) == 1
+
+    run_with_database(test)
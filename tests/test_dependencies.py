@@ -0,0 +1,57 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.responses import ORJSONResponse
+from fastapi.testclient import TestClient
+
+from fast_admin.core import security
+from fast_admin.core.dependencies import get_current_user_from_request, permission_required
+from fast_admin.core.exceptions import CustomException
+from fast_admin.core.middleware import AuthMiddleware
+from fast_admin.core.security import TokenUser, create_access_token
+
+
+@pytest.fixture
+def client(monkeypatch):
+    loaded = []
+
+    async def get_user_by_username(username):
+        loaded.append(username)
+        return TokenUser(id=7, username=username, is_superuser=False, mask=0)
+
+    monkeypatch.setattr(security, "get_user_by_username", get_user_by_username)
+
+    app = FastAPI()
+    app.add_middleware(AuthMiddleware)
+
+    @app.exception_handler(CustomException)
+    async def custom_exception_handler(request, exc: CustomException):
+        return ORJSONResponse(status_code=exc.status_code, content={"message": exc.msg})
+
+    @app.get("/whoami")
+    async def whoami(user=Depends(get_current_user_from_request)):
+        return {"id": user.id, "username": user.username, "is_superuser": user.is_superuser}
+
+    @app.get("/guarded", dependencies=[Depends(permission_required("test:guarded"))])
+    async def guarded():
+        return {}
+
+    client = TestClient(app)
+    client.loaded = loaded
+    return client
+
+
+def auth(username: str = "alice") -> dict:
+    return {"Authorization": f"Bearer {create_access_token(username)}"}
+
+
+def test_current_user_dependency_returns_loaded_identity(client):
+    response = client.get("/whoami", headers=auth())
+
+    assert response.status_code == 200
+    assert response.json() == {"id": 7, "username": "alice", "is_superuser": False}
+    assert client.loaded == ["alice"]
+
+
+def test_permission_dependency_uses_request_user(client):
+    assert client.get("/guarded", headers=auth()).status_code == 403
+    assert client.get("/guarded").status_code == 401
@@ -0,0 +1,25 @@
+import os
+import pkgutil
+import subprocess
+import sys
+
+import pytest
+
+import fast_admin.core
+
+# 管理命令、应用入口和各核心模块都可能是第一个被导入的模块，循环导入只在特定的导入顺序下出现
+MODULES = ["fast_admin.main", "fast_admin.manage"] + [
+    f"fast_admin.core.{module.name}" for module in pkgutil.iter_modules(fast_admin.core.__path__)
+]
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_module_imports_first(module):
+    result = subprocess.run(
+        [sys.executable, "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env={**os.environ},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from fast_admin.core import log_archive as archive_module
+from fast_admin.core.log_archive import LogArchive, write_segment
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+LEVELS = ("INFO", "DEBUG", "ERROR", "WARNING")
+
+
+def make_rows(first: int, count: int) -> list[dict]:
+    return [
+        {
+            "id": i,
+            "level": LEVELS[i % len(LEVELS)],
+            "message": f"message {i}",
+            "timestamp": BASE + timedelta(seconds=i),
+            "logger_name": "app",
+            "exception": None,
+        }
+        for i in range(first, first + count)
+    ]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    rows = make_rows(0, 1000)
+    write_segment(str(tmp_path), "logs_a", rows[:500], block_rows=100)
+    write_segment(str(tmp_path), "logs_b", rows[500:], block_rows=100)
+    return LogArchive(str(tmp_path)), rows
+
+
+def expected(rows, level=None, keyword=None, start=None, end=None):
+    return [
+        row for row in rows
+        if (level is None or row["level"] == level)
+        and (keyword is None or keyword in row["message"])
+        and (start is None or row["timestamp"] >= start)
+        and (end is None or row["timestamp"] <= end)
+    ]
+
+
+def test_rows_match_filters_in_both_orders(archive):
+    log_archive, rows = archive
+    start, end = BASE + timedelta(seconds=450), BASE + timedelta(seconds=560)
+    wanted = expected(rows, level="ERROR", keyword="5", start=start, end=end)
+    got = list(log_archive.rows({"level": "ERROR"}, {"message": "5"}, start, end))
+    assert got == wanted
+    got = list(log_archive.rows({"level": "ERROR"}, {"message": "5"}, start, end, descending=True))
+    assert got == wanted[::-1]
+
+
+@pytest.mark.parametrize("skip", [0, 1, 99, 100, 250, 499, 500, 740])
+def test_skip_matches_offset(archive, skip):
+    log_archive, rows = archive
+    start = BASE + timedelta(seconds=30)
+    wanted = expected(rows, level="INFO", start=start)[::-1]
+    got = list(log_archive.rows({"level": "INFO"}, None, start, None, descending=True, skip=skip))
+    assert got == wanted[skip:]
+
+
+def test_count_is_resolved_from_index(archive, monkeypatch):
+    log_archive, rows = archive
+    start, end = BASE + timedelta(seconds=100), BASE + timedelta(seconds=699)
+    decompressed = []
+    original = archive_module.LogSegment.read_block
+    monkeypatch.setattr(
+        archive_module.LogSegment, "read_block",
+        lambda segment, entry: decompressed.append(entry) or original(segment, entry),
+    )
+
+    # 时间范围与块边界对齐，只按日志级别筛选时不解压任何块
+    assert log_archive.count({"level": "WARNING"}, None, start, end) == len(expected(rows, "WARNING", start=start, end=end))
+    assert log_archive.count(None, None, None, None) == len(rows)
+    assert decompressed == []
+
+    # 时间范围不对齐时只解压两端的块
+    start, end = BASE + timedelta(seconds=150), BASE + timedelta(seconds=650)
+    assert log_archive.count({"level": "WARNING"}, None, start, end) == len(expected(rows, "WARNING", start=start, end=end))
+    assert len(decompressed) == 2
+
+    # 其他筛选条件需要逐行筛选
+    assert log_archive.count(None, {"message": "7"}, None, None) == len(expected(rows, keyword="7"))
+
+
+def test_horizon_and_covers(archive):
+    log_archive, rows = archive
+    assert log_archive.horizon() == rows[-1]["timestamp"]
+    assert log_archive.covers(rows[-1]["timestamp"])
+    assert not log_archive.covers(rows[-1]["timestamp"] + timedelta(microseconds=1))
@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime, timezone
+
+import orjson
+import pytest
+from aerich import Command
+from tortoise import Tortoise, connections
+from tortoise.transactions import in_transaction
+
+from fast_admin.core.config import settings, TORTOISE_ORM
+from fast_admin.models.logs import Log
+
+"""
+日志查询计划的回归测试。
+
+禁用顺序扫描后检查 GET /logs 的常用筛选组合是否都能使用迁移创建的索引，
+需要 DATABASE_* 环境变量指向的 PostgreSQL，数据库不可用时跳过。
+
+"""
+
+
+def _seq_scans(plan: dict) -> list[str]:
+    """递归查找查询计划中的顺序扫描节点，返回被扫描的表名"""
+    tables = [plan["Relation Name"]] if plan["Node Type"] == "Seq Scan" else []
+    for sub_plan in plan.get("Plans", []):
+        tables.extend(_seq_scans(sub_plan))
+    return tables
+
+
+def _cases() -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "默认排序": Log.all(),
+        "按时间范围": Log.filter(timestamp__gte=now, timestamp__lte=now),
+        "按级别": Log.filter(level="ERROR"),
+        "按级别与时间范围": Log.filter(level="ERROR", timestamp__gte=now),
+        "按记录器": Log.filter(logger_name="uvicorn.error"),
+        "按模块与函数": Log.filter(module="main", function_name="lifespan"),
+        "按级别排序": Log.all().order_by("-level"),
+    }
+
+
+async def _query_plans() -> dict[str, list[str]]:
+    """执行迁移并返回每个筛选组合的顺序扫描表名"""
+    await Tortoise.init(config=TORTOISE_ORM)
+    try:
+        try:
+            await connections.get("default").execute_query("SELECT 1")
+        except OSError as exc:
+            pytest.skip(f"PostgreSQL 不可用: {exc!r}")
+
+        command = Command(tortoise_config=TORTOISE_ORM, app=settings.APP_NAME, location="./migrations")
+        await command.init()
+        await command.upgrade(run_in_transaction=True)
+
+        scans = {}
+        async with in_transaction() as conn:
+            # 禁用顺序扫描后规划器仍然选择顺序扫描，说明没有可用的索引
+            await conn.execute_script("SET LOCAL enable_seqscan = off")
+            for name, query in _cases().items():
+                _, rows = await conn.execute_query(f"EXPLAIN (FORMAT JSON) {query.limit(10).sql()}")
+                plan = rows[0]["QUERY PLAN"]
+                if isinstance(plan, str):
+                    plan = orjson.loads(plan)
+                scans[name] = _seq_scans(plan[0]["Plan"])
+        return scans
+    finally:
+        await Tortoise.close_connections()
+
+
+def test_log_filters_use_indexes():
+    scans = asyncio.run(_query_plans())
+    assert {name: tables for name, tables in scans.items() if tables} == {}
@@ -0,0 +1,103 @@
+import asyncio
+import struct
+from datetime import datetime, timezone
+
+import orjson
+
+from fast_admin.core.log_sink import DatabaseLogSink
+from fast_admin.core.log_spool import CircuitBreaker, LogSpool
+
+LENGTH = struct.Struct(">I")
+
+
+def make_row(index: int) -> dict:
+    return {
+        "level": "INFO",
+        "message": f"message {index}",
+        "timestamp": datetime(2026, 1, 1, tzinfo=timezone.utc),
+        "last_timestamp": None,
+    }
+
+
+def raw_record(data: bytes) -> bytes:
+    return LENGTH.pack(len(data)) + data
+
+
+def test_corrupt_record_is_quarantined(tmp_path):
+    path = str(tmp_path / "spool.bin")
+    spool = LogSpool(path)
+    spool.open()
+    spool.append([make_row(0)])
+    with open(path, "ab") as file:
+        file.write(raw_record(b'{"level": "INFO", "mess'))
+        file.write(raw_record(b"[1, 2]"))
+    spool.append([make_row(1), make_row(2)])
+
+    reopened = LogSpool(path)
+    reopened.open()
+    assert reopened.depth == 5
+
+    # 损坏的记录之前的行先重放
+    rows = reopened.read(10)
+    assert [row["message"] for row in rows] == ["message 0"]
+    reopened.ack(len(rows))
+
+    rows = reopened.read(10)
+    assert [row["message"] for row in rows] == ["message 1", "message 2"]
+    assert rows[0]["timestamp"] == datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert reopened.corrupted == 2
+    reopened.ack(len(rows))
+    assert reopened.depth == 0
+
+    with open(f"{path}.corrupt", "rb") as file:
+        assert file.read() == raw_record(b'{"level": "INFO", "mess') + raw_record(b"[1, 2]")
+
+
+def test_truncated_tail_is_cut_before_new_appends(tmp_path):
+    path = str(tmp_path / "spool.bin")
+    spool = LogSpool(path)
+    spool.open()
+    spool.append([make_row(0)])
+    with open(path, "ab") as file:
+        file.write(LENGTH.pack(100) + b'{"level"')
+
+    reopened = LogSpool(path)
+    reopened.open()
+    assert reopened.depth == 1
+    assert reopened.corrupted == 1
+    reopened.append([make_row(1)])
+
+    rows = reopened.read(10)
+    assert [row["message"] for row in rows] == ["message 0", "message 1"]
+
+
+class FailingSpool(LogSpool):
+    def append(self, rows):
+        raise OSError(28, "No space left on device")
+
+    def read(self, limit):
+        raise OSError(5, "Input/output error")
+
+
+def test_sink_survives_spool_errors(tmp_path):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    spool = FailingSpool(str(tmp_path / "spool.bin"))
+    sink = DatabaseLogSink(rollup=False, breaker=breaker, spool=spool, flush_interval=0.01)
+
+    async def run():
+        sink.start()
+        spool.depth = 1
+        sink.put(make_row(0), 20)
+        await asyncio.sleep(0.05)
+        # 断路器恢复后重放读取失败
+        breaker.record_success()
+        await asyncio.sleep(0.05)
+        alive = not sink._task.done()
+        sink._task.cancel()
+        return alive
+
+    assert asyncio.run(run())
+    metrics = sink.metrics()
+    assert metrics["failed"] == 1
+    assert metrics["errors"] >= 2
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from fast_admin.core import pagination
+from fast_admin.core.pagination import count
+
+
+class FakeQuery:
+    """只实现 count 所需接口的查询集"""
+
+    def __init__(self, rows: int):
+        self.rows = rows
+        self.counts = 0
+
+    def sql(self) -> str:
+        return "SELECT * FROM logs"
+
+    async def count(self) -> int:
+        self.counts += 1
+        return self.rows
+
+
+@pytest.fixture(autouse=True)
+def estimates(monkeypatch):
+    monkeypatch.setattr(pagination, "count_cache", pagination.TTLCache(ttl=60))
+    calls = []
+
+    async def estimate_count(query):
+        calls.append(query)
+        return query.rows
+
+    monkeypatch.setattr(pagination, "estimate_count", estimate_count)
+    return calls
+
+
+def test_exact_count_is_not_cached():
+    query = FakeQuery(rows=3)
+    assert asyncio.run(count(query, "exact")) == 3
+
+    query.rows = 4
+    assert asyncio.run(count(query, "exact")) == 4
+    assert query.counts == 2
+
+
+def test_estimated_count_is_cached(estimates):
+    query = FakeQuery(rows=3)
+    assert asyncio.run(count(query, "estimated")) == 3
+
+    query.rows = 4
+    assert asyncio.run(count(query, "estimated")) == 3
+    assert len(estimates) == 1
+
+
+def test_none_count_skips_query():
+    query = FakeQuery(rows=3)
+    assert asyncio.run(count(query, "none")) is None
+    assert query.counts == 0
@@ -0,0 +1,28 @@
+import asyncio
+
+from fast_admin.core.password import PasswordService
+from fast_admin.schemas.auth import PasswordMetrics
+
+
+def test_metrics_count_hash_and_verify():
+    service = PasswordService(max_workers=1, max_concurrency=1)
+
+    async def run():
+        password_hash = await service.hash("secret")
+        results = await asyncio.gather(
+            service.verify("secret", password_hash),
+            service.verify("wrong", password_hash),
+        )
+        return results
+
+    try:
+        assert asyncio.run(run()) == [True, False]
+    finally:
+        service.shutdown()
+
+    metrics = PasswordMetrics(**service.metrics())
+    assert metrics.calls == 3
+    assert metrics.waiting == 0
+    # 并发数为 1 时第二次校验需要等待第一次完成
+    assert metrics.queue_time_max > 0
+    assert 0 < metrics.queue_time_avg <= metrics.queue_time_max
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from fast_admin.models import permission as permission_module
+from fast_admin.models.permission import PermissionRegistry
+
+
+class FakePermissions:
+    """只实现注册表加载所需查询的权限表"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.ids = None
+
+    def all(self):
+        self.ids = None
+        return self
+
+    def filter(self, id__in):
+        self.ids = set(id__in)
+        return self
+
+    async def values_list(self, *fields):
+        assert fields == ("id", "bit", "code", "type")
+        return [row for row in self.rows if self.ids is None or row[0] in self.ids]
+
+
+@pytest.fixture
+def permissions(monkeypatch):
+    table = FakePermissions([(10, 0, "user:read", "operation"), (3, 1, "role:read", "operation"), (7, 2, "user:create", "operation")])
+    monkeypatch.setattr(permission_module, "Permission", table)
+    return table
+
+
+def test_bits_come_from_permission_table(permissions):
+    registry = PermissionRegistry()
+    asyncio.run(registry.load())
+
+    assert [registry.bit(permission_id) for permission_id in (10, 3, 7)] == [0, 1, 2]
+    assert registry.ref("user:read").mask == 0b001
+    assert registry.ref("role:read").mask == 0b010
+    assert registry.ref("user:create").mask == 0b100
+    assert registry.ref("user:delete").mask == 0
+    assert registry.mask_of([10, 7, 99]) == 0b101
+
+
+def test_adding_and_renaming_permissions_keeps_bits_and_layout(permissions):
+    registry = PermissionRegistry()
+    asyncio.run(registry.load())
+    layout = registry.layout
+
+    permissions.rows.append((12, 3, "menu:read", "page"))
+    permissions.rows[0] = (10, 0, "user:view", "operation")
+    asyncio.run(registry.refresh_permissions(12, 10, publish=False))
+
+    assert registry.layout == layout
+    assert registry.ref("menu:read", "page").mask == 0b1000
+    assert registry.ref("user:view").mask == 0b001
+    assert registry.ref("user:read").mask == 0
+    assert registry.ref("role:read").mask == 0b010
+
+
+def test_deleting_permission_retires_its_bit(permissions):
+    registry = PermissionRegistry()
+    asyncio.run(registry.load())
+    layout = registry.layout
+
+    permissions.rows.remove((3, 1, "role:read", "operation"))
+    asyncio.run(registry.refresh_permissions(3, publish=False))
+
+    assert registry.layout != layout
+    assert registry.bit(3) is None
+    assert registry.ref("role:read").mask == 0
+    assert registry.ref("user:create").mask == 0b100
+
+    # 其他 worker 全量加载得到相同的布局
+    other = PermissionRegistry()
+    asyncio.run(other.load())
+    assert other.layout == registry.layout
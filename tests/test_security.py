@@ -0,0 +1,101 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from fast_admin.core import cache as cache_module
+from fast_admin.core import security
+from fast_admin.core.cache import bind_redis, unbind_redis
+from fast_admin.core.exceptions import CustomException
+from fast_admin.models.permission import permission_registry
+from fast_admin.models.user import permission_versions
+from fast_admin.schemas.token import TokenPayload
+
+
+@pytest.fixture(autouse=True)
+def stateless(monkeypatch):
+    monkeypatch.setattr(security.settings, "AUTH_STATELESS", True)
+    monkeypatch.setattr(cache_module, "_invalidation_handlers", {})
+
+
+@pytest.fixture
+def database_user(monkeypatch):
+    loaded = []
+
+    async def get_user_by_username(username):
+        loaded.append(username)
+        return security.TokenUser(id=1, username=username, is_superuser=False, mask=0)
+
+    monkeypatch.setattr(security, "get_user_by_username", get_user_by_username)
+    return loaded
+
+
+def token_payload(pv: int, pl: str = None) -> TokenPayload:
+    return TokenPayload(
+        sub="alice",
+        exp=datetime.now(timezone.utc) + timedelta(minutes=5),
+        type="access",
+        uid=1,
+        su=False,
+        pm="ff",
+        pl=permission_registry.layout if pl is None else pl,
+        pv=pv,
+    )
+
+
+def test_stateless_token_without_redis_loads_user_from_database(database_user):
+    user = asyncio.run(security.load_user(token_payload(pv=0)))
+
+    assert database_user == ["alice"]
+    assert user.mask == 0
+
+
+def test_stateless_token_checks_version_in_redis(database_user):
+    async def run():
+        bind_redis(FakeRedis(server=FakeServer()))
+        try:
+            version = await permission_versions.ensure(1)
+            user = await security.load_user(token_payload(pv=version))
+            assert user.mask == 0xff
+
+            await permission_versions.incr(1)
+            with pytest.raises(CustomException):
+                await security.load_user(token_payload(pv=version))
+            user = await security.load_user(token_payload(pv=version + 1))
+            assert user.mask == 0xff
+        finally:
+            await unbind_redis()
+
+    asyncio.run(run())
+    assert database_user == []
+
+
+def test_stateless_token_with_lost_version_loads_user_from_database(database_user):
+    async def run():
+        redis = FakeRedis(server=FakeServer())
+        bind_redis(redis)
+        try:
+            version = await permission_versions.ensure(1)
+            await redis.delete(permission_versions._redis_key(1))
+            return await security.load_user(token_payload(pv=version))
+        finally:
+            await unbind_redis()
+
+    user = asyncio.run(run())
+    assert database_user == ["alice"]
+    assert user.mask == 0
+
+
+def test_stateless_token_with_old_bit_layout_loads_user_from_database(database_user):
+    async def run():
+        bind_redis(FakeRedis(server=FakeServer()))
+        try:
+            return await security.load_user(token_payload(pv=0, pl="stale"))
+        finally:
+            await unbind_redis()
+
+    user = asyncio.run(run())
+    assert database_user == ["alice"]
+    assert user.mask == 0
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from tortoise import Tortoise, connections
+
+from fast_admin.core import cache as cache_module
+from fast_admin.core.cache import bind_redis, unbind_redis
+from fast_admin.core.config import TORTOISE_ORM
+from fast_admin.core.password import password_service
+from fast_admin.models.user import User, get_user_by_username, user_cache
+
+"""
+用户缓存的测试，需要 DATABASE_* 环境变量指向的 PostgreSQL，数据库不可用时跳过。
+
+"""
+
+
+@pytest.fixture(autouse=True)
+def invalidation_handlers(monkeypatch):
+    # 隔离其他模块注册的失效处理函数 (例如需要数据库的权限注册表)
+    monkeypatch.setattr(cache_module, "_invalidation_handlers", {})
+
+
+def test_cached_user_excludes_password_hash():
+    async def run():
+        await Tortoise.init(config=TORTOISE_ORM)
+        try:
+            try:
+                await connections.get("default").execute_query("SELECT 1")
+            except OSError as exc:
+                pytest.skip(f"PostgreSQL 不可用: {exc!r}")
+
+            redis = FakeRedis(server=FakeServer())
+            bind_redis(redis)
+            user = await User.create(username="test_cache_user", password_hash=await password_service.hash("secret"))
+            try:
+                cached = await get_user_by_username("test_cache_user")
+                assert b"password_hash" not in await redis.get(user_cache._redis_key("test_cache_user"))
+                assert "password_hash" not in user_cache.local.get("test_cache_user")
+
+                # 登录路径单独读取密码哈希
+                assert await cached.verify_password("secret")
+                assert not await cached.verify_password("wrong")
+            finally:
+                await user.delete()
+                await user_cache.invalidate("test_cache_user")
+                await unbind_redis()
+        finally:
+            await Tortoise.close_connections()
+
+    asyncio.run(run())